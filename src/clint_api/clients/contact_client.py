@@ -7,8 +7,12 @@ from ..exceptions.api_exceptions import (
     ClintAPIException,
     ContactNotFoundException,
     ContactAlreadyExistsException,
-    APIAuthenticationError
+    APIAuthenticationError,
+    TransientAPIError
 )
+from ..utils.circuit_breaker import get_circuit_breaker
+from ..utils.retry_policy import RETRYABLE_STATUS_CODES, parse_retry_after
+from ..utils.deadline import request_timeout
 
 class ContactClient:
     """Cliente para gerenciamento de contatos na API Clint"""
@@ -20,6 +24,27 @@ class ContactClient:
             "content-type": "application/json",
             "api-token": api_token
         }
+        self.circuit_breaker = get_circuit_breaker("clint")
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Executa uma requisição à API Clint protegida pelo circuit breaker
+
+        Erros de rede e respostas 429/5xx contam como falha do serviço; com o
+        circuito aberto a chamada falha imediatamente com CircuitOpenError.
+        """
+        return self.circuit_breaker.call(self._send, method, url, **kwargs)
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Envia a requisição e converte respostas 429/5xx em TransientAPIError"""
+        response = requests.request(method, url, headers=self.headers, timeout=request_timeout(), **kwargs)
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            raise TransientAPIError(
+                f"Erro temporário na API Clint. Status: {response.status_code}, Resposta: {response.text}",
+                status_code=response.status_code,
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+        return response
 
     def _handle_response(self, response: requests.Response) -> Dict[str, Any]:
         """Processa a resposta da API e trata erros"""
@@ -44,9 +69,9 @@ class ContactClient:
     def create_contact(self, contact: Contato) -> Dict[str, Any]:
         """Cria um novo contato"""
         url = f"{self.base_url}/contacts"
-        response = requests.post(
+        response = self._request(
+            "POST",
             url,
-            headers=self.headers,
             data=json.dumps(contact.to_dict())
         )
         
@@ -61,7 +86,7 @@ class ContactClient:
     def get_contact(self, contact_id: str) -> Dict[str, Any]:
         """Busca um contato pelo ID"""
         url = f"{self.base_url}/contacts/{contact_id}"
-        response = requests.get(url, headers=self.headers)
+        response = self._request("GET", url)
         result = self._handle_response(response)
         return result
 
@@ -71,9 +96,9 @@ class ContactClient:
             raise ValueError("ID do contato é necessário para atualização")
         
         url = f"{self.base_url}/contacts/{contact.id}"
-        response = requests.put(
+        response = self._request(
+            "PUT",
             url,
-            headers=self.headers,
             data=json.dumps(contact.to_dict())
         )
         self._handle_response(response)
@@ -83,7 +108,7 @@ class ContactClient:
         """Remove um contato pelo ID"""
         url = f"{self.base_url}/contacts/{contact_id}"
         try:
-            response = requests.delete(url, headers=self.headers)
+            response = self._request("DELETE", url)
             self._handle_response(response)
             print(f"Contato {contact_id} deletado com sucesso!")
             return True
@@ -95,7 +120,7 @@ class ContactClient:
         """Lista contatos com paginação"""
         url = f"{self.base_url}/contacts"
         params = {"page": page, "limit": limit}
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self._request("GET", url, params=params)
         result = self._handle_response(response)
         return result.get("data", [])
 
@@ -103,6 +128,6 @@ class ContactClient:
         """Busca contatos por termo de pesquisa"""
         url = f"{self.base_url}/contacts/search"
         params = {"q": query}
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self._request("GET", url, params=params)
         result = self._handle_response(response)
         return result.get("data", []) 
\ No newline at end of file
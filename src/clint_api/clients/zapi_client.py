@@ -1,17 +1,43 @@
 import requests
 import json
+import os
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from ..models.whatsapp_message import WhatsAppMessage, MessageType
-from ..exceptions.api_exceptions import APIAuthenticationError, ClintAPIException
+from ..exceptions.api_exceptions import APIAuthenticationError, ClintAPIException, TransientAPIError
 from ..utils.decorators import retry, log_api_call
+from ..utils.retry_policy import RetryPolicy, RETRYABLE_STATUS_CODES, parse_retry_after
+from ..utils.circuit_breaker import get_circuit_breaker, zapi_breaker_name
+from ..utils.connection_state import get_connection_state
+from ..utils.deadline import deadline, request_timeout
+from ..utils.media_cache import get_media_cache
+from ..utils.media_encoding import MediaJSONBody
+from ..utils.config import Config
 from ..utils.logger import APILogger
 from ..services.contact_service import ContactService
+from ..services.suppression_service import get_suppression_list
+from ..services.contact_status_writer import get_contact_status_writer
+from ..models.contact import ContatoStatus
 from ..utils.phone_formatter import PhoneFormatter
 
 logger = APILogger("zapi_client")
 
+# Política de retry das chamadas à Z-API (full jitter + Retry-After + orçamento global)
+ZAPI_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=1.0, backoff=2.0)
+
+# Envios não são idempotentes: repetir um timeout de leitura duplicaria a
+# mensagem, então só se repetem falhas de conexão e recusas 429/503
+ZAPI_SEND_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=1.0, backoff=2.0, idempotent=False)
+
+# Endpoint e campo do base64 para envio de arquivos locais, por tipo de mídia
+MEDIA_FILE_ENDPOINTS = {
+    MessageType.AUDIO: ("send-audio", "audio"),
+    MessageType.IMAGE: ("send-image", "image"),
+    MessageType.VIDEO: ("send-video", "video"),
+    MessageType.DOCUMENT: ("send-document", "document"),
+}
+
 class ZAPIClient:
     """Cliente para integração com a Z-API"""
     
@@ -25,6 +51,24 @@ class ZAPIClient:
             "Content-Type": "application/json"
         }
         self.contact_service = ContactService()
+        
+        # Circuit breaker compartilhado por todos os clientes da mesma instância;
+        # a recuperação é testada com is_connected
+        self.circuit_breaker = get_circuit_breaker(zapi_breaker_name(instance_id))
+        if self.circuit_breaker.probe is None:
+            self.circuit_breaker.probe = self.is_connected
+        
+        # Último status de conexão conhecido (atualizado também pelos webhooks)
+        self.connection_state = get_connection_state(instance_id)
+        
+        # Base64 e referências de mídias já enviadas, por conteúdo
+        self.media_cache = get_media_cache()
+        
+        # Telefones em "não perturbe"/removidos, verificados antes de cada envio
+        self.suppression_list = get_suppression_list()
+        
+        # Status dos contatos após os envios (write-behind)
+        self.status_writer = get_contact_status_writer()
     
     def _get_url(self, endpoint: str) -> str:
         """Constrói a URL completa para o endpoint"""
@@ -35,6 +79,12 @@ class ZAPIClient:
         try:
             if response.status_code == 401:
                 raise APIAuthenticationError("Token ou Instance ID inválidos")
+            elif response.status_code in RETRYABLE_STATUS_CODES:
+                raise TransientAPIError(
+                    f"Erro temporário na API Z-API ({response.status_code}): {response.text}",
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                )
             elif response.status_code not in [200, 201, 202]:
                 raise ClintAPIException(f"Erro na API Z-API: {response.text}")
             
@@ -42,58 +92,130 @@ class ZAPIClient:
         except ValueError as e:
             raise ClintAPIException(f"Resposta inválida da API: {str(e)}")
     
-    @retry(max_attempts=3, delay=1.0)
+    @retry(policy=ZAPI_RETRY_POLICY)
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa uma requisição idempotente à Z-API, repetindo falhas temporárias
+        
+        Erros de rede e respostas 429/5xx são repetidos conforme a
+        ZAPI_RETRY_POLICY; demais erros são lançados imediatamente.
+        """
+        return self._execute(method, endpoint, payload)
+    
+    @retry(policy=ZAPI_SEND_RETRY_POLICY)
+    def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Optional[Dict[str, Any]] = None,
+        body: Optional[MediaJSONBody] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa um envio à Z-API, repetindo apenas o que não foi processado
+        
+        Só falhas de conexão e respostas 429/503 são repetidas
+        (ZAPI_SEND_RETRY_POLICY): após um timeout de leitura a Z-API pode já
+        ter aceitado a mensagem.
+        """
+        return self._execute(method, endpoint, payload, body)
+    
+    def _execute(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Optional[Dict[str, Any]] = None,
+        body: Optional[MediaJSONBody] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa uma única requisição à Z-API
+        
+        Args:
+            method: Método HTTP
+            endpoint: Endpoint relativo à instância
+            payload: Corpo JSON (dicionário)
+            body: Corpo JSON já serializado em streaming (substitui payload)
+        """
+        if body is not None:
+            # Cada tentativa reenvia o corpo desde o início
+            body.seek(0)
+        
+        response = requests.request(
+            method,
+            self._get_url(endpoint),
+            headers=self.headers,
+            json=payload if body is None else None,
+            data=body,
+            timeout=request_timeout()
+        )
+        
+        logger.debug(f"Status code: {response.status_code}")
+        logger.debug(f"Resposta: {response.text}")
+        
+        return self._handle_response(response)
+    
+    def _call(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Optional[Dict[str, Any]] = None,
+        body: Optional[MediaJSONBody] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa um envio protegido pelo circuit breaker da instância
+        
+        Com o circuito aberto falha imediatamente com CircuitOpenError,
+        sem aguardar timeouts nem retries.
+        """
+        return self.circuit_breaker.call(self._send_request, method, endpoint, payload, body)
+    
     @log_api_call("zapi_restart_connection")
     def restart_connection(self) -> bool:
         """Reinicia a conexão com o WhatsApp"""
-        url = self._get_url("restart")
-        
         try:
             logger.info("Reiniciando conexão com o WhatsApp...")
-            response = requests.post(url, headers=self.headers)
-            
-            logger.debug(f"Status code: {response.status_code}")
-            logger.debug(f"Resposta: {response.text}")
-            
-            if response.status_code in [200, 201]:
-                logger.info("Conexão reiniciada com sucesso!")
-                return True
-            else:
-                logger.error(f"Erro ao reiniciar conexão: {response.text}")
-                return False
+            self._request("POST", "restart")
+            logger.info("Conexão reiniciada com sucesso!")
+            return True
                 
         except Exception as e:
             logger.error(f"Erro ao reiniciar conexão: {str(e)}")
             return False
     
-    @retry(max_attempts=3, delay=1.0)
     @log_api_call("zapi_connection_status")
     def is_connected(self) -> bool:
         """Verifica se está conectado ao WhatsApp"""
-        url = f"{self.base_url}/status"
-        
         try:
             logger.info(f"Verificando status de conexão")
-            response = requests.get(url, headers=self.headers)
+            result = self._request("GET", "status")
             
-            logger.debug(f"Status code: {response.status_code}")
-            logger.debug(f"Resposta: {response.text}")
-            
-            if response.status_code == 200:
-                result = response.json()
-                connected = result.get("connected", False)
-                status = result.get("status", "unknown")
-                logger.info(f"Status de conexão: {status} (Conectado: {'Sim' if connected else 'Não'})")
-                return connected
-            else:
-                logger.error(f"Erro ao verificar status: {response.text}")
-                return False
+            connected = result.get("connected", False)
+            status = result.get("status", "unknown")
+            logger.info(f"Status de conexão: {status} (Conectado: {'Sim' if connected else 'Não'})")
+            self.connection_state.set(bool(connected))
+            return connected
                 
         except Exception as e:
             logger.error(f"Erro ao verificar status: {str(e)}")
+            self.connection_state.invalidate()
             return False
     
-    @retry(max_attempts=3, delay=1.0)
+    def is_connected_cached(self) -> bool:
+        """
+        Verifica a conexão usando o status em cache
+        
+        Só consulta a Z-API quando o status é desconhecido ou expirou
+        (ver Config.ZAPI_CONNECTION_STATUS_TTL).
+        """
+        connected = self.connection_state.connected
+        if connected is None:
+            return self.is_connected()
+        return connected
+    
     @log_api_call("zapi_send_message")
     def send_message(self, message: WhatsAppMessage) -> Optional[WhatsAppMessage]:
         """Envia uma mensagem via Z-API"""
@@ -101,54 +223,206 @@ class ZAPIClient:
         if not PhoneFormatter.is_valid(message.phone):
             logger.error(f"Número de telefone inválido: {message.phone}")
             return None
+        
+        if self._is_suppressed(message.phone):
+            return None
             
         # Formata o número para a API (com prefixo 55)
         api_phone = PhoneFormatter.format_to_api(message.phone)
         
         # Determina o endpoint com base no tipo de mensagem
         endpoint = "send-text" if message.message_type == MessageType.TEXT else "send-media"
-        url = f"{self.base_url}/{endpoint}"
-        
-        # Prepara o payload
-        payload = {
-            "phone": api_phone,
-            "message": message.message,
-            "delayMessage": max(2, len(message.message) // 20),  # Delay baseado no tamanho da mensagem
-            "delayTyping": max(3, len(message.message) // 15)    # Tempo digitando proporcional ao tamanho
-        }
         
-        # Adiciona parâmetros de mídia se necessário
-        if message.message_type != MessageType.TEXT:
-            payload["url"] = message.media_url
-            if message.caption:
-                payload["caption"] = message.caption
+        # Corpo da requisição (atrasos pré-calculados pelo template ou pelo tamanho do texto)
+        payload = message.to_request_body(api_phone)
+        
+        # Mídia local: envia em base64 ou publica no servidor de mídia
+        if message.message_type != MessageType.TEXT and self._is_local_media(message.media_url):
+            if not Config.MEDIA_PUBLIC_BASE_URL:
+                # Sem servidor de mídia público: envia o arquivo em base64 (streaming)
+                return self._send_local_media(message)
+            # Publica o arquivo no servidor de mídia e envia apenas a URL
+            try:
+                payload["url"] = self.publish_media(message.media_url)
+            except OSError as e:
+                logger.error(f"Erro ao publicar mídia {message.media_url}: {str(e)}")
+                return None
         
         try:
             logger.info(f"Enviando mensagem para {api_phone}")
             logger.debug(f"Payload: {json.dumps(payload)}")
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            # Prazo total do envio, incluindo retries e esperas de backoff
+            with deadline(Config.ZAPI_SEND_DEADLINE):
+                data = self._call("POST", endpoint, payload)
             
-            logger.debug(f"Status code: {response.status_code}")
-            logger.debug(f"Resposta: {response.text}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                message.message_id = data.get("messageId")
-                message.status = "sent"
-                logger.info(f"Mensagem enviada com sucesso! ID: {message.message_id}")
-                
-                # Atualiza o status do contato para ativo
-                db_phone = PhoneFormatter.format_to_db(message.phone)
-                logger.info(f"Atualizando status do contato {db_phone} para ativo")
-                self.contact_service.mark_as_active(db_phone)
-                logger.info(f"Status do contato atualizado para ativo")
+            return self._mark_sent(message, data)
                 
-                return message
+        except Exception as e:
+            logger.error(f"Erro ao enviar mensagem: {str(e)}")
+            return None
+    
+    @log_api_call("zapi_send_media_file")
+    def send_media_file(
+        self,
+        phone: str,
+        file_path: str,
+        message_type: MessageType,
+        caption: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Optional[WhatsAppMessage]:
+        """
+        Envia um arquivo local (áudio, imagem, vídeo ou documento) em base64
+        
+        O corpo JSON é montado em blocos durante o envio (ver
+        MediaJSONBody), sem carregar o arquivo nem a string base64 inteira
+        em memória. Com ``use_cache`` o base64 vem do cache de mídia, que
+        codifica cada conteúdo uma única vez; se Config.MEDIA_PUBLIC_BASE_URL
+        estiver definido, o arquivo é publicado no servidor de mídia e só a
+        URL é enviada.
+        
+        Args:
+            phone: Número do destinatário
+            file_path: Caminho do arquivo de mídia
+            message_type: Tipo da mídia (AUDIO, IMAGE, VIDEO ou DOCUMENT)
+            caption: Legenda (imagem, vídeo e documento)
+            use_cache: Usa o cache de mídia endereçado por conteúdo
+        
+        Returns:
+            Mensagem enviada ou None em caso de erro
+        """
+        if message_type not in MEDIA_FILE_ENDPOINTS:
+            logger.error(f"Tipo de mídia não suportado para arquivo: {message_type.value}")
+            return None
+        
+        if not PhoneFormatter.is_valid(phone):
+            logger.error(f"Número de telefone inválido: {phone}")
+            return None
+        
+        if self._is_suppressed(phone):
+            return None
+        
+        api_phone = PhoneFormatter.format_to_api(phone)
+        endpoint, field, fields = self._media_file_request(api_phone, file_path, message_type, caption)
+        message = WhatsAppMessage(
+            phone=phone,
+            message=caption or "",
+            message_type=message_type,
+            caption=caption,
+            instance_id=self.instance_id
+        )
+        
+        try:
+            payload, body = None, None
+            if use_cache and Config.MEDIA_PUBLIC_BASE_URL:
+                # Arquivo publicado no servidor de mídia: envia só a URL
+                payload = dict(fields, **{field: self.publish_media(file_path)})
+                logger.info(f"Enviando {field} por URL para {api_phone}")
+            elif use_cache:
+                digest, encoded_path = self.media_cache.encoded_path(file_path)
+                body = MediaJSONBody(
+                    file_path,
+                    field,
+                    fields,
+                    mime_type=self.media_cache.mime_type(digest),
+                    encoded_path=encoded_path
+                )
             else:
-                logger.error(f"Erro ao enviar mensagem: {response.text}")
-                return None
+                body = MediaJSONBody(file_path, field, fields)
+            
+            if body is not None:
+                logger.info(f"Enviando {field} ({len(body)} bytes) para {api_phone}")
+            
+            with deadline(Config.ZAPI_SEND_DEADLINE):
+                data = self._call("POST", endpoint, payload, body)
+            
+            return self._mark_sent(message, data)
                 
         except Exception as e:
-            logger.error(f"Erro ao enviar mensagem: {str(e)}")
-            return None
\ No newline at end of file
+            logger.error(f"Erro ao enviar arquivo {file_path}: {str(e)}")
+            return None
+    
+    def publish_media(self, file_path: str) -> str:
+        """
+        Publica um arquivo local na rota /media do servidor de webhooks
+        
+        O arquivo é copiado uma única vez para o cache de mídia (endereçado
+        por conteúdo) e servido em Config.MEDIA_PUBLIC_BASE_URL.
+        
+        Args:
+            file_path: Caminho do arquivo de mídia
+        
+        Returns:
+            URL pública do arquivo
+        """
+        digest = self.media_cache.publish(file_path)
+        extension = os.path.splitext(file_path)[1].lower()
+        url = f"{Config.MEDIA_PUBLIC_BASE_URL.rstrip('/')}/media/{digest}{extension}"
+        
+        if self.media_cache.get_ref(digest, "url") != url:
+            self.media_cache.set_ref(digest, "url", url)
+        return url
+    
+    @staticmethod
+    def _is_local_media(media_url: Optional[str]) -> bool:
+        """Indica se a mídia da mensagem é um arquivo local (e não URL/base64)"""
+        if not media_url or media_url.startswith(("http://", "https://", "data:")):
+            return False
+        return os.path.isfile(media_url)
+    
+    def _send_local_media(self, message: WhatsAppMessage) -> Optional[WhatsAppMessage]:
+        """Envia a mídia local da mensagem em base64 via send_media_file"""
+        sent = self.send_media_file(
+            message.phone,
+            message.media_url,
+            message.message_type,
+            caption=message.caption
+        )
+        if sent is None:
+            return None
+        message.message_id = sent.message_id
+        message.status = sent.status
+        return message
+    
+    def _media_file_request(
+        self,
+        api_phone: str,
+        file_path: str,
+        message_type: MessageType,
+        caption: Optional[str]
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Retorna endpoint, campo do base64 e demais campos do envio de arquivo"""
+        endpoint, field = MEDIA_FILE_ENDPOINTS[message_type]
+        fields: Dict[str, Any] = {"phone": api_phone}
+        
+        if message_type != MessageType.AUDIO:
+            fields["caption"] = caption
+        
+        if message_type == MessageType.DOCUMENT:
+            # A Z-API recebe a extensão do documento no próprio endpoint
+            file_name = os.path.basename(file_path)
+            extension = os.path.splitext(file_name)[1].lstrip(".").lower() or "pdf"
+            endpoint = f"{endpoint}/{extension}"
+            fields["fileName"] = os.path.splitext(file_name)[0]
+        
+        return endpoint, field, fields
+    
+    def _is_suppressed(self, phone: str) -> bool:
+        """Verifica (em memória) se o contato pediu para não receber mensagens"""
+        if self.suppression_list.is_suppressed(phone):
+            logger.warning(f"Envio ignorado: {phone} está na lista de supressão")
+            return True
+        return False
+    
+    def _mark_sent(self, message: WhatsAppMessage, data: Dict[str, Any]) -> WhatsAppMessage:
+        """Registra o envio bem sucedido e marca o contato como ativo"""
+        message.message_id = data.get("messageId")
+        message.status = "sent"
+        self.connection_state.set(True)
+        logger.info(f"Mensagem enviada com sucesso! ID: {message.message_id}")
+        
+        # Marca o contato como ativo; gravado em lote em segundo plano, sem
+        # esperar pelo banco de contatos
+        self.status_writer.record(message.phone, ContatoStatus.ATIVO)
+        
+        return message
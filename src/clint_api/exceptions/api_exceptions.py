@@ -12,4 +12,24 @@ class ContactAlreadyExistsException(ClintAPIException):
 
 class APIAuthenticationError(ClintAPIException):
     """Exceção lançada quando há problemas de autenticação"""
-    pass 
\ No newline at end of file
+    pass 
+
+class TransientAPIError(ClintAPIException):
+    """Exceção lançada para falhas temporárias (429, 5xx) que podem ser repetidas"""
+
+    def __init__(self, message: str, status_code: int = None, retry_after: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class CircuitOpenError(ClintAPIException):
+    """Exceção lançada quando o circuit breaker de um serviço está aberto"""
+    pass
+
+class DeadlineExceededError(ClintAPIException):
+    """Exceção lançada quando o prazo de uma operação se esgota"""
+    pass
+
+class WebhookPayloadError(ClintAPIException):
+    """Exceção lançada quando um payload de webhook é inválido"""
+    pass
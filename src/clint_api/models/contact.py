@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Enum
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Boolean, Enum, Index, Text, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -16,6 +16,12 @@ class ContatoStatus(enum.Enum):
 
 class Contato(Base):
     __tablename__ = 'contatos'
+    __table_args__ = (
+        # Segmentação local: filtros por status e faixa de última interação
+        # (o DDD usa o índice único de telefone com uma consulta por faixa)
+        Index('ix_contatos_status_ultima_interacao', 'status', 'ultima_interacao'),
+        Index('ix_contatos_ultima_interacao', 'ultima_interacao'),
+    )
 
     id = Column(Integer, primary_key=True)
     nome = Column(String(100))
@@ -23,7 +29,7 @@ class Contato(Base):
     email = Column(String(100))
     status = Column(Enum(ContatoStatus), default=ContatoStatus.INATIVO)
     ultima_interacao = Column(DateTime)
-    tags = Column(String(200))  # Tags separadas por vírgula
+    tags = Column(Text)  # Tags separadas por vírgula (consultas usam a tabela contato_tags)
     clint_id = Column(String(50))  # ID do contato na API do Clint
     criado_em = Column(DateTime, default=datetime.now)
     atualizado_em = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -31,14 +37,64 @@ class Contato(Base):
     def __repr__(self):
         return f"<Contato(nome='{self.nome}', telefone='{self.telefone}', status='{self.status.value}')>"
 
+class Tag(Base):
+    """Tag de contato (nome único)"""
+    __tablename__ = 'tags'
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(100), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f"<Tag(nome='{self.nome}')>"
+
+class ContatoTag(Base):
+    """Associação entre contatos e tags"""
+    __tablename__ = 'contato_tags'
+    __table_args__ = (
+        # Busca dos contatos de uma tag (a chave primária cobre contato -> tags)
+        Index('ix_contato_tags_tag_contato', 'tag_id', 'contato_id'),
+    )
+
+    contato_id = Column(Integer, ForeignKey('contatos.id', ondelete='CASCADE'), primary_key=True)
+    tag_id = Column(Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
+
+class CampaignSend(Base):
+    """Envio confirmado de uma campanha para um telefone (deduplicação exata)"""
+    __tablename__ = 'campaign_sends'
+    __table_args__ = (
+        Index('ux_campaign_sends_campaign_telefone', 'campaign_id', 'telefone', unique=True),
+        Index('ix_campaign_sends_campaign_id', 'campaign_id', 'id'),  # Envios após o checkpoint
+    )
+
+    id = Column(Integer, primary_key=True)  # Crescente: marca até onde o filtro de Bloom está sincronizado
+    campaign_id = Column(String(100), nullable=False)
+    telefone = Column(String(20), nullable=False)  # Formato do banco (sem DDI)
+    message_id = Column(String(100))  # ID da mensagem na Z-API
+    enviado_em = Column(DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f"<CampaignSend(campaign_id='{self.campaign_id}', telefone='{self.telefone}')>"
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    """Ativa as chaves estrangeiras (ON DELETE CASCADE de contato_tags) em cada conexão SQLite"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
 def init_db():
     """Inicializa o banco de dados"""
     db_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'contatos.db')
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
     engine = create_engine(f'sqlite:///{db_path}')
+    event.listen(engine, "connect", _enable_foreign_keys)
     Base.metadata.create_all(engine)
     
+    # create_all não cria índices novos em tabelas já existentes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
     Session = sessionmaker(bind=engine)
     return Session()
 
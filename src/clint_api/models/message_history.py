@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Enum, Text
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Enum, Index, Text, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -15,9 +16,13 @@ class MessageDirection(enum.Enum):
 class MessageHistory(Base):
     """Modelo para histórico de mensagens"""
     __tablename__ = 'message_history'
+    __table_args__ = (
+        # Paginação do histórico de um número por (timestamp, id), do mais novo ao mais antigo
+        Index('ix_message_history_phone_timestamp_id', 'phone', 'timestamp', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
-    message_id = Column(String(100))  # ID da mensagem no Z-API
+    message_id = Column(String(100), index=True)  # ID da mensagem no Z-API (atualizações de status)
     phone = Column(String(20))  # Número do telefone
     direction = Column(Enum(MessageDirection))  # Enviada ou recebida
     message = Column(Text)  # Conteúdo da mensagem
@@ -29,6 +34,74 @@ class MessageHistory(Base):
     def __repr__(self):
         return f"<MessageHistory(phone='{self.phone}', direction='{self.direction.value}', timestamp='{self.timestamp}')>"
 
+class Conversation(Base):
+    """Resumo de uma conversa (caixa de entrada), atualizado a cada mensagem"""
+    __tablename__ = 'conversations'
+    __table_args__ = (
+        # Caixa de entrada: conversas da atividade mais recente para a mais antiga
+        Index('ix_conversations_last_message_at_phone', 'last_message_at', 'phone'),
+    )
+
+    phone = Column(String(20), primary_key=True)  # Número do telefone
+    last_message_id = Column(Integer)  # ID em message_history da última mensagem
+    last_message = Column(Text)  # Conteúdo da última mensagem
+    last_message_type = Column(String(20))  # Tipo da última mensagem
+    last_direction = Column(Enum(MessageDirection))  # Direção da última mensagem
+    last_message_at = Column(DateTime)  # Data/hora da última mensagem
+    last_sent_at = Column(DateTime)  # Data/hora do último envio
+    message_count = Column(Integer, default=0, nullable=False)  # Total de mensagens
+    unread_count = Column(Integer, default=0, nullable=False)  # Recebidas após o último envio (ou leitura)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<Conversation(phone='{self.phone}', unread={self.unread_count}, last_message_at='{self.last_message_at}')>"
+
+# Índice de busca textual (FTS5) sobre message_history.message. Tabela de
+# conteúdo externo: guarda só o índice, o texto continua em message_history.
+# Os gatilhos mantêm o índice em dia; atualizações de status não o tocam.
+MESSAGE_SEARCH_TABLE = 'message_history_fts'
+
+_MESSAGE_SEARCH_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {MESSAGE_SEARCH_TABLE} USING fts5(
+        message, content='message_history', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS message_history_fts_insert AFTER INSERT ON message_history BEGIN
+        INSERT INTO {MESSAGE_SEARCH_TABLE}(rowid, message) VALUES (new.id, new.message);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS message_history_fts_delete AFTER DELETE ON message_history BEGIN
+        INSERT INTO {MESSAGE_SEARCH_TABLE}({MESSAGE_SEARCH_TABLE}, rowid, message) VALUES ('delete', old.id, old.message);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS message_history_fts_update AFTER UPDATE OF message ON message_history BEGIN
+        INSERT INTO {MESSAGE_SEARCH_TABLE}({MESSAGE_SEARCH_TABLE}, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO {MESSAGE_SEARCH_TABLE}(rowid, message) VALUES (new.id, new.message);
+    END""",
+)
+
+def create_message_search_index(engine) -> bool:
+    """
+    Cria o índice FTS5 do histórico e seus gatilhos, se ainda não existirem
+    
+    Em bancos com histórico anterior ao índice, indexa as mensagens existentes.
+    
+    Returns:
+        True se o índice está disponível (False se o SQLite não tem FTS5)
+    """
+    with engine.begin() as connection:
+        existed = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": MESSAGE_SEARCH_TABLE}
+        ).first() is not None
+        try:
+            for statement in _MESSAGE_SEARCH_DDL:
+                connection.execute(text(statement))
+        except OperationalError:
+            # SQLite compilado sem FTS5: a busca usa LIKE
+            return False
+        if not existed:
+            connection.execute(text(f"INSERT INTO {MESSAGE_SEARCH_TABLE}({MESSAGE_SEARCH_TABLE}) VALUES ('rebuild')"))
+    return True
+
 def init_message_history_db():
     """Inicializa o banco de dados de histórico de mensagens"""
     db_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'message_history.db')
@@ -37,5 +110,12 @@ def init_message_history_db():
     engine = create_engine(f'sqlite:///{db_path}')
     Base.metadata.create_all(engine)
     
+    # create_all não cria índices novos em tabelas já existentes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    create_message_search_index(engine)
+    
     Session = sessionmaker(bind=engine)
     return Session() 
\ No newline at end of file
@@ -0,0 +1,287 @@
+"""
+Eventos tipados dos webhooks da Z-API.
+
+Cada callback (mensagem recebida, status de mensagem, presença no chat,
+conexão/desconexão) vira uma NamedTuple imutável, validada uma única vez na
+entrada por ``decode_webhook``. Os handlers recebem os campos já extraídos e
+convertidos, sem repetir a sondagem de chaves do payload.
+
+Exemplo:
+    event = decode_webhook(await request.body(), default_type=RECEIVED_CALLBACK)
+    if isinstance(event, ReceivedMessage):
+        history_service.add_received_message(event)
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+from ..exceptions.api_exceptions import WebhookPayloadError
+
+# Valores do campo "type" enviados pela Z-API
+RECEIVED_CALLBACK = "ReceivedCallback"
+MESSAGE_STATUS_CALLBACK = "MessageStatusCallback"
+PRESENCE_CHAT_CALLBACK = "PresenceChatCallback"
+CONNECTED_CALLBACK = "ConnectedCallback"
+DISCONNECTED_CALLBACK = "DisconnectedCallback"
+
+
+class ReceivedMessage(NamedTuple):
+    """Mensagem recebida (ReceivedCallback)"""
+    message_id: Optional[str]
+    phone: str
+    message: str
+    message_type: str
+    media_url: Optional[str]
+    timestamp: datetime
+    from_me: bool = False
+    is_group: bool = False
+    sender_name: Optional[str] = None
+    chat_name: Optional[str] = None
+    instance_id: Optional[str] = None
+
+    @property
+    def summary(self) -> str:
+        """Texto para exibição, com o tipo da mídia (ex: "[Imagem] legenda")"""
+        label = _MEDIA_LABELS.get(self.message_type)
+        if label is None or self.message.startswith(label):
+            return self.message
+        return f"{label} {self.message}".rstrip()
+
+
+class MessageStatusEvent(NamedTuple):
+    """Atualização de status de mensagens enviadas (MessageStatusCallback)"""
+    message_ids: Tuple[str, ...]
+    status: str
+    phone: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    instance_id: Optional[str] = None
+
+
+class PresenceEvent(NamedTuple):
+    """Presença de um contato no chat (PresenceChatCallback)"""
+    phone: str
+    status: Optional[str]
+    is_online: bool
+    last_seen: Optional[datetime] = None
+    instance_id: Optional[str] = None
+
+
+class ConnectionEvent(NamedTuple):
+    """Conexão ou desconexão da instância (ConnectedCallback / DisconnectedCallback)"""
+    connected: bool
+    instance_id: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+WebhookEvent = Union[ReceivedMessage, MessageStatusEvent, PresenceEvent, ConnectionEvent]
+
+_MEDIA_LABELS = {
+    "image": "[Imagem]",
+    "video": "[Vídeo]",
+    "audio": "[Áudio]",
+    "document": "[Documento]",
+}
+
+
+# Conversões básicas
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    """Converte o "momment" da Z-API (milissegundos) em datetime"""
+    if value in (None, ""):
+        return None
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise WebhookPayloadError(f"Timestamp inválido no webhook: {value!r}")
+    return datetime.fromtimestamp(value / 1000)
+
+
+def _optional_str(data: Dict[str, Any], key: str) -> Optional[str]:
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, (str, int)) and not isinstance(value, bool):
+        return str(value)
+    raise WebhookPayloadError(f"Campo '{key}' inválido no webhook: {value!r}")
+
+
+def _required_str(data: Dict[str, Any], key: str) -> str:
+    value = _optional_str(data, key)
+    if not value:
+        raise WebhookPayloadError(f"Campo obrigatório ausente no webhook: '{key}'")
+    return value
+
+
+def _section(data: Dict[str, Any], key: str) -> Dict[str, Any]:
+    value = data.get(key)
+    if not isinstance(value, dict):
+        raise WebhookPayloadError(f"Campo '{key}' do webhook deve ser um objeto")
+    return value
+
+
+# Conteúdo da mensagem recebida: chave do payload -> (tipo, texto, URL da mídia)
+
+def _text_content(data: Dict[str, Any]) -> Tuple[str, str, Optional[str]]:
+    text = data["text"]
+    if isinstance(text, dict):
+        return "text", str(text.get("message") or ""), None
+    return "text", str(text or ""), None
+
+
+def _template_content(data: Dict[str, Any]) -> Tuple[str, str, Optional[str]]:
+    return "template", str(_section(data, "hydratedTemplate").get("message") or ""), None
+
+
+def _media_content(key: str, url_key: str, text: Callable[[Dict[str, Any]], str]):
+    def extract(data: Dict[str, Any]) -> Tuple[str, str, Optional[str]]:
+        media = _section(data, key)
+        return key, text(media), media.get(url_key)
+    return extract
+
+
+_CONTENT_EXTRACTORS = (
+    ("text", _text_content),
+    ("hydratedTemplate", _template_content),
+    ("image", _media_content("image", "imageUrl", lambda media: str(media.get("caption") or ""))),
+    ("video", _media_content("video", "videoUrl", lambda media: str(media.get("caption") or ""))),
+    ("audio", _media_content("audio", "audioUrl", lambda media: "[Áudio]")),
+    ("document", _media_content(
+        "document", "documentUrl", lambda media: f"[Documento] {media.get('fileName') or ''}".rstrip()
+    )),
+)
+
+
+def extract_received_message(data: Dict[str, Any]) -> ReceivedMessage:
+    """
+    Extrai a mensagem recebida de um payload ReceivedCallback
+
+    Único ponto de extração do conteúdo (texto, template ou mídia), usado
+    pelo histórico de mensagens e pelos servidores de webhook.
+
+    Raises:
+        WebhookPayloadError: Se o payload for inválido
+    """
+    message_type, message, media_url = "text", "", None
+    for key, extract in _CONTENT_EXTRACTORS:
+        if data.get(key) is not None:
+            message_type, message, media_url = extract(data)
+            break
+
+    return ReceivedMessage(
+        message_id=_optional_str(data, "messageId"),
+        phone=_required_str(data, "phone"),
+        message=message,
+        message_type=message_type,
+        media_url=media_url,
+        timestamp=_timestamp(data.get("momment")) or datetime.now(),
+        from_me=bool(data.get("fromMe")),
+        is_group=bool(data.get("isGroup")),
+        sender_name=_optional_str(data, "senderName"),
+        chat_name=_optional_str(data, "chatName"),
+        instance_id=_optional_str(data, "instanceId"),
+    )
+
+
+def _decode_message_status(data: Dict[str, Any]) -> MessageStatusEvent:
+    ids = data.get("ids")
+    if ids is None:
+        ids = [data.get("messageId")] if data.get("messageId") else []
+    if not isinstance(ids, list) or not all(isinstance(item, str) for item in ids):
+        raise WebhookPayloadError("Campo 'ids' do webhook deve ser uma lista de IDs")
+    if not ids:
+        raise WebhookPayloadError("Webhook de status sem ID de mensagem")
+
+    return MessageStatusEvent(
+        message_ids=tuple(ids),
+        status=_required_str(data, "status"),
+        phone=_optional_str(data, "phone"),
+        timestamp=_timestamp(data.get("momment")),
+        instance_id=_optional_str(data, "instanceId"),
+    )
+
+
+def _decode_presence(data: Dict[str, Any]) -> PresenceEvent:
+    presence = data.get("presence")
+    if isinstance(presence, dict):
+        # Formato antigo: {"presence": {"isOnline": ..., "lastSeen": ...}}
+        is_online = bool(presence.get("isOnline"))
+        status = "AVAILABLE" if is_online else "UNAVAILABLE"
+        last_seen = presence.get("lastSeen")
+    else:
+        status = _optional_str(data, "status")
+        is_online = status in ("AVAILABLE", "COMPOSING", "RECORDING")
+        last_seen = data.get("lastSeen")
+
+    return PresenceEvent(
+        phone=_required_str(data, "phone"),
+        status=status,
+        is_online=is_online,
+        last_seen=_timestamp(last_seen),
+        instance_id=_optional_str(data, "instanceId"),
+    )
+
+
+def _decode_connection(data: Dict[str, Any], connected: Optional[bool]) -> ConnectionEvent:
+    if connected is None:
+        connected = bool(data.get("connected")) and not data.get("disconnected")
+    return ConnectionEvent(
+        connected=connected,
+        instance_id=_optional_str(data, "instanceId"),
+        timestamp=_timestamp(data.get("momment")),
+        error=_optional_str(data, "error"),
+    )
+
+
+_DECODERS: Dict[str, Callable[[Dict[str, Any]], WebhookEvent]] = {
+    RECEIVED_CALLBACK: extract_received_message,
+    MESSAGE_STATUS_CALLBACK: _decode_message_status,
+    PRESENCE_CHAT_CALLBACK: _decode_presence,
+    CONNECTED_CALLBACK: lambda data: _decode_connection(data, True),
+    DISCONNECTED_CALLBACK: lambda data: _decode_connection(data, False),
+}
+
+
+def decode_connection_event(data: Dict[str, Any]) -> ConnectionEvent:
+    """Interpreta um payload de conexão cujo tipo pode estar ausente"""
+    if data.get("type") == DISCONNECTED_CALLBACK or data.get("disconnected"):
+        return _decode_connection(data, False)
+    if data.get("type") == CONNECTED_CALLBACK:
+        return _decode_connection(data, True)
+    return _decode_connection(data, None)
+
+
+def decode_webhook(
+    payload: Union[bytes, str, Dict[str, Any]],
+    default_type: Optional[str] = None
+) -> WebhookEvent:
+    """
+    Decodifica e valida um payload de webhook da Z-API
+
+    Args:
+        payload: Corpo da requisição (JSON em bytes/str) ou dicionário já lido
+        default_type: Tipo assumido quando o payload não traz "type"
+            (ex: a rota on-disconnect usa DISCONNECTED_CALLBACK)
+
+    Returns:
+        Evento tipado correspondente ao callback
+
+    Raises:
+        WebhookPayloadError: Se o JSON for inválido, o tipo desconhecido ou
+            faltarem campos obrigatórios
+    """
+    if isinstance(payload, (bytes, bytearray, str)):
+        try:
+            data = json.loads(payload)
+        except ValueError as e:
+            raise WebhookPayloadError(f"JSON inválido no webhook: {str(e)}") from e
+    else:
+        data = payload
+
+    if not isinstance(data, dict):
+        raise WebhookPayloadError("Payload do webhook deve ser um objeto JSON")
+
+    event_type = data.get("type") or default_type
+    decoder = _DECODERS.get(event_type)
+    if decoder is None:
+        raise WebhookPayloadError(f"Tipo de webhook desconhecido: {event_type!r}")
+    return decoder(data)
@@ -1,5 +1,7 @@
 from enum import Enum
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.phone_formatter import PhoneFormatter
 
 class MessageType(Enum):
     """Tipos de mensagem suportados"""
@@ -12,8 +14,51 @@ class MessageType(Enum):
     CONTACT = "contact"
     LINK = "link"
 
+def message_delays(text: str) -> Tuple[int, int]:
+    """
+    Calcula os atrasos de envio da Z-API a partir do tamanho do texto
+    
+    Returns:
+        Tupla (delayMessage, delayTyping), em segundos
+    """
+    length = len(text or "")
+    return max(2, length // 20), max(3, length // 15)
+
+# Campos opcionais de to_dict/from_dict: (atributo, chave no dicionário, omitido quando)
+# "falsy": omitido se vazio; "none": omitido só se None
+_OPTIONAL_FIELDS = (
+    ("media_url", "mediaUrl", "falsy"),
+    ("caption", "caption", "falsy"),
+    ("instance_id", "instanceId", "falsy"),
+    ("token", "token", "falsy"),
+    ("message_id", "messageId", "falsy"),
+    ("status", "status", "falsy"),
+    ("delay_message", "delayMessage", "none"),
+    ("delay_typing", "delayTyping", "none"),
+)
+
 class WhatsAppMessage:
-    """Modelo para mensagens do WhatsApp"""
+    """
+    Modelo para mensagens do WhatsApp
+    
+    Usa ``__slots__``: sem ``__dict__`` por instância, o que reduz bastante
+    a memória de campanhas com uma mensagem na fila por destinatário (ver
+    src/examples/benchmarks/whatsapp_message_memory.py).
+    """
+    
+    __slots__ = (
+        "phone",
+        "message",
+        "message_type",
+        "media_url",
+        "caption",
+        "instance_id",
+        "token",
+        "delay_message",
+        "delay_typing",
+        "message_id",
+        "status",
+    )
     
     def __init__(
         self,
@@ -23,7 +68,9 @@ class WhatsAppMessage:
         media_url: Optional[str] = None,
         caption: Optional[str] = None,
         instance_id: Optional[str] = None,
-        token: Optional[str] = None
+        token: Optional[str] = None,
+        delay_message: Optional[int] = None,
+        delay_typing: Optional[int] = None
     ):
         """
         Inicializa uma nova mensagem
@@ -36,6 +83,8 @@ class WhatsAppMessage:
             caption: Legenda da mídia
             instance_id: ID da instância (opcional)
             token: Token da API (opcional)
+            delay_message: Atraso do envio em segundos (padrão: pelo tamanho do texto)
+            delay_typing: Tempo "digitando" em segundos (padrão: pelo tamanho do texto)
         """
         self.phone = phone
         self.message = message
@@ -44,9 +93,42 @@ class WhatsAppMessage:
         self.caption = caption
         self.instance_id = instance_id
         self.token = token
+        self.delay_message = delay_message
+        self.delay_typing = delay_typing
         self.message_id = None
         self.status = "pending"
     
+    def delays(self) -> Tuple[int, int]:
+        """Retorna (delayMessage, delayTyping), calculando os que não foram definidos"""
+        if self.delay_message is not None and self.delay_typing is not None:
+            return self.delay_message, self.delay_typing
+        delay_message, delay_typing = message_delays(self.message)
+        return (
+            delay_message if self.delay_message is None else self.delay_message,
+            delay_typing if self.delay_typing is None else self.delay_typing
+        )
+    
+    def to_request_body(self, api_phone: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Monta o corpo da requisição de envio da Z-API (send-text / send-media)
+        
+        Args:
+            api_phone: Telefone já formatado para a API (padrão: formata ``phone``)
+        """
+        delay_message, delay_typing = self.delays()
+        body = {
+            "phone": api_phone or PhoneFormatter.format_to_api(self.phone),
+            "message": self.message,
+            "delayMessage": delay_message,
+            "delayTyping": delay_typing
+        }
+        if self.message_type is not MessageType.TEXT:
+            if self.media_url:
+                body["url"] = self.media_url
+            if self.caption:
+                body["caption"] = self.caption
+        return body
+    
     def to_dict(self) -> dict:
         """Converte a mensagem para dicionário"""
         data = {
@@ -54,25 +136,10 @@ class WhatsAppMessage:
             "message": self.message,
             "messageType": self.message_type.value
         }
-        
-        if self.media_url:
-            data["mediaUrl"] = self.media_url
-            
-        if self.caption:
-            data["caption"] = self.caption
-            
-        if self.instance_id:
-            data["instanceId"] = self.instance_id
-            
-        if self.token:
-            data["token"] = self.token
-            
-        if self.message_id:
-            data["messageId"] = self.message_id
-            
-        if self.status:
-            data["status"] = self.status
-            
+        for attribute, key, omit in _OPTIONAL_FIELDS:
+            value = getattr(self, attribute)
+            if value if omit == "falsy" else value is not None:
+                data[key] = value
         return data
     
     @classmethod
@@ -86,12 +153,12 @@ class WhatsAppMessage:
         Returns:
             Nova instância de WhatsAppMessage
         """
-        return cls(
+        message = cls(
             phone=data.get("phone"),
             message=data.get("message"),
-            message_type=MessageType(data.get("messageType", "text")),
-            media_url=data.get("mediaUrl"),
-            caption=data.get("caption"),
-            instance_id=data.get("instanceId"),
-            token=data.get("token")
-        ) 
\ No newline at end of file
+            message_type=MessageType(data.get("messageType", "text"))
+        )
+        for attribute, key, _ in _OPTIONAL_FIELDS:
+            if key in data:
+                setattr(message, attribute, data[key])
+        return message
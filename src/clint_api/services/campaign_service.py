@@ -0,0 +1,170 @@
+import hashlib
+import os
+import re
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from ..models.contact import CampaignSend, get_session
+from ..utils.bloom_filter import BloomFilter
+from ..utils.config import Config
+from ..utils.logger import APILogger
+from ..utils.phone_formatter import PhoneFormatter
+
+logger = APILogger("campaign_service")
+
+
+class CampaignDeduplicator:
+    """
+    Evita enviar a mesma campanha duas vezes para o mesmo telefone
+
+    Cada envio confirmado é gravado na tabela ``campaign_sends`` (fonte de
+    verdade, com índice único por campanha e telefone) e num filtro de Bloom
+    persistido em ``Config.CAMPAIGN_DEDUP_DIR``. A verificação consulta primeiro
+    o filtro, em memória constante: "não enviado" é definitivo e só os
+    "talvez" (enviados ou falsos positivos) vão ao banco.
+
+    O filtro guarda o ID (``checkpoint``) até o qual contém todos os envios
+    da campanha; ao abrir a campanha, os envios gravados depois disso (ex.:
+    antes de uma queda do processo, ou por outra execução da mesma campanha)
+    são acrescentados a partir da tabela, então reexecutar a campanha nunca
+    reenvia para quem já recebeu. O checkpoint só avança sobre IDs contínuos:
+    ao registrar um envio, os de outras execuções com ID intermediário são
+    lidos antes.
+    """
+
+    def __init__(
+        self,
+        campaign_id: str,
+        session=None,
+        directory: Optional[str] = None,
+        capacity: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        save_every: int = 1000
+    ):
+        """
+        Args:
+            campaign_id: Identificador da campanha
+            session: Sessão do banco de contatos (padrão: nova sessão)
+            directory: Diretório dos filtros (padrão: Config.CAMPAIGN_DEDUP_DIR)
+            capacity: Destinatários esperados (padrão: Config.CAMPAIGN_BLOOM_CAPACITY)
+            error_rate: Taxa de falsos positivos (padrão: Config.CAMPAIGN_BLOOM_ERROR_RATE)
+            save_every: Grava o filtro em disco a cada N envios registrados
+        """
+        if not campaign_id:
+            raise ValueError("campaign_id é obrigatório")
+
+        self.campaign_id = campaign_id
+        self.session = session or get_session()
+        self.save_every = save_every
+        self.path = os.path.join(directory or Config.CAMPAIGN_DEDUP_DIR, self._file_name(campaign_id))
+        self.bloom = BloomFilter.open(
+            self.path,
+            capacity or Config.CAMPAIGN_BLOOM_CAPACITY,
+            error_rate or Config.CAMPAIGN_BLOOM_ERROR_RATE
+        )
+        self.false_positives = 0
+        self._unsaved = 0
+        self._sync()
+
+    @staticmethod
+    def _file_name(campaign_id: str) -> str:
+        """Nome de arquivo seguro e único para a campanha"""
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", campaign_id)[:64]
+        suffix = hashlib.sha1(campaign_id.encode("utf-8")).hexdigest()[:8]
+        return f"{safe}-{suffix}.bloom"
+
+    def _sync(self) -> None:
+        """Acrescenta ao filtro os envios gravados após o último checkpoint"""
+        added = self._read_sends()
+        if added:
+            logger.info(f"Campanha {self.campaign_id}: {added} envio(s) recuperado(s) do banco")
+            self.save()
+
+    def _read_sends(self, before: Optional[int] = None, chunk_size: int = 5000) -> int:
+        """
+        Acrescenta ao filtro os envios com ID entre o checkpoint e ``before``
+
+        Returns:
+            Quantidade de envios lidos
+        """
+        query = self.session.query(CampaignSend.id, CampaignSend.telefone).filter(
+            CampaignSend.campaign_id == self.campaign_id,
+            CampaignSend.id > self.bloom.checkpoint
+        )
+        if before is not None:
+            query = query.filter(CampaignSend.id < before)
+
+        added = 0
+        for send_id, telefone in query.order_by(CampaignSend.id).yield_per(chunk_size):
+            self.bloom.add(telefone)
+            self.bloom.checkpoint = send_id
+            added += 1
+        return added
+
+    def already_sent(self, phone: str) -> bool:
+        """
+        Indica se a campanha já foi enviada para o telefone
+
+        Args:
+            phone: Telefone em qualquer formato (com ou sem DDI 55)
+        """
+        db_phone = PhoneFormatter.format_to_db(phone)
+        if db_phone not in self.bloom:
+            return False
+
+        sent = self.session.query(CampaignSend.id).filter_by(
+            campaign_id=self.campaign_id,
+            telefone=db_phone
+        ).first() is not None
+        if not sent:
+            self.false_positives += 1
+        return sent
+
+    def record_sent(self, phone: str, message_id: Optional[str] = None) -> None:
+        """
+        Registra o envio da campanha para o telefone
+
+        Args:
+            phone: Telefone em qualquer formato (com ou sem DDI 55)
+            message_id: ID da mensagem na Z-API
+        """
+        db_phone = PhoneFormatter.format_to_db(phone)
+        send = CampaignSend(campaign_id=self.campaign_id, telefone=db_phone, message_id=message_id)
+        self.session.add(send)
+        try:
+            self.session.commit()
+        except IntegrityError:
+            # Já registrado (ex.: por outra execução da mesma campanha)
+            self.session.rollback()
+            self.bloom.add(db_phone)
+            return
+
+        # O SQLite serializa as gravações: os IDs menores já estão commitados.
+        # Envios intermediários de outra execução entram no filtro antes de o
+        # checkpoint passar por eles.
+        if send.id > self.bloom.checkpoint + 1:
+            self._unsaved += self._read_sends(before=send.id)
+        self.bloom.add(db_phone)
+        self.bloom.checkpoint = max(self.bloom.checkpoint, send.id)
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def save(self) -> None:
+        """Grava o filtro em disco"""
+        self.bloom.save(self.path)
+        self._unsaved = 0
+
+    def close(self) -> None:
+        """Grava o filtro pendente e encerra"""
+        if self._unsaved:
+            self.save()
+        if self.false_positives:
+            logger.debug(f"Campanha {self.campaign_id}: {self.false_positives} falso(s) positivo(s) do filtro")
+
+    def __enter__(self) -> "CampaignDeduplicator":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
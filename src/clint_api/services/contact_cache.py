@@ -0,0 +1,249 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from ..models.contact import Contato, ContatoStatus, get_session
+from ..utils.config import Config
+from ..utils.logger import APILogger
+from ..utils.phone_formatter import PhoneFormatter
+
+logger = APILogger("contact_cache")
+
+
+class CachedContact(NamedTuple):
+    """Cópia imutável dos dados de um contato (independente de sessão)"""
+    id: int
+    nome: Optional[str]
+    telefone: str
+    email: Optional[str]
+    status: Optional[ContatoStatus]
+    ultima_interacao: Optional[datetime]
+    tags: Optional[str]
+    clint_id: Optional[str]
+
+    @classmethod
+    def from_model(cls, contato: Contato) -> "CachedContact":
+        return cls(
+            id=contato.id,
+            nome=contato.nome,
+            telefone=contato.telefone,
+            email=contato.email,
+            status=contato.status,
+            ultima_interacao=contato.ultima_interacao,
+            tags=contato.tags,
+            clint_id=contato.clint_id,
+        )
+
+
+class ContactCache:
+    """
+    Cache LRU de contatos por telefone e por ID do Clint
+
+    Leitura com preenchimento: uma falta consulta o banco uma vez e guarda o
+    resultado, inclusive a ausência do contato (telefones desconhecidos que
+    chegam pelo webhook não voltam a consultar o banco a cada mensagem). Quem
+    grava no banco chama ``put`` ou ``invalidate`` após o commit; ``warm_up``
+    carrega os contatos com interação mais recente ao iniciar o processo.
+
+    A invalidação só vale para o próprio processo: as entradas expiram (``ttl``
+    e, mais cedo, ``negative_ttl`` para contatos inexistentes) para que
+    contatos criados ou alterados por outro processo (sincronização,
+    Streamlit) sejam relidos do banco.
+    """
+
+    def __init__(
+        self,
+        session_factory=get_session,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None
+    ):
+        """
+        Args:
+            session_factory: Função que retorna uma sessão do banco de contatos
+            max_size: Telefones mantidos em memória (padrão: Config.CONTACT_CACHE_SIZE)
+            ttl: Segundos de validade de um contato (padrão: Config.CONTACT_CACHE_TTL)
+            negative_ttl: Segundos de validade de um telefone não cadastrado
+                (padrão: Config.CONTACT_CACHE_NEGATIVE_TTL)
+        """
+        self.session_factory = session_factory
+        self.max_size = max_size or Config.CONTACT_CACHE_SIZE
+        self.ttl = Config.CONTACT_CACHE_TTL if ttl is None else ttl
+        self.negative_ttl = Config.CONTACT_CACHE_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        # telefone (formato do banco) -> (contato ou None se inexistente, instante de expiração)
+        self._by_phone: "OrderedDict[str, Tuple[Optional[CachedContact], float]]" = OrderedDict()
+        # ID do Clint -> telefone (só para contatos presentes em _by_phone)
+        self._by_clint_id: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Incrementada a cada invalidação: resultados lidos antes dela são descartados
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._by_phone)
+
+    # Leitura
+
+    def get_by_phone(self, telefone: str) -> Optional[CachedContact]:
+        """Busca um contato pelo telefone (qualquer formato), consultando o banco só na falta"""
+        db_phone = PhoneFormatter.format_to_db(telefone)
+        with self._lock:
+            found, contact = self._lookup(db_phone)
+            if found:
+                return contact
+            generation = self._generation
+
+        contact = self._load(Contato.telefone == db_phone)
+        with self._lock:
+            if generation == self._generation:
+                self._store(db_phone, contact)
+        return contact
+
+    def get_by_clint_id(self, clint_id: str) -> Optional[CachedContact]:
+        """Busca um contato pelo ID do Clint, consultando o banco só na falta"""
+        clint_id = str(clint_id)
+        with self._lock:
+            db_phone = self._by_clint_id.get(clint_id)
+            if db_phone is not None:
+                found, contact = self._lookup(db_phone)
+                if found:
+                    return contact
+            else:
+                self.misses += 1
+            generation = self._generation
+
+        contact = self._load(Contato.clint_id == clint_id)
+        if contact is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._store(contact.telefone, contact)
+        return contact
+
+    def _lookup(self, db_phone: str) -> Tuple[bool, Optional[CachedContact]]:
+        """Entrada válida do telefone como (encontrada, contato) (chamado com o lock adquirido)"""
+        entry = self._by_phone.get(db_phone)
+        if entry is not None:
+            contact, expires_at = entry
+            if time.monotonic() < expires_at:
+                self.hits += 1
+                self._by_phone.move_to_end(db_phone)
+                return True, contact
+            self._discard(db_phone)
+        self.misses += 1
+        return False, None
+
+    def _load(self, criterion) -> Optional[CachedContact]:
+        session = self.session_factory()
+        try:
+            contato = session.query(Contato).filter(criterion).first()
+            return CachedContact.from_model(contato) if contato else None
+        finally:
+            session.close()
+
+    # Escrita
+
+    def _store(self, db_phone: str, contact: Optional[CachedContact]) -> None:
+        """Guarda uma entrada (chamado com o lock adquirido)"""
+        self._discard(db_phone)
+        ttl = self.negative_ttl if contact is None else self.ttl
+        self._by_phone[db_phone] = (contact, time.monotonic() + ttl)
+        if contact is not None and contact.clint_id:
+            previous = self._by_clint_id.get(contact.clint_id)
+            if previous is not None and previous != db_phone:
+                self._discard(previous)
+            self._by_clint_id[contact.clint_id] = db_phone
+
+        while len(self._by_phone) > self.max_size:
+            self._discard(next(iter(self._by_phone)))
+
+    def _discard(self, db_phone: str) -> None:
+        """Remove uma entrada e seu índice por ID do Clint (chamado com o lock adquirido)"""
+        contact, _ = self._by_phone.pop(db_phone, (None, 0.0))
+        if contact is not None and contact.clint_id and self._by_clint_id.get(contact.clint_id) == db_phone:
+            del self._by_clint_id[contact.clint_id]
+
+    def put(self, contact: CachedContact) -> None:
+        """Guarda os dados de um contato recém-gravado (após o commit)"""
+        if contact is None or not contact.telefone:
+            return
+        with self._lock:
+            self._generation += 1
+            self._store(contact.telefone, contact)
+
+    def invalidate(self, telefone: Optional[str] = None, clint_id: Optional[str] = None) -> None:
+        """Descarta as entradas de um telefone e/ou ID do Clint (após gravações no banco)"""
+        with self._lock:
+            self._generation += 1
+            if telefone:
+                self._discard(PhoneFormatter.format_to_db(telefone))
+            if clint_id:
+                db_phone = self._by_clint_id.get(str(clint_id))
+                if db_phone is not None:
+                    self._discard(db_phone)
+
+    def invalidate_many(self, telefones: Iterable[str]) -> None:
+        """Descarta as entradas de vários telefones no formato do banco"""
+        with self._lock:
+            self._generation += 1
+            for db_phone in telefones:
+                self._discard(db_phone)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._by_phone.clear()
+            self._by_clint_id.clear()
+
+    def warm_up(self, limit: Optional[int] = None, chunk_size: int = 5000) -> int:
+        """
+        Carrega os contatos com interação mais recente
+
+        Args:
+            limit: Máximo de contatos (padrão: capacidade do cache)
+
+        Returns:
+            Quantidade de contatos carregados
+        """
+        limit = min(limit or self.max_size, self.max_size)
+        with self._lock:
+            generation = self._generation
+        session = self.session_factory()
+        try:
+            query = (
+                session.query(Contato)
+                .filter(Contato.telefone.isnot(None))
+                .order_by(Contato.ultima_interacao.desc(), Contato.id.desc())
+                .limit(limit)
+            )
+            contacts = [CachedContact.from_model(contato) for contato in query.yield_per(chunk_size)]
+        finally:
+            session.close()
+
+        with self._lock:
+            if generation != self._generation:
+                # Houve gravações durante a carga: as entradas passam a ser lidas sob demanda
+                logger.info("Cache de contatos não aquecido: contatos alterados durante a carga")
+                return 0
+            # Do menos para o mais recente: os mais recentes saem por último do LRU
+            for contact in reversed(contacts):
+                if contact.telefone not in self._by_phone:
+                    self._store(contact.telefone, contact)
+        logger.info(f"Cache de contatos aquecido: {len(contacts)} contatos")
+        return len(contacts)
+
+
+_contact_cache: Optional[ContactCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_contact_cache() -> ContactCache:
+    """Retorna o cache de contatos compartilhado do processo"""
+    global _contact_cache
+    if _contact_cache is None:
+        with _cache_lock:
+            if _contact_cache is None:
+                _contact_cache = ContactCache()
+    return _contact_cache
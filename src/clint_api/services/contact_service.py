@@ -1,22 +1,26 @@
 import requests
 from datetime import datetime
-from typing import List, Optional, Dict
-from ..models.contact import Contato, ContatoStatus, get_session
+from typing import Iterable, List, Optional, Dict
+from ..models.contact import Contato, ContatoStatus, ContatoTag, Tag, get_session
 import os
 from dotenv import load_dotenv
 import json
 from ..utils.logger import APILogger
 from ..utils.phone_formatter import PhoneFormatter
+from ..utils.deadline import request_timeout
+from .contact_cache import CachedContact, get_contact_cache
+from .suppression_service import get_suppression_list
 
 logger = APILogger("contact_service")
 
 load_dotenv()
 
 class ContactService:
-    def __init__(self):
+    def __init__(self, session=None):
         self.api_token = os.getenv("CLINT_API_TOKEN")
         self.base_url = "https://api.clint.digital/v1"
-        self.session = get_session()
+        self.session = session or get_session()
+        self.cache = get_contact_cache()
     
     def is_valid_phone(self, phone: str) -> bool:
         """Verifica se o telefone é válido"""
@@ -36,7 +40,8 @@ class ContactService:
             response = requests.get(
                 f"{self.base_url}/contacts",
                 headers=headers,
-                params={"limit": 1000}  # Ajuste conforme necessário
+                params={"limit": 1000},  # Ajuste conforme necessário
+                timeout=request_timeout()
             )
             
             logger.info(f"\nStatus Code: {response.status_code}")
@@ -50,6 +55,9 @@ class ContactService:
                 # Verifica se a resposta é uma lista ou está dentro de uma chave
                 contacts_data = response_data if isinstance(response_data, list) else response_data.get("data", [])
                 
+                # IDs das tags já conhecidas nesta sincronização (nome -> id)
+                tag_cache: Dict[str, int] = {}
+                
                 for contact in contacts_data:
                     # Extrai os dados do contato
                     contact_id = str(contact.get("id"))
@@ -78,31 +86,31 @@ class ContactService:
                     
                     try:
                         # Verifica se o contato já existe
-                        existing = self.session.query(Contato).filter_by(
-                            clint_id=contact_id
-                        ).first()
+                        existing = self._get_cached_model(self.cache.get_by_clint_id(contact_id))
                         
                         if existing:
                             # Atualiza dados existentes
+                            previous_phone = existing.telefone
                             existing.nome = name
                             existing.telefone = db_phone
                             existing.email = email
-                            existing.tags = ",".join(tag_names)
                             existing.atualizado_em = datetime.now()
+                            self.set_contact_tags(existing, tag_names, tag_cache)
                             logger.info(f"Contato atualizado: {existing}")
+                            saved = existing
                         else:
+                            previous_phone = None
                             # Verifica se já existe um contato com o mesmo telefone
-                            existing_phone = self.session.query(Contato).filter_by(
-                                telefone=db_phone
-                            ).first()
+                            existing_phone = self._get_cached_model(self.cache.get_by_phone(db_phone))
                             
                             if existing_phone:
                                 logger.info(f"Contato com telefone {db_phone} já existe, atualizando...")
                                 existing_phone.nome = name
                                 existing_phone.email = email
-                                existing_phone.tags = ",".join(tag_names)
                                 existing_phone.clint_id = contact_id
                                 existing_phone.atualizado_em = datetime.now()
+                                self.set_contact_tags(existing_phone, tag_names, tag_cache)
+                                saved = existing_phone
                             else:
                                 # Cria novo contato
                                 novo_contato = Contato(
@@ -110,18 +118,33 @@ class ContactService:
                                     telefone=db_phone,
                                     email=email,
                                     status=ContatoStatus.INATIVO,
-                                    clint_id=contact_id,
-                                    tags=",".join(tag_names)
+                                    clint_id=contact_id
                                 )
                                 self.session.add(novo_contato)
+                                self.set_contact_tags(novo_contato, tag_names, tag_cache)
                                 logger.info(f"Novo contato adicionado: {novo_contato}")
+                                saved = novo_contato
+                        
+                        # Dados já gravados na sessão, lidos antes de o commit expirar o modelo
+                        snapshot = CachedContact.from_model(saved)
                         
                         # Commit a cada contato para evitar perder tudo se houver erro
                         self.session.commit()
                         
+                        suppression_list = get_suppression_list()
+                        if previous_phone and previous_phone != db_phone:
+                            self.cache.invalidate(telefone=previous_phone)
+                            suppression_list.discard(previous_phone)
+                        self.cache.put(snapshot)
+                        # O telefone pode ter mudado: a supressão acompanha o contato
+                        suppression_list.record_status(db_phone, snapshot.status)
+                        
                     except Exception as e:
                         logger.error(f"Erro ao processar contato {contact_id}: {str(e)}")
                         self.session.rollback()
+                        self.cache.invalidate(telefone=db_phone, clint_id=contact_id)
+                        # Tags criadas na transação desfeita não existem mais
+                        tag_cache.clear()
                         continue
                 
                 return self.list_contacts()
@@ -131,6 +154,108 @@ class ContactService:
             logger.error(f"\nErro detalhado: {str(e)}")
             raise Exception(f"Erro ao sincronizar contatos: {str(e)}")
     
+    def _get_cached_model(self, cached) -> Optional[Contato]:
+        """Carrega o modelo de um contato do cache pela chave primária (mapa de identidade da sessão)"""
+        if cached is None:
+            return None
+        contato = self.session.get(Contato, cached.id)
+        if contato is None:
+            # Removido do banco por outro processo
+            self.cache.invalidate(telefone=cached.telefone)
+        return contato
+    
+    def _get_tag_ids(self, tag_names: Iterable[str], tag_cache: Optional[Dict[str, int]] = None) -> List[int]:
+        """Retorna os IDs das tags, criando as que ainda não existem"""
+        tag_cache = {} if tag_cache is None else tag_cache
+        missing = [name for name in tag_names if name not in tag_cache]
+        
+        if missing:
+            for tag in self.session.query(Tag).filter(Tag.nome.in_(missing)):
+                tag_cache[tag.nome] = tag.id
+            
+            new_tags = [Tag(nome=name) for name in missing if name not in tag_cache]
+            if new_tags:
+                self.session.add_all(new_tags)
+                self.session.flush()
+                for tag in new_tags:
+                    tag_cache[tag.nome] = tag.id
+        
+        return [tag_cache[name] for name in tag_names]
+    
+    def set_contact_tags(
+        self,
+        contato: Contato,
+        tag_names: Iterable[str],
+        tag_cache: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        Define as tags de um contato
+        
+        Atualiza a coluna ``tags`` (texto) e as associações em ``contato_tags``,
+        usadas nas consultas de segmentação. O commit fica a cargo de quem chama.
+        
+        Args:
+            contato: Contato a atualizar
+            tag_names: Nomes das tags
+            tag_cache: Cache nome -> ID compartilhado entre chamadas (opcional)
+        """
+        names = list(dict.fromkeys(name.strip() for name in tag_names if name and name.strip()))
+        contato.tags = ",".join(names)
+        
+        if contato.id is None:
+            self.session.flush()
+        
+        wanted = set(self._get_tag_ids(names, tag_cache))
+        current = {
+            tag_id for (tag_id,) in
+            self.session.query(ContatoTag.tag_id).filter(ContatoTag.contato_id == contato.id)
+        }
+        
+        removed = current - wanted
+        if removed:
+            self.session.query(ContatoTag).filter(
+                ContatoTag.contato_id == contato.id,
+                ContatoTag.tag_id.in_(removed)
+            ).delete(synchronize_session=False)
+        
+        self.session.add_all(
+            ContatoTag(contato_id=contato.id, tag_id=tag_id) for tag_id in wanted - current
+        )
+    
+    def rebuild_tag_index(self, chunk_size: int = 500) -> int:
+        """
+        Preenche as tabelas de tags a partir da coluna ``tags`` dos contatos
+        
+        Usado para bancos sincronizados antes da existência de ``contato_tags``.
+        
+        Returns:
+            Quantidade de contatos processados
+        """
+        tag_cache: Dict[str, int] = {}
+        processed = 0
+        last_id = 0
+        
+        while True:
+            contatos = (
+                self.session.query(Contato)
+                .filter(Contato.id > last_id)
+                .order_by(Contato.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not contatos:
+                break
+            
+            for contato in contatos:
+                self.set_contact_tags(contato, (contato.tags or "").split(","), tag_cache)
+            self.session.commit()
+            
+            processed += len(contatos)
+            last_id = contatos[-1].id
+        
+        logger.info(f"Índice de tags reconstruído para {processed} contatos")
+        return processed
+    
     def list_contacts(self, status: Optional[ContatoStatus] = None) -> List[Contato]:
         """Lista todos os contatos, opcionalmente filtrados por status"""
         query = self.session.query(Contato)
@@ -143,11 +268,15 @@ class ContactService:
         # Formata o telefone para o banco de dados
         db_phone = PhoneFormatter.format_to_db(telefone)
         
-        contato = self.session.query(Contato).filter_by(telefone=db_phone).first()
+        contato = self._get_cached_model(self.cache.get_by_phone(db_phone))
         if contato:
             contato.status = novo_status
             contato.ultima_interacao = datetime.now()
+            snapshot = CachedContact.from_model(contato)
             self.session.commit()
+            self.cache.put(snapshot)
+            # Mantém a lista de supressão em memória em dia com o banco
+            get_suppression_list().record_status(db_phone, novo_status)
         return contato
     
     def mark_as_active(self, telefone: str) -> Optional[Contato]:
@@ -171,10 +300,12 @@ class ContactService:
         return self.list_contacts(ContatoStatus.ATIVO)
     
     def get_contact_by_phone(self, telefone: str) -> Optional[Contato]:
-        """Busca um contato pelo telefone"""
-        # Formata o telefone para o banco de dados
-        db_phone = PhoneFormatter.format_to_db(telefone)
-        return self.session.query(Contato).filter_by(telefone=db_phone).first()
+        """Busca um contato pelo telefone (telefones desconhecidos são respondidos pelo cache)"""
+        return self._get_cached_model(self.cache.get_by_phone(telefone))
+    
+    def find_contact(self, telefone: str) -> Optional[CachedContact]:
+        """Busca os dados de um contato pelo telefone, em memória (somente leitura)"""
+        return self.cache.get_by_phone(telefone)
 
     def send_message(self, contact: Contato, message: str) -> bool:
         """Envia uma mensagem para um contato através da API do Clint"""
@@ -205,7 +336,8 @@ class ContactService:
             response = requests.post(
                 f"{self.base_url}/whatsapp/send",  # Novo endpoint
                 headers=headers,
-                json=data
+                json=data,
+                timeout=request_timeout()
             )
             
             logger.info(f"Status Code: {response.status_code}")
@@ -0,0 +1,115 @@
+import atexit
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import DateTime, bindparam, text
+
+from ..models.contact import ContatoStatus, get_session
+from ..utils.config import Config
+from ..utils.phone_formatter import PhoneFormatter
+from ..utils.write_behind import WriteBehindBuffer
+from .contact_cache import get_contact_cache
+from .suppression_service import SUPPRESSED_STATUSES, get_suppression_list
+
+# Uma instrução para todo o lote (executemany). Atualizações de atividade
+# (ex.: ATIVO após um envio) nunca sobrescrevem "não perturbe"/removido
+# gravados por outro caminho enquanto estavam no buffer.
+_UPDATE_STATUS = text(
+    "UPDATE contatos SET status = :status, ultima_interacao = :quando, atualizado_em = :agora "
+    "WHERE telefone = :telefone AND (:forcar = 1 OR status IS NULL OR status NOT IN ({}))".format(
+        ", ".join(f"'{status.name}'" for status in sorted(SUPPRESSED_STATUSES, key=lambda s: s.name))
+    )
+).bindparams(bindparam("quando", type_=DateTime), bindparam("agora", type_=DateTime))
+
+
+class ContactStatusWriter(WriteBehindBuffer):
+    """
+    Grava mudanças de status de contatos em segundo plano, em lotes
+
+    ``record`` só guarda (telefone -> status, data) em memória, então quem
+    envia mensagens nunca espera pelo banco de contatos. Uma thread grava o
+    buffer a cada ``flush_interval`` segundos (ou antes, ao acumular
+    ``batch_size`` mudanças) com um único UPDATE executado em lote e um
+    commit. Para o mesmo telefone vale a última mudança registrada.
+    """
+
+    def __init__(
+        self,
+        session_factory=get_session,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None
+    ):
+        """
+        Args:
+            session_factory: Função que retorna uma sessão do banco de contatos
+            flush_interval: Segundos entre gravações (padrão: Config.CONTACT_STATUS_FLUSH_INTERVAL)
+            batch_size: Mudanças que antecipam a gravação (padrão: Config.CONTACT_STATUS_BATCH_SIZE)
+        """
+        super().__init__(
+            "contact_status_writer",
+            flush_interval if flush_interval is not None else Config.CONTACT_STATUS_FLUSH_INTERVAL,
+            batch_size or Config.CONTACT_STATUS_BATCH_SIZE
+        )
+        self.session_factory = session_factory
+        self._session = None
+
+    def record(self, telefone: str, status: ContatoStatus, when: Optional[datetime] = None) -> None:
+        """
+        Registra a mudança de status de um contato (gravada depois, em lote)
+
+        Args:
+            telefone: Telefone em qualquer formato (com ou sem DDI 55)
+            status: Novo status
+            when: Data da interação (padrão: agora)
+        """
+        db_phone = PhoneFormatter.format_to_db(telefone)
+        self.put(db_phone, (status, when or datetime.now()))
+
+        # A supressão vale na hora, antes da gravação; as demais mudanças não
+        # removem ninguém da lista (o UPDATE também não sobrescreve a supressão)
+        if status in SUPPRESSED_STATUSES:
+            get_suppression_list().record_status(db_phone, status)
+
+    def write(self, batch: Dict[str, Tuple[ContatoStatus, datetime]]) -> None:
+        now = datetime.now()
+        params = [
+            {
+                "telefone": telefone,
+                "status": status.name,
+                "quando": when,
+                "agora": now,
+                "forcar": 1 if status in SUPPRESSED_STATUSES else 0,
+            }
+            for telefone, (status, when) in batch.items()
+        ]
+
+        if self._session is None:
+            self._session = self.session_factory()
+        try:
+            self._session.execute(_UPDATE_STATUS, params)
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        get_contact_cache().invalidate_many(batch)
+
+    def release(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+_status_writer: Optional[ContactStatusWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_contact_status_writer() -> ContactStatusWriter:
+    """Retorna o gravador de status compartilhado (gravado também ao encerrar o processo)"""
+    global _status_writer
+    if _status_writer is None:
+        with _writer_lock:
+            if _status_writer is None:
+                _status_writer = ContactStatusWriter()
+                atexit.register(_status_writer.close)
+    return _status_writer
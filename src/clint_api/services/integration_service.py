@@ -1,15 +1,40 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Union
 from ..clients.contact_client import ContactClient
 from ..clients.zapi_client import ZAPIClient
 from ..models.contact import Contato
-from ..models.whatsapp_message import WhatsAppMessage
+from ..models.whatsapp_message import WhatsAppMessage, message_delays
+from ..services.campaign_service import CampaignDeduplicator
+from ..services.contact_cache import ContactCache, get_contact_cache
+from ..services.segment_service import Segment, SegmentService
+from ..services.template_service import MessageTemplate
+from ..utils.config import Config
+from ..utils.deadline import deadline
+from ..utils.phone_formatter import PhoneFormatter
+from ..utils.ttl_cache import TTLCache
 
 class IntegrationService:
     """Serviço de integração entre Clint e Z-API"""
     
-    def __init__(self, contact_client: ContactClient, zapi_client: ZAPIClient):
+    def __init__(
+        self,
+        contact_client: ContactClient,
+        zapi_client: ZAPIClient,
+        segment_service: Optional[SegmentService] = None,
+        contact_cache: Optional[ContactCache] = None
+    ):
         self.contact_client = contact_client
         self.zapi_client = zapi_client
+        self._segment_service = segment_service
+        self.contact_cache = contact_cache if contact_cache is not None else get_contact_cache()
+        # Telefones de contatos buscados na API do Clint (ID do contato -> telefone)
+        self.clint_phones = TTLCache(Config.CLINT_CONTACT_CACHE_TTL, Config.CONTACT_CACHE_SIZE)
+    
+    @property
+    def segment_service(self) -> SegmentService:
+        """Serviço de segmentação sobre a tabela local de contatos (criado sob demanda)"""
+        if self._segment_service is None:
+            self._segment_service = SegmentService()
+        return self._segment_service
     
     def sync_contacts(self) -> List[Contato]:
         """Sincroniza contatos entre Clint e Z-API"""
@@ -44,15 +69,21 @@ class IntegrationService:
         Returns:
             WhatsAppMessage com status do envio ou None se falhar
         """
-        # Verifica conexão com WhatsApp
-        if not self.zapi_client.is_connected():
+        # Verifica conexão com WhatsApp (status em cache, sem chamada por mensagem)
+        if not self.zapi_client.is_connected_cached():
             raise RuntimeError("Z-API não está conectado ao WhatsApp")
         
-        # Busca o contato
-        contact = self.contact_client.get_contact(contact_id)
-        
-        # Prepara o número de telefone (remove caracteres não numéricos)
-        phone = f"{contact.ddi}{contact.phone}".replace("+", "")
+        return self._send_to_contact_id(contact_id, message_text)
+    
+    def _send_to_contact_id(
+        self,
+        contact_id: str,
+        message_text: str,
+        phone: Optional[str] = None
+    ) -> Optional[WhatsAppMessage]:
+        """Envia a mensagem para um contato do Clint, sem verificar a conexão"""
+        if not phone:
+            phone = self.resolve_contact_phone(contact_id)
         
         # Cria e envia a mensagem
         message = WhatsAppMessage(
@@ -62,45 +93,195 @@ class IntegrationService:
             token=self.zapi_client.token
         )
         
-        return self.zapi_client.send_text_message(message)
+        return self.zapi_client.send_message(message)
+    
+    def resolve_contact_phone(self, contact_id: str) -> str:
+        """
+        Retorna o telefone (DDI + número) de um contato do Clint
+        
+        Usa primeiro a tabela local de contatos (sincronizada do Clint, via
+        cache em memória), depois as respostas recentes da API do Clint em
+        cache; só consulta a API quando o contato não está em nenhum dos dois.
+        """
+        contact_id = str(contact_id)
+        local = self.contact_cache.get_by_clint_id(contact_id)
+        if local is not None and local.telefone:
+            return PhoneFormatter.format_to_api(local.telefone)
+        
+        phone = self.clint_phones.get(contact_id)
+        if phone is None:
+            phone = self._contact_phone(self.contact_client.get_contact(contact_id))
+            self.clint_phones.set(contact_id, phone)
+        return phone
+    
+    @staticmethod
+    def _contact_phone(contact: Dict[str, Any]) -> str:
+        """Extrai o telefone (DDI + número) de um contato retornado pela API Clint"""
+        data = contact.get("data", contact) if isinstance(contact, dict) else {}
+        phone = data.get("fullPhone") or f"{data.get('ddi', '')}{data.get('phone', '')}"
+        return phone.replace("+", "")
     
     def send_bulk_message(
         self,
-        message_text: str,
-        filter_query: Optional[str] = None
+        message_text: Union[str, MessageTemplate],
+        filter_query: Optional[str] = None,
+        deadline_seconds: Optional[float] = None,
+        segment: Optional[Segment] = None,
+        campaign_id: Optional[str] = None
     ) -> List[WhatsAppMessage]:
         """
         Envia uma mensagem em massa para contatos do Clint
         
+        O status de conexão é verificado uma única vez (em cache); durante o
+        envio só o estado atualizado pelos webhooks é consultado, sem novas
+        chamadas à Z-API.
+        
+        Com ``segment`` os destinatários vêm da tabela local de contatos
+        (sincronizada do Clint), lidos em blocos por uma consulta indexada,
+        sem buscar os contatos na API do Clint. Nesse caso ``message_text``
+        pode ser um MessageTemplate, renderizado por contato em blocos.
+        
         Args:
-            message_text: Texto da mensagem
-            filter_query: Filtro opcional para buscar contatos
+            message_text: Texto da mensagem ou template personalizado
+            filter_query: Filtro opcional para buscar contatos no Clint
+            deadline_seconds: Prazo opcional para todo o envio; ao expirar,
+                os contatos restantes não são processados
+            segment: Segmento local de contatos (substitui filter_query)
+            campaign_id: Identificador da campanha; telefones que já
+                receberam esta campanha (em execuções anteriores ou por
+                segmentos sobrepostos) são ignorados
             
         Returns:
             Lista de WhatsAppMessage com status dos envios
         """
         # Verifica conexão com WhatsApp
-        if not self.zapi_client.is_connected():
+        if not self.zapi_client.is_connected_cached():
             raise RuntimeError("Z-API não está conectado ao WhatsApp")
         
-        # Busca contatos
-        contacts = []
-        if filter_query:
-            contacts = self.contact_client.search_contacts(filter_query)
-        else:
-            contacts = self.contact_client.list_contacts()
+        if isinstance(message_text, MessageTemplate) and segment is None:
+            raise ValueError("Mensagens com template exigem um segmento de contatos locais")
+        
+        dedup = CampaignDeduplicator(campaign_id) if campaign_id else None
+        try:
+            if segment is not None:
+                return self._send_bulk_to_segment(message_text, segment, deadline_seconds, dedup)
+            return self._send_bulk_to_clint_contacts(message_text, filter_query, deadline_seconds, dedup)
+        finally:
+            if dedup is not None:
+                dedup.close()
+    
+    def _send_bulk_to_clint_contacts(
+        self,
+        message_text: str,
+        filter_query: Optional[str] = None,
+        deadline_seconds: Optional[float] = None,
+        dedup: Optional[CampaignDeduplicator] = None
+    ) -> List[WhatsAppMessage]:
+        """Envia a mensagem para os contatos listados na API do Clint"""
+        with deadline(deadline_seconds) as bulk_deadline:
+            # Busca contatos
+            contacts = []
+            if filter_query:
+                contacts = self.contact_client.search_contacts(filter_query)
+            else:
+                contacts = self.contact_client.list_contacts()
+            
+            # Envia mensagens
+            messages = []
+            suppression_list = self.zapi_client.suppression_list
+            for contact in contacts:
+                # Interrompe se um webhook de desconexão chegou durante o envio
+                if self.zapi_client.connection_state.connected is False:
+                    print("Z-API desconectado durante o envio em massa; interrompendo")
+                    break
+                
+                if bulk_deadline is not None and bulk_deadline.expired:
+                    print("Prazo do envio em massa esgotado; interrompendo")
+                    break
+                
+                # O telefone vem da própria listagem: o contato não é buscado de novo.
+                # Ignora quem está em "não perturbe"/removido ou já recebeu esta campanha
+                phone = self._contact_phone(contact)
+                if phone and contact.get("id") is not None:
+                    self.clint_phones.set(str(contact["id"]), phone)
+                if phone and suppression_list.is_suppressed(phone):
+                    continue
+                if phone and dedup is not None and dedup.already_sent(phone):
+                    continue
+                
+                try:
+                    message = self._send_to_contact_id(
+                        contact.get("id"),
+                        message_text,
+                        phone=phone
+                    )
+                    if message:
+                        messages.append(message)
+                        if dedup is not None:
+                            dedup.record_sent(message.phone, message.message_id)
+                except Exception as e:
+                    print(f"Erro ao enviar mensagem para {contact.get('name')}: {str(e)}")
+        
+        return messages
+    
+    def _segment_messages(
+        self,
+        message_text: Union[str, MessageTemplate],
+        segment: Segment
+    ) -> Iterator[WhatsAppMessage]:
+        """Gera as mensagens do segmento (renderizadas em blocos se for template)"""
+        instance_id, token = self.zapi_client.instance_id, self.zapi_client.token
+        if isinstance(message_text, MessageTemplate):
+            for chunk in self.segment_service.iter_chunks(segment):
+                yield from message_text.render_batch(chunk, instance_id, token)
+            return
         
-        # Envia mensagens
+        delay_message, delay_typing = message_delays(message_text)
+        for phone in self.segment_service.iter_phones(segment):
+            yield WhatsAppMessage(
+                phone=phone,
+                message=message_text,
+                instance_id=instance_id,
+                token=token,
+                delay_message=delay_message,
+                delay_typing=delay_typing
+            )
+    
+    def _send_bulk_to_segment(
+        self,
+        message_text: Union[str, MessageTemplate],
+        segment: Segment,
+        deadline_seconds: Optional[float] = None,
+        dedup: Optional[CampaignDeduplicator] = None
+    ) -> List[WhatsAppMessage]:
+        """Envia a mensagem para os telefones de um segmento local"""
         messages = []
-        for contact in contacts:
-            try:
-                message = self.send_message_to_contact(
-                    contact.id,
-                    message_text
-                )
-                if message:
-                    messages.append(message)
-            except Exception as e:
-                print(f"Erro ao enviar mensagem para {contact.name}: {str(e)}")
+        suppression_list = self.zapi_client.suppression_list
+        with deadline(deadline_seconds) as bulk_deadline:
+            for outgoing in self._segment_messages(message_text, segment):
+                phone = outgoing.phone
+                # Interrompe se um webhook de desconexão chegou durante o envio
+                if self.zapi_client.connection_state.connected is False:
+                    print("Z-API desconectado durante o envio em massa; interrompendo")
+                    break
+                
+                if bulk_deadline is not None and bulk_deadline.expired:
+                    print("Prazo do envio em massa esgotado; interrompendo")
+                    break
+                
+                # Garante a supressão mesmo em segmentos criados sem exclude_statuses
+                if suppression_list.is_suppressed(phone):
+                    continue
+                if dedup is not None and dedup.already_sent(phone):
+                    continue
+                
+                try:
+                    message = self.zapi_client.send_message(outgoing)
+                    if message:
+                        messages.append(message)
+                        if dedup is not None:
+                            dedup.record_sent(phone, message.message_id)
+                except Exception as e:
+                    print(f"Erro ao enviar mensagem para {phone}: {str(e)}")
         
-        return messages 
\ No newline at end of file
+        return messages
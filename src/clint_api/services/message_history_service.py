@@ -1,17 +1,153 @@
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Union
 from datetime import datetime
-from ..models.message_history import MessageHistory, MessageDirection, init_message_history_db
+import re
+from sqlalchemy import DateTime, Float, Integer, String, bindparam, case, func, or_, select, text, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from ..models.message_history import (
+    MESSAGE_SEARCH_TABLE,
+    Conversation,
+    MessageDirection,
+    MessageHistory,
+    init_message_history_db,
+)
 from ..models.whatsapp_message import WhatsAppMessage
+from ..models.webhook_events import ReceivedMessage, extract_received_message
 from ..utils.logger import APILogger
-import json
+from ..utils.phone_formatter import PhoneFormatter
 
 logger = APILogger("message_history")
 
+class HistoryCursor(NamedTuple):
+    """Posição no histórico: a página seguinte começa antes desta mensagem"""
+    timestamp: datetime
+    id: int
+
+class HistoryPage(NamedTuple):
+    """Página do histórico de um número (mensagens da mais nova para a mais antiga)"""
+    messages: List[MessageHistory]
+    next_cursor: Optional[HistoryCursor]  # None quando não há mensagens mais antigas
+    
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+class ConversationCursor(NamedTuple):
+    """Posição na caixa de entrada: a página seguinte começa após esta conversa"""
+    last_message_at: datetime
+    phone: str
+
+class ConversationPage(NamedTuple):
+    """Página da caixa de entrada (conversas da mais recente para a mais antiga)"""
+    conversations: List[Conversation]
+    next_cursor: Optional[ConversationCursor]  # None quando não há mais conversas
+    
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+# Recria os resumos a partir do histórico: última mensagem de cada número pelo
+# índice (phone, timestamp, id) e, como não lidas, as recebidas após o último
+# envio (mesma regra de _update_conversation)
+_REBUILD_CONVERSATIONS = text("""
+    INSERT INTO conversations (
+        phone, last_message_id, last_message, last_message_type, last_direction,
+        last_message_at, last_sent_at, message_count, unread_count, updated_at
+    )
+    SELECT
+        totals.phone, last.id, last.message, last.message_type, last.direction,
+        last.timestamp, totals.last_sent_at, totals.total,
+        (
+            SELECT COUNT(*) FROM message_history received
+            WHERE received.phone = totals.phone
+              AND received.direction = 'RECEIVED'
+              AND received.timestamp > COALESCE(totals.last_sent_at, '')
+        ),
+        :now
+    FROM (
+        SELECT phone, COUNT(*) AS total,
+               MAX(CASE WHEN direction = 'SENT' THEN timestamp END) AS last_sent_at
+        FROM message_history
+        WHERE phone IS NOT NULL GROUP BY phone
+    ) totals
+    JOIN message_history last ON last.id = (
+        SELECT latest.id FROM message_history latest
+        WHERE latest.phone = totals.phone
+        ORDER BY latest.timestamp DESC, latest.id DESC
+        LIMIT 1
+    )
+""").bindparams(bindparam("now", type_=DateTime))
+
+class MessageSearchResult(NamedTuple):
+    """Mensagem encontrada na busca textual"""
+    id: int
+    phone: str
+    direction: Optional[MessageDirection]
+    snippet: str  # Trecho da mensagem com os termos entre colchetes
+    timestamp: datetime
+    rank: float  # Relevância BM25 (menor é mais relevante)
+
+# Palavras da busca (termo* busca por prefixo)
+_SEARCH_TERM = re.compile(r"[\w@.+-]+\*?")
+
+# Busca no índice FTS5, ordenada por relevância (BM25)
+_SEARCH_MESSAGES = f"""
+    SELECT m.id, m.phone, m.direction,
+           snippet({MESSAGE_SEARCH_TABLE}, 0, '[', ']', '…', 12) AS snippet,
+           m.timestamp, bm25({MESSAGE_SEARCH_TABLE}) AS rank
+    FROM {MESSAGE_SEARCH_TABLE}
+    JOIN message_history m ON m.id = {MESSAGE_SEARCH_TABLE}.rowid
+    WHERE {MESSAGE_SEARCH_TABLE} MATCH :query {{phone_filter}}
+    ORDER BY rank
+    LIMIT :limit
+"""
+
+def _match_query(terms: str) -> str:
+    """
+    Converte o texto digitado em uma consulta FTS5 segura
+    
+    Cada palavra vira uma frase entre aspas (todas obrigatórias), de modo que
+    pontuação e operadores do FTS5 no texto não geram erro de sintaxe.
+    """
+    phrases = []
+    for term in _SEARCH_TERM.findall(terms):
+        prefix = term.endswith("*")
+        word = term.rstrip("*")
+        if word:
+            phrases.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(phrases)
+
+def _history_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Formato do telefone no histórico e nas conversas: com DDI 55, como nos webhooks
+    
+    Envios recebem o telefone como o chamador informou (ex: "21999990000" de um
+    segmento) e os recibos da Z-API chegam com o DDI; sem normalizar, um mesmo
+    contato teria duas conversas. IDs de grupo (ex: "1203...-group") ficam como estão.
+    """
+    if not phone or any(char.isalpha() for char in phone):
+        return phone
+    digits = "".join(filter(str.isdigit, phone))
+    # DDD + número sem DDI (inclusive DDD 55, que format_to_api não distingue)
+    if len(digits) in (10, 11):
+        return f"55{digits}"
+    return PhoneFormatter.format_to_api(digits)
+
 class MessageHistoryService:
     """Serviço para gerenciar histórico de mensagens"""
     
-    def __init__(self):
-        self.session = init_message_history_db()
+    def __init__(self, session=None):
+        self.session = session or init_message_history_db()
+        self._ensure_conversations()
+    
+    def _ensure_conversations(self) -> None:
+        """Preenche os resumos de conversas em bancos com histórico anterior à tabela"""
+        try:
+            if self.session.query(Conversation.phone).first() is None \
+                    and self.session.query(MessageHistory.id).first() is not None:
+                self.rebuild_conversations()
+        except Exception as e:
+            logger.error(f"Erro ao preencher resumo de conversas: {str(e)}")
     
     def add_sent_message(self, message: WhatsAppMessage) -> MessageHistory:
         """
@@ -25,7 +161,7 @@ class MessageHistoryService:
         """
         history = MessageHistory(
             message_id=message.message_id,
-            phone=message.phone,
+            phone=_history_phone(message.phone),
             direction=MessageDirection.SENT,
             message=message.message,
             message_type=message.message_type.value,
@@ -36,6 +172,7 @@ class MessageHistoryService:
         
         try:
             self.session.add(history)
+            self._update_conversation(history)
             self.session.commit()
             logger.info(f"Mensagem enviada registrada no histórico: {history}")
             return history
@@ -44,134 +181,332 @@ class MessageHistoryService:
             logger.error(f"Erro ao registrar mensagem enviada: {str(e)}")
             raise
     
-    def add_received_message(self, data: dict) -> MessageHistory:
+    def add_received_message(self, data: Union[dict, ReceivedMessage]) -> Optional[MessageHistory]:
         """
         Adiciona uma mensagem recebida ao histórico
         
         Args:
-            data: Dados do webhook de mensagem recebida
+            data: Evento já decodificado (ver decode_webhook) ou payload do
+                webhook de mensagem recebida
             
         Returns:
-            Registro do histórico
+            Registro do histórico (None se a mensagem estiver vazia)
+        
+        Raises:
+            WebhookPayloadError: Se o payload for inválido
         """
+        received = data if isinstance(data, ReceivedMessage) else extract_received_message(data)
+        logger.info(f"📥 Mensagem recebida de {received.phone} ({received.message_type})")
+        
+        # Verifica se a mensagem não é vazia
+        if not received.message and not received.media_url:
+            logger.warning(f"⚠️ Mensagem vazia recebida (ID: {received.message_id})")
+            return None
+        
         try:
-            # Log do payload recebido para debug
-            logger.info(f"\n📥 Processando mensagem recebida")
-            logger.info(f"Payload: {json.dumps(data, indent=2)}")
-            
-            # Extrai a mensagem do texto ou de outros tipos de mídia
-            message = ""
-            message_type = "text"
-            media_url = None
-            
-            # Verifica se é uma mensagem de texto direta
-            if isinstance(data.get("text"), str):
-                message = data.get("text", "")
-                logger.info(f"Mensagem de texto direta: {message}")
-            # Verifica se é uma mensagem de texto no formato objeto
-            elif isinstance(data.get("text"), dict):
-                message = data.get("text", {}).get("message", "")
-                logger.info(f"Mensagem de texto em objeto: {message}")
-            # Verifica se é um template
-            elif "hydratedTemplate" in data:
-                message = data.get("hydratedTemplate", {}).get("message", "")
-                message_type = "template"
-                logger.info(f"Mensagem de template: {message}")
-            # Outros tipos de mídia
-            elif "image" in data:
-                message = data.get("image", {}).get("caption", "")
-                message_type = "image"
-                media_url = data.get("image", {}).get("imageUrl")
-                logger.info(f"Mensagem de imagem: caption={message}, url={media_url}")
-            elif "video" in data:
-                message = data.get("video", {}).get("caption", "")
-                message_type = "video"
-                media_url = data.get("video", {}).get("videoUrl")
-                logger.info(f"Mensagem de vídeo: caption={message}, url={media_url}")
-            elif "audio" in data:
-                message = "[Áudio]"
-                message_type = "audio"
-                media_url = data.get("audio", {}).get("audioUrl")
-                logger.info(f"Mensagem de áudio: url={media_url}")
-            elif "document" in data:
-                message = f"[Documento] {data.get('document', {}).get('fileName', '')}"
-                message_type = "document"
-                media_url = data.get("document", {}).get("documentUrl")
-                logger.info(f"Mensagem de documento: name={message}, url={media_url}")
-            
-            # Se nenhum tipo específico foi encontrado, tenta extrair a mensagem do campo text
-            if not message and data.get("text"):
-                message = data.get("text")
-                if isinstance(message, dict):
-                    message = message.get("message", "")
-            
-            # Log dos dados extraídos
-            logger.info(f"\n📝 Dados extraídos:")
-            logger.info(f"Mensagem: {message}")
-            logger.info(f"Tipo: {message_type}")
-            logger.info(f"URL da mídia: {media_url}")
-            
-            # Verifica se a mensagem não é vazia
-            if not message and not media_url:
-                logger.warning("⚠️ Mensagem vazia recebida")
-                logger.warning(f"Payload: {json.dumps(data, indent=2)}")
-                return None
-            
-            # Cria o registro no histórico
+            # Cria o registro no histórico (mensagens enviadas pelo próprio
+            # aparelho, fromMe, contam como envio)
             history = MessageHistory(
-                message_id=data.get("messageId"),
-                phone=data.get("phone"),
-                direction=MessageDirection.RECEIVED,
-                message=message,
-                message_type=message_type,
+                message_id=received.message_id,
+                phone=_history_phone(received.phone),
+                direction=MessageDirection.SENT if received.from_me else MessageDirection.RECEIVED,
+                message=received.message,
+                message_type=received.message_type,
                 status="received",
-                media_url=media_url,
-                timestamp=datetime.fromtimestamp(data.get("momment", 0) / 1000) if data.get("momment") else datetime.now()
+                media_url=received.media_url,
+                timestamp=received.timestamp
             )
             
-            # Adiciona e salva no banco
+            # Adiciona e salva no banco (com o resumo da conversa, na mesma transação)
             self.session.add(history)
+            self._update_conversation(history)
             self.session.commit()
-            logger.info(f"\n✅ Mensagem registrada no histórico:")
-            logger.info(f"ID: {history.message_id}")
-            logger.info(f"Telefone: {history.phone}")
-            logger.info(f"Mensagem: {history.message}")
-            logger.info(f"Tipo: {history.message_type}")
-            logger.info(f"Status: {history.status}")
-            logger.info(f"Timestamp: {history.timestamp}")
+            logger.info(f"✅ Mensagem {history.message_id} registrada no histórico")
             
             return history
             
         except Exception as e:
             self.session.rollback()
             logger.error(f"\n❌ Erro ao registrar mensagem recebida: {str(e)}")
-            logger.error(f"Dados que causaram erro: {json.dumps(data, indent=2)}")
+            logger.error(f"Dados que causaram erro: {received}")
             raise
     
+    def _update_conversation(self, history: MessageHistory) -> None:
+        """
+        Atualiza o resumo da conversa com uma nova mensagem (sem commit)
+        
+        Um único INSERT ... ON CONFLICT DO UPDATE: a última mensagem só é
+        substituída por outra mais nova (webhooks podem chegar fora de ordem)
+        e os contadores são atualizados no próprio banco. Não lidas são as
+        recebidas após o último envio, a mesma regra de rebuild_conversations:
+        uma recebida só conta se for mais nova que o último envio, e um envio
+        mais novo reconta as recebidas posteriores a ele (em geral nenhuma).
+        """
+        self.session.flush()  # Atribui o ID da mensagem
+        now = datetime.now()
+        sent = history.direction == MessageDirection.SENT
+        statement = sqlite_insert(Conversation).values(
+            phone=history.phone,
+            last_message_id=history.id,
+            last_message=history.message,
+            last_message_type=history.message_type,
+            last_direction=history.direction,
+            last_message_at=history.timestamp,
+            last_sent_at=history.timestamp if sent else None,
+            message_count=1,
+            unread_count=0 if sent else 1,
+            updated_at=now
+        )
+        excluded = statement.excluded
+        is_newer = or_(
+            Conversation.last_message_at.is_(None),
+            excluded.last_message_at >= Conversation.last_message_at
+        )
+        latest = {
+            column: case((is_newer, getattr(excluded, column)), else_=getattr(Conversation, column))
+            for column in (
+                "last_message_id", "last_message", "last_message_type", "last_direction", "last_message_at"
+            )
+        }
+        if sent:
+            is_newer_sent = or_(
+                Conversation.last_sent_at.is_(None),
+                excluded.last_sent_at >= Conversation.last_sent_at
+            )
+            received_after = select(func.count()).where(
+                MessageHistory.phone == history.phone,
+                MessageHistory.direction == MessageDirection.RECEIVED,
+                MessageHistory.timestamp > history.timestamp
+            ).scalar_subquery()
+            counters = {
+                "last_sent_at": case((is_newer_sent, excluded.last_sent_at), else_=Conversation.last_sent_at),
+                "unread_count": case((is_newer_sent, received_after), else_=Conversation.unread_count),
+            }
+        else:
+            after_last_sent = or_(
+                Conversation.last_sent_at.is_(None),
+                excluded.last_message_at > Conversation.last_sent_at
+            )
+            counters = {
+                "unread_count": Conversation.unread_count + case((after_last_sent, 1), else_=0),
+            }
+        self.session.execute(statement.on_conflict_do_update(
+            index_elements=[Conversation.phone],
+            set_={
+                **latest,
+                **counters,
+                "message_count": Conversation.message_count + 1,
+                "updated_at": now,
+            }
+        ))
+    
+    def list_conversations(
+        self,
+        before: Optional[ConversationCursor] = None,
+        page_size: int = 50
+    ) -> ConversationPage:
+        """
+        Lista as conversas (caixa de entrada), da atividade mais recente para a mais antiga
+        
+        Lê apenas a tabela de resumos pelo índice (last_message_at, phone),
+        sem agrupar o histórico: o custo não depende do total de mensagens.
+        
+        Args:
+            before: Cursor retornado pela página anterior (None: mais recentes)
+            page_size: Conversas por página
+            
+        Returns:
+            Página com as conversas e o cursor da página seguinte
+        """
+        query = self.session.query(Conversation)
+        if before is not None:
+            query = query.filter(
+                tuple_(Conversation.last_message_at, Conversation.phone)
+                < tuple_(before.last_message_at, before.phone)
+            )
+        
+        rows = query\
+            .order_by(Conversation.last_message_at.desc(), Conversation.phone.desc())\
+            .limit(page_size + 1)\
+            .all()
+        
+        conversations = rows[:page_size]
+        next_cursor = None
+        if len(rows) > page_size and conversations:
+            last = conversations[-1]
+            next_cursor = ConversationCursor(last.last_message_at, last.phone)
+        return ConversationPage(conversations, next_cursor)
+    
+    def get_conversation(self, phone: str) -> Optional[Conversation]:
+        """Obtém o resumo da conversa com um número"""
+        return self.session.get(Conversation, _history_phone(phone))
+    
+    def mark_conversation_read(self, phone: str) -> bool:
+        """
+        Zera as mensagens não lidas de uma conversa
+        
+        Returns:
+            True se a conversa existe, False caso contrário
+        """
+        try:
+            updated = self.session.query(Conversation)\
+                .filter(Conversation.phone == _history_phone(phone))\
+                .update({Conversation.unread_count: 0}, synchronize_session=False)
+            self.session.commit()
+            return updated > 0
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Erro ao marcar conversa como lida: {str(e)}")
+            return False
+    
+    def rebuild_conversations(self) -> int:
+        """
+        Recria os resumos de conversas a partir de todo o histórico
+        
+        Usado para bancos com histórico anterior à tabela de conversas. As
+        mensagens recebidas após o último envio contam como não lidas.
+        
+        Returns:
+            Quantidade de conversas
+        """
+        try:
+            self.session.query(Conversation).delete(synchronize_session=False)
+            self.session.execute(_REBUILD_CONVERSATIONS, {"now": datetime.now()})
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        
+        total = self.session.query(Conversation).count()
+        logger.info(f"Resumo de conversas reconstruído: {total} conversas")
+        return total
+    
     def get_chat_history(self, phone: str, limit: int = 100) -> List[MessageHistory]:
         """
         Obtém histórico de mensagens de um número
         
         Args:
-            phone: Número do telefone
+            phone: Número do telefone (com ou sem DDI 55)
             limit: Limite de mensagens (padrão: 100)
             
         Returns:
-            Lista de mensagens ordenadas por data
+            Lista de mensagens ordenadas por data (mais novas primeiro)
         """
         try:
-            history = self.session.query(MessageHistory)\
-                .filter(MessageHistory.phone == phone)\
-                .order_by(MessageHistory.timestamp.desc())\
-                .limit(limit)\
-                .all()
-            
+            history = self.get_chat_history_page(phone, page_size=limit).messages
             logger.info(f"Histórico obtido para {phone}: {len(history)} mensagens")
             return history
         except Exception as e:
             logger.error(f"Erro ao obter histórico: {str(e)}")
             return []
     
+    def get_chat_history_page(
+        self,
+        phone: str,
+        before: Optional[HistoryCursor] = None,
+        page_size: int = 50
+    ) -> HistoryPage:
+        """
+        Obtém uma página do histórico de um número, da mais nova para a mais antiga
+        
+        Paginação por chave (keyset): a página começa logo antes do cursor
+        (timestamp, id) e é lida por busca no índice (phone, timestamp, id),
+        então cada página custa o mesmo, por mais antiga que seja.
+        
+        Args:
+            phone: Número do telefone (com ou sem DDI 55)
+            before: Cursor retornado pela página anterior (None: mensagens mais recentes)
+            page_size: Mensagens por página
+            
+        Returns:
+            Página com as mensagens e o cursor da página seguinte
+        """
+        query = self.session.query(MessageHistory).filter(MessageHistory.phone == _history_phone(phone))
+        if before is not None:
+            query = query.filter(
+                tuple_(MessageHistory.timestamp, MessageHistory.id) < tuple_(before.timestamp, before.id)
+            )
+        
+        # Uma mensagem a mais indica se existe página seguinte
+        rows = query\
+            .order_by(MessageHistory.timestamp.desc(), MessageHistory.id.desc())\
+            .limit(page_size + 1)\
+            .all()
+        
+        messages = rows[:page_size]
+        next_cursor = None
+        if len(rows) > page_size and messages:
+            last = messages[-1]
+            next_cursor = HistoryCursor(last.timestamp, last.id)
+        return HistoryPage(messages, next_cursor)
+    
+    def search_messages(
+        self,
+        terms: str,
+        phone: Optional[str] = None,
+        limit: int = 20
+    ) -> List[MessageSearchResult]:
+        """
+        Busca mensagens por palavras-chave, das mais relevantes para as menos
+        
+        Usa o índice FTS5 do histórico (acentos e maiúsculas são ignorados;
+        ``termo*`` busca por prefixo). Sem FTS5 no SQLite, faz uma busca LIKE.
+        
+        Args:
+            terms: Palavras buscadas (todas devem aparecer na mensagem)
+            phone: Restringe a busca a um número (opcional)
+            limit: Máximo de resultados
+            
+        Returns:
+            Mensagens encontradas com telefone, trecho e data/hora
+        """
+        query = _match_query(terms)
+        if not query:
+            return []
+        
+        statement = text(
+            _SEARCH_MESSAGES.format(phone_filter="AND m.phone = :phone" if phone else "")
+        ).columns(
+            id=Integer, phone=String, direction=String, snippet=String, timestamp=DateTime, rank=Float
+        )
+        params = {"query": query, "limit": limit}
+        if phone:
+            params["phone"] = _history_phone(phone)
+        
+        try:
+            rows = self.session.execute(statement, params).all()
+        except OperationalError as e:
+            if f"no such table: {MESSAGE_SEARCH_TABLE}" not in str(e):
+                raise
+            self.session.rollback()
+            return self._search_messages_like(terms, phone, limit)
+        
+        return [
+            MessageSearchResult(
+                id=row.id,
+                phone=row.phone,
+                direction=MessageDirection[row.direction] if row.direction else None,
+                snippet=row.snippet,
+                timestamp=row.timestamp,
+                rank=row.rank
+            )
+            for row in rows
+        ]
+    
+    def _search_messages_like(self, terms: str, phone: Optional[str], limit: int) -> List[MessageSearchResult]:
+        """Busca sem índice (SQLite sem FTS5): LIKE por palavra, mais recentes primeiro"""
+        query = self.session.query(MessageHistory)
+        for term in _SEARCH_TERM.findall(terms):
+            query = query.filter(MessageHistory.message.like(f"%{term.rstrip('*')}%"))
+        if phone:
+            query = query.filter(MessageHistory.phone == _history_phone(phone))
+        
+        messages = query.order_by(MessageHistory.timestamp.desc()).limit(limit).all()
+        return [
+            MessageSearchResult(item.id, item.phone, item.direction, item.message or "", item.timestamp, 0.0)
+            for item in messages
+        ]
+    
     def update_message_status(self, message_id: str, new_status: str) -> Optional[MessageHistory]:
         """
         Atualiza o status de uma mensagem
@@ -214,10 +549,14 @@ class MessageHistoryService:
         """
         try:
             query = self.session.query(MessageHistory)
+            conversations = self.session.query(Conversation)
             if phone:
+                phone = _history_phone(phone)
                 query = query.filter(MessageHistory.phone == phone)
+                conversations = conversations.filter(Conversation.phone == phone)
             
             query.delete()
+            conversations.delete()
             self.session.commit()
             
             if phone:
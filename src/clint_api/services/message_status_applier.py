@@ -0,0 +1,125 @@
+import atexit
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, or_, update
+
+from ..models.message_history import MessageHistory, init_message_history_db
+from ..utils.config import Config
+from ..utils.write_behind import WriteBehindBuffer
+
+# Progresso dos status da Z-API: um recibo atrasado nunca regride o status
+STATUS_RANK = {
+    "PENDING": 0,
+    "SENT": 1,
+    "RECEIVED": 2,
+    "DELIVERED": 2,
+    "READ": 3,
+    "PLAYED": 4,
+}
+
+# IDs por UPDATE (1 parâmetro cada, mais os do CASE de STATUS_RANK), dentro do limite do SQLite
+_IDS_PER_STATEMENT = 900
+
+
+def latest_status(current: str, new: str) -> str:
+    """Escolhe entre dois status da mesma mensagem o mais avançado (ou o mais novo)"""
+    current_rank = STATUS_RANK.get(current.upper())
+    new_rank = STATUS_RANK.get(new.upper())
+    if current_rank is not None and new_rank is not None and new_rank < current_rank:
+        return current
+    return new
+
+
+class MessageStatusApplier(WriteBehindBuffer):
+    """
+    Aplica em lote os status de mensagens recebidos pelo webhook
+
+    Os eventos são agrupados por messageId (vale o status mais avançado) e
+    gravados periodicamente com um ``UPDATE ... SET status = :status WHERE
+    message_id IN (...)`` por status distinto e um commit por lote, em vez
+    de um SELECT e um COMMIT por recibo. O próprio UPDATE compara com o
+    status gravado: um recibo atrasado (ex: DELIVERED que chega num lote
+    posterior ao READ) não regride a mensagem.
+    """
+
+    def __init__(
+        self,
+        session_factory=init_message_history_db,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None
+    ):
+        """
+        Args:
+            session_factory: Função que retorna uma sessão do banco de histórico
+            flush_interval: Segundos entre gravações (padrão: Config.MESSAGE_STATUS_FLUSH_INTERVAL)
+            batch_size: Status que antecipam a gravação (padrão: Config.MESSAGE_STATUS_BATCH_SIZE)
+        """
+        super().__init__(
+            "message_status_applier",
+            flush_interval if flush_interval is not None else Config.MESSAGE_STATUS_FLUSH_INTERVAL,
+            batch_size or Config.MESSAGE_STATUS_BATCH_SIZE
+        )
+        self.session_factory = session_factory
+        self._session = None
+
+    def record(self, message_id: str, status: str) -> None:
+        """
+        Registra o status de uma mensagem (gravado depois, em lote)
+
+        Args:
+            message_id: ID da mensagem na Z-API
+            status: Novo status (ex: "READ")
+        """
+        if message_id and status:
+            self.put(message_id, status)
+
+    def merge(self, current: str, new: str) -> str:
+        return latest_status(current, new)
+
+    def write(self, batch: Dict[str, str]) -> None:
+        if self._session is None:
+            self._session = self.session_factory()
+
+        # Poucos status distintos por lote: um UPDATE (por bloco de IDs) para cada
+        by_status: Dict[str, List[str]] = {}
+        for message_id, status in batch.items():
+            by_status.setdefault(status, []).append(message_id)
+
+        stored_rank = case(STATUS_RANK, value=func.upper(MessageHistory.status))
+        try:
+            for status, message_ids in by_status.items():
+                rank = STATUS_RANK.get(status.upper())
+                for start in range(0, len(message_ids), _IDS_PER_STATEMENT):
+                    chunk = message_ids[start:start + _IDS_PER_STATEMENT]
+                    statement = update(MessageHistory).where(MessageHistory.message_id.in_(chunk))
+                    if rank is not None:
+                        # Só avança: status gravado desconhecido ou de ordem menor ou igual
+                        statement = statement.where(or_(stored_rank.is_(None), stored_rank <= rank))
+                    self._session.execute(
+                        statement.values(status=status).execution_options(synchronize_session=False)
+                    )
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+
+    def release(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+_status_applier: Optional[MessageStatusApplier] = None
+_applier_lock = threading.Lock()
+
+
+def get_message_status_applier() -> MessageStatusApplier:
+    """Retorna o aplicador de status compartilhado (gravado também ao encerrar o processo)"""
+    global _status_applier
+    if _status_applier is None:
+        with _applier_lock:
+            if _status_applier is None:
+                _status_applier = MessageStatusApplier()
+                atexit.register(_status_applier.close)
+    return _status_applier
@@ -1,5 +1,6 @@
 import threading
 import time
+import uuid
 from datetime import datetime
 from typing import Dict, List, Optional
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -81,7 +82,8 @@ class MessageScheduler:
         self,
         message_text: str,
         schedule_time: datetime,
-        filter_query: Optional[str] = None
+        filter_query: Optional[str] = None,
+        campaign_id: Optional[str] = None
     ) -> str:
         """
         Agenda uma mensagem em massa
@@ -90,21 +92,38 @@ class MessageScheduler:
             message_text: Texto da mensagem
             schedule_time: Data/hora para envio
             filter_query: Filtro opcional para contatos
+            campaign_id: Identificador da campanha (padrão: derivado do ID do
+                agendamento, ver bulk_campaign_id); reagendar com o mesmo ID
+                não reenvia para quem já recebeu
             
         Returns:
             ID do agendamento
         """
-        logger.info(f"Agendando mensagem em massa para {schedule_time}")
+        job_id = uuid.uuid4().hex
+        campaign_id = campaign_id or self.bulk_campaign_id(job_id)
+        logger.info(f"Agendando mensagem em massa {campaign_id} para {schedule_time}")
         
         job = self.scheduler.add_job(
             func=self._send_scheduled_bulk_message,
             trigger=DateTrigger(run_date=schedule_time),
-            args=[message_text, filter_query]
+            args=[message_text, filter_query, campaign_id],
+            id=job_id
         )
         
-        logger.info(f"Mensagem em massa agendada com ID {job.id}")
+        logger.info(f"Mensagem em massa agendada com ID {job.id} (campanha {campaign_id})")
         return job.id
     
+    @staticmethod
+    def bulk_campaign_id(schedule_id: str) -> str:
+        """
+        ID de campanha padrão de um envio em massa agendado
+        
+        Se o envio for interrompido, agendar de novo com
+        ``campaign_id=MessageScheduler.bulk_campaign_id(schedule_id)`` envia
+        só para quem ainda não recebeu.
+        """
+        return f"campanha-{schedule_id}"
+    
     def cancel_schedule(self, schedule_id: str) -> bool:
         """Cancela um agendamento"""
         try:
@@ -140,13 +159,19 @@ class MessageScheduler:
         except Exception as e:
             logger.error(f"Erro ao enviar mensagem agendada: {str(e)}")
     
-    def _send_scheduled_bulk_message(self, message_text: str, filter_query: Optional[str]):
+    def _send_scheduled_bulk_message(
+        self,
+        message_text: str,
+        filter_query: Optional[str],
+        campaign_id: Optional[str] = None
+    ):
         """Callback para envio de mensagem em massa agendada"""
         try:
-            logger.info("Iniciando envio de mensagem em massa agendada")
+            logger.info(f"Iniciando envio de mensagem em massa agendada ({campaign_id})")
             results = self.integration.send_bulk_message(
                 message_text=message_text,
-                filter_query=filter_query
+                filter_query=filter_query,
+                campaign_id=campaign_id
             )
             logger.info(f"Mensagem em massa enviada para {len(results)} contatos")
         except Exception as e:
@@ -0,0 +1,195 @@
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Query
+
+from ..models.contact import Contato, ContatoStatus, ContatoTag, Tag, get_session
+from ..utils.logger import APILogger
+from .contact_service import ContactService
+
+logger = APILogger("segment_service")
+
+
+class Segment:
+    """Critérios de seleção de contatos locais para uma campanha"""
+
+    def __init__(
+        self,
+        statuses: Optional[Iterable[ContatoStatus]] = None,
+        exclude_statuses: Optional[Iterable[ContatoStatus]] = (
+            ContatoStatus.NAO_PERTURBE,
+            ContatoStatus.REMOVIDO,
+        ),
+        tags_any: Optional[Iterable[str]] = None,
+        tags_all: Optional[Iterable[str]] = None,
+        tags_none: Optional[Iterable[str]] = None,
+        last_interaction_after: Optional[datetime] = None,
+        last_interaction_before: Optional[datetime] = None,
+        never_interacted: bool = False,
+        ddds: Optional[Iterable[str]] = None
+    ):
+        """
+        Args:
+            statuses: Status aceitos (None para todos)
+            exclude_statuses: Status sempre excluídos (padrão: não perturbe e removido)
+            tags_any: Seleciona contatos com pelo menos uma das tags
+            tags_all: Seleciona contatos com todas as tags
+            tags_none: Exclui contatos com qualquer uma das tags
+            last_interaction_after: Última interação a partir desta data
+            last_interaction_before: Última interação antes desta data
+            never_interacted: Inclui também contatos sem nenhuma interação
+                quando há filtro por data de interação
+            ddds: DDDs aceitos (ex: ["21", "11"])
+        """
+        self.statuses = list(statuses) if statuses else None
+        self.exclude_statuses = list(exclude_statuses) if exclude_statuses else []
+        self.tags_any = self._clean_tags(tags_any)
+        self.tags_all = self._clean_tags(tags_all)
+        self.tags_none = self._clean_tags(tags_none)
+        self.last_interaction_after = last_interaction_after
+        self.last_interaction_before = last_interaction_before
+        self.never_interacted = never_interacted
+        self.ddds = [str(ddd).strip() for ddd in ddds] if ddds else None
+
+    @staticmethod
+    def _clean_tags(tags: Optional[Iterable[str]]) -> Optional[List[str]]:
+        if not tags:
+            return None
+        return list(dict.fromkeys(tag.strip() for tag in tags if tag and tag.strip())) or None
+
+    def __repr__(self):
+        criteria = {key: value for key, value in vars(self).items() if value not in (None, [], False)}
+        return f"<Segment({criteria})>"
+
+
+class SegmentService:
+    """Resolve segmentos de campanha com consultas indexadas na tabela local de contatos"""
+
+    def __init__(self, session=None):
+        self.session = session or get_session()
+        self._ensure_tag_index()
+
+    def _ensure_tag_index(self) -> None:
+        """Preenche contato_tags em bancos sincronizados antes da tabela de tags"""
+        try:
+            if self.session.query(ContatoTag.contato_id).first() is None \
+                    and self.session.query(Contato.id).filter(Contato.tags.isnot(None), Contato.tags != "").first() is not None:
+                ContactService(session=self.session).rebuild_tag_index()
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Erro ao preencher índice de tags: {str(e)}")
+
+    def build_query(self, segment: Segment) -> Query:
+        """Monta a consulta SQL do segmento"""
+        query = self.session.query(Contato).filter(Contato.telefone.isnot(None))
+
+        if segment.statuses:
+            query = query.filter(Contato.status.in_(segment.statuses))
+        if segment.exclude_statuses:
+            query = query.filter(or_(
+                Contato.status.is_(None),
+                Contato.status.notin_(segment.exclude_statuses)
+            ))
+
+        interaction_filters = []
+        if segment.last_interaction_after is not None:
+            interaction_filters.append(Contato.ultima_interacao >= segment.last_interaction_after)
+        if segment.last_interaction_before is not None:
+            interaction_filters.append(Contato.ultima_interacao < segment.last_interaction_before)
+        if interaction_filters:
+            interaction = and_(*interaction_filters)
+            if segment.never_interacted:
+                interaction = or_(interaction, Contato.ultima_interacao.is_(None))
+            query = query.filter(interaction)
+
+        if segment.ddds:
+            query = query.filter(or_(*[self._ddd_filter(ddd) for ddd in segment.ddds]))
+
+        # Tags: subconsultas em contato_tags (índice tag_id, contato_id)
+        if segment.tags_any:
+            query = query.filter(Contato.id.in_(self._tagged_contacts(segment.tags_any)))
+        if segment.tags_all:
+            tagged_with_all = (
+                self._tagged_contacts(segment.tags_all)
+                .group_by(ContatoTag.contato_id)
+                .having(func.count(ContatoTag.tag_id) == len(segment.tags_all))
+            )
+            query = query.filter(Contato.id.in_(tagged_with_all))
+        if segment.tags_none:
+            query = query.filter(Contato.id.notin_(self._tagged_contacts(segment.tags_none)))
+
+        return query
+
+    @staticmethod
+    def _tagged_contacts(tag_names: List[str]):
+        """Subconsulta com os IDs dos contatos que têm alguma das tags"""
+        return (
+            select(ContatoTag.contato_id)
+            .join(Tag, Tag.id == ContatoTag.tag_id)
+            .where(Tag.nome.in_(tag_names))
+        )
+
+    @staticmethod
+    def _ddd_filter(ddd: str):
+        """
+        Filtro por DDD como faixa de telefone
+
+        O telefone é armazenado sem DDI (DDD + número), então o prefixo vira
+        uma faixa ``[ddd, ddd + 1)`` que usa o índice de telefone.
+        """
+        upper = ddd[:-1] + chr(ord(ddd[-1]) + 1)
+        return and_(Contato.telefone >= ddd, Contato.telefone < upper)
+
+    def count(self, segment: Segment) -> int:
+        """Quantidade de contatos no segmento"""
+        return self.build_query(segment).count()
+
+    def iter_chunks(self, segment: Segment, chunk_size: int = 500) -> Iterator[List[Contato]]:
+        """
+        Percorre o segmento em blocos, paginando pela chave primária
+
+        Cada bloco é uma consulta ``id > último_id ORDER BY id LIMIT n``,
+        então o custo não cresce com o deslocamento e a memória fica limitada
+        a ``chunk_size`` contatos.
+
+        Args:
+            segment: Segmento a percorrer
+            chunk_size: Contatos por bloco
+
+        Yields:
+            Listas de contatos
+        """
+        query = self.build_query(segment).order_by(Contato.id)
+        last_id = 0
+        while True:
+            chunk = query.filter(Contato.id > last_id).limit(chunk_size).all()
+            if not chunk:
+                return
+            last_id = chunk[-1].id
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+
+    def iter_contacts(self, segment: Segment, chunk_size: int = 500) -> Iterator[Contato]:
+        """Percorre os contatos do segmento, um a um (lidos em blocos)"""
+        for chunk in self.iter_chunks(segment, chunk_size):
+            yield from chunk
+
+    def iter_phones(self, segment: Segment, chunk_size: int = 1000) -> Iterator[str]:
+        """Percorre apenas os telefones do segmento, sem carregar os objetos Contato"""
+        query = (
+            self.build_query(segment)
+            .with_entities(Contato.id, Contato.telefone)
+            .order_by(Contato.id)
+        )
+        last_id = 0
+        while True:
+            rows = query.filter(Contato.id > last_id).limit(chunk_size).all()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for _, telefone in rows:
+                yield telefone
+            if len(rows) < chunk_size:
+                return
@@ -0,0 +1,240 @@
+import hashlib
+import threading
+from array import array
+from typing import Iterable, Optional
+
+from ..models.contact import Contato, ContatoStatus, get_session
+from ..utils.logger import APILogger
+from ..utils.phone_formatter import PhoneFormatter
+
+logger = APILogger("suppression_service")
+
+# Status que impedem qualquer envio ao contato
+SUPPRESSED_STATUSES = frozenset({ContatoStatus.NAO_PERTURBE, ContatoStatus.REMOVIDO})
+
+
+def phone_fingerprint(phone: str) -> int:
+    """
+    Impressão digital de 64 bits do telefone normalizado (nunca zero)
+
+    Args:
+        phone: Telefone em qualquer formato (com ou sem DDI 55)
+    """
+    normalized = PhoneFormatter.format_to_db(phone)
+    digest = hashlib.blake2b(normalized.encode("ascii"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class PhoneFingerprintSet:
+    """
+    Conjunto compacto de impressões digitais de telefones
+
+    Tabela hash de endereçamento aberto (sondagem linear) sobre um
+    ``array('Q')``: 8 bytes por posição, sem objetos Python por número, o que
+    mantém milhões de telefones em poucas dezenas de MB. O valor 0 marca
+    posição vazia; a remoção desloca os itens seguintes para trás, sem
+    lápides. Colisões de 64 bits são desprezíveis para esse volume.
+
+    Não é thread-safe: a remoção desloca itens de posição, então leituras
+    concorrentes com gravações precisam do mesmo lock (ver SuppressionList).
+    """
+
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Args:
+            capacity: Quantidade esperada de telefones
+        """
+        size = 16
+        while size * self.MAX_LOAD < capacity:
+            size *= 2
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def memory_bytes(self) -> int:
+        """Memória ocupada pela tabela"""
+        return self._slots.itemsize * len(self._slots)
+
+    def _find(self, fingerprint: int) -> int:
+        """Posição da impressão digital ou da primeira posição vazia da sondagem"""
+        slots = self._slots
+        mask = self._mask
+        index = fingerprint & mask
+        while True:
+            current = slots[index]
+            if current == fingerprint or current == 0:
+                return index
+            index = (index + 1) & mask
+
+    def add_fingerprint(self, fingerprint: int) -> bool:
+        """Adiciona uma impressão digital; retorna False se já existia"""
+        index = self._find(fingerprint)
+        if self._slots[index] == fingerprint:
+            return False
+        self._slots[index] = fingerprint
+        self._count += 1
+        if self._count > len(self._slots) * self.MAX_LOAD:
+            self._resize(len(self._slots) * 2)
+        return True
+
+    def discard_fingerprint(self, fingerprint: int) -> bool:
+        """Remove uma impressão digital; retorna False se não existia"""
+        slots = self._slots
+        mask = self._mask
+        index = self._find(fingerprint)
+        if slots[index] != fingerprint:
+            return False
+
+        # Remoção com deslocamento para trás: mantém as sondagens contíguas
+        hole = index
+        probe = (hole + 1) & mask
+        while slots[probe] != 0:
+            home = slots[probe] & mask
+            # O item pode ocupar o buraco se o buraco estiver entre sua posição
+            # ideal e a posição atual (considerando a volta circular)
+            if (probe - home) & mask >= (probe - hole) & mask:
+                slots[hole] = slots[probe]
+                hole = probe
+            probe = (probe + 1) & mask
+        slots[hole] = 0
+        self._count -= 1
+        return True
+
+    def contains_fingerprint(self, fingerprint: int) -> bool:
+        return self._slots[self._find(fingerprint)] == fingerprint
+
+    def add(self, phone: str) -> bool:
+        return self.add_fingerprint(phone_fingerprint(phone))
+
+    def discard(self, phone: str) -> bool:
+        return self.discard_fingerprint(phone_fingerprint(phone))
+
+    def __contains__(self, phone: str) -> bool:
+        return self.contains_fingerprint(phone_fingerprint(phone))
+
+    def _resize(self, size: int) -> None:
+        # A nova tabela só é publicada depois de preenchida
+        slots = array("Q", bytes(8 * size))
+        mask = size - 1
+        for fingerprint in self._slots:
+            if fingerprint:
+                index = fingerprint & mask
+                while slots[index]:
+                    index = (index + 1) & mask
+                slots[index] = fingerprint
+        self._slots, self._mask = slots, mask
+
+
+class SuppressionList:
+    """
+    Telefones que não podem receber mensagens (não perturbe / removidos)
+
+    Carregada uma vez do banco local e mantida atualizada pelas gravações de
+    contatos deste processo (mudanças de status e sincronização com o Clint);
+    a verificação antes de cada envio é feita em memória, sem consulta ao
+    banco. Leituras e gravações usam o mesmo lock: uma gravação pode
+    redimensionar a tabela ou deslocar itens durante uma verificação.
+    """
+
+    def __init__(self, session_factory=get_session):
+        """
+        Args:
+            session_factory: Função que retorna uma sessão do banco de contatos
+        """
+        self.session_factory = session_factory
+        self._phones: Optional[PhoneFingerprintSet] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._phones is not None
+
+    def load(self, chunk_size: int = 5000) -> int:
+        """
+        (Re)carrega os telefones suprimidos a partir do banco
+
+        Returns:
+            Quantidade de telefones suprimidos
+        """
+        session = self.session_factory()
+        try:
+            query = session.query(Contato.telefone).filter(
+                Contato.status.in_(SUPPRESSED_STATUSES),
+                Contato.telefone.isnot(None)
+            )
+            phones = PhoneFingerprintSet(query.count())
+            for (telefone,) in query.yield_per(chunk_size):
+                phones.add(telefone)
+        finally:
+            session.close()
+
+        with self._lock:
+            self._phones = phones
+        logger.info(f"Lista de supressão carregada: {len(phones)} telefones")
+        return len(phones)
+
+    def _ensure_loaded(self) -> PhoneFingerprintSet:
+        if self._phones is None:
+            with self._lock:
+                loaded = self._phones is not None
+            if not loaded:
+                self.load()
+        return self._phones
+
+    def is_suppressed(self, phone: str) -> bool:
+        """Indica se o telefone não pode receber mensagens"""
+        if not phone:
+            return False
+        self._ensure_loaded()
+        fingerprint = phone_fingerprint(phone)
+        with self._lock:
+            return self._phones.contains_fingerprint(fingerprint)
+
+    def filter_phones(self, phones: Iterable[str]) -> Iterable[str]:
+        """Percorre apenas os telefones não suprimidos"""
+        self._ensure_loaded()
+        return (phone for phone in phones if not self.is_suppressed(phone))
+
+    def record_status(self, phone: str, status: ContatoStatus) -> None:
+        """
+        Atualiza a lista após a mudança de status de um contato
+
+        Se a lista ainda não foi carregada não faz nada: a carga lerá o
+        status já gravado no banco.
+        """
+        with self._lock:
+            if self._phones is None:
+                return
+            if status in SUPPRESSED_STATUSES:
+                self._phones.add(phone)
+            else:
+                self._phones.discard(phone)
+
+    def discard(self, phone: str) -> None:
+        """Remove um telefone que deixou de pertencer a um contato (ex: telefone alterado)"""
+        with self._lock:
+            if self._phones is not None:
+                self._phones.discard(phone)
+
+    def __len__(self) -> int:
+        return len(self._ensure_loaded())
+
+
+_suppression_list: Optional[SuppressionList] = None
+_suppression_lock = threading.Lock()
+
+
+def get_suppression_list() -> SuppressionList:
+    """Retorna a lista de supressão compartilhada do processo"""
+    global _suppression_list
+    if _suppression_list is None:
+        with _suppression_lock:
+            if _suppression_list is None:
+                _suppression_list = SuppressionList()
+    return _suppression_list
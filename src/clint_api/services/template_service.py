@@ -0,0 +1,143 @@
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..models.contact import Contato
+from ..models.whatsapp_message import WhatsAppMessage, message_delays
+
+FieldGetter = Callable[[Contato], Any]
+
+
+def _first_name(contact: Contato) -> str:
+    return (contact.nome or "").split(" ", 1)[0]
+
+
+def _status(contact: Contato) -> str:
+    return contact.status.value if contact.status else ""
+
+
+# Campos disponíveis em todos os templates
+BUILTIN_FIELDS: Dict[str, FieldGetter] = {
+    "nome": lambda contact: contact.nome,
+    "primeiro_nome": _first_name,
+    "telefone": lambda contact: contact.telefone,
+    "email": lambda contact: contact.email,
+    "tags": lambda contact: contact.tags,
+    "status": _status,
+    "clint_id": lambda contact: contact.clint_id,
+}
+
+
+class MessageTemplate:
+    """
+    Template de mensagem personalizada por contato
+
+    Usa a sintaxe do ``str.format`` com campos do contato (``{nome}``,
+    ``{primeiro_nome}``, ``{tags}``...) ou campos extras, e valor padrão
+    opcional para campos vazios: ``"Olá {primeiro_nome|cliente}!"``.
+
+    O texto é analisado uma única vez na criação: o template vira uma string
+    de formato posicional e uma lista de funções de leitura dos campos, então
+    renderizar é só ler os atributos e chamar ``str.format``. Para o texto
+    sem campos os atrasos da Z-API também são calculados uma única vez.
+    """
+
+    def __init__(self, text: str, fields: Optional[Dict[str, FieldGetter]] = None):
+        """
+        Args:
+            text: Texto do template
+            fields: Campos extras: nome -> função que recebe o Contato
+                (ex: ``{"cidade": lambda c: cidades.get(c.id)}``)
+
+        Raises:
+            ValueError: Se o template usar um campo desconhecido ou for inválido
+        """
+        self.text = text
+        available = dict(BUILTIN_FIELDS, **(fields or {}))
+
+        format_parts: List[str] = []
+        getters: List[Callable[[Contato], str]] = []
+        names: List[str] = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            format_parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if spec or conversion:
+                raise ValueError(f"Formatação não suportada no campo {{{field}}} do template")
+
+            name, _, default = field.partition("|")
+            name = name.strip()
+            if name not in available:
+                raise ValueError(
+                    f"Campo desconhecido no template: {{{name}}} "
+                    f"(disponíveis: {', '.join(sorted(available))})"
+                )
+            names.append(name)
+            getters.append(self._field_reader(available[name], default))
+            format_parts.append("{}")
+
+        self.fields: Tuple[str, ...] = tuple(dict.fromkeys(names))
+        self._format = "".join(format_parts).format
+        self._getters = tuple(getters)
+        # Sem campos o texto (e seus atrasos) é o mesmo para todos
+        self._static_text = None if getters else "".join(format_parts).format()
+        self._static_delays = message_delays(self._static_text) if self._static_text is not None else None
+
+    @staticmethod
+    def _field_reader(getter: FieldGetter, default: str) -> Callable[[Contato], str]:
+        def read(contact: Contato) -> str:
+            value = getter(contact)
+            if value is None or value == "":
+                return default
+            return str(value)
+        return read
+
+    def render(self, contact: Contato) -> str:
+        """Renderiza o texto para um contato"""
+        if self._static_text is not None:
+            return self._static_text
+        return self._format(*[getter(contact) for getter in self._getters])
+
+    def render_message(
+        self,
+        contact: Contato,
+        instance_id: Optional[str] = None,
+        token: Optional[str] = None
+    ) -> WhatsAppMessage:
+        """Renderiza a mensagem de um contato, com os atrasos da Z-API já calculados"""
+        text = self.render(contact)
+        delay_message, delay_typing = self._static_delays or message_delays(text)
+        return WhatsAppMessage(
+            phone=contact.telefone,
+            message=text,
+            instance_id=instance_id,
+            token=token,
+            delay_message=delay_message,
+            delay_typing=delay_typing
+        )
+
+    def render_batch(
+        self,
+        contacts: Iterable[Contato],
+        instance_id: Optional[str] = None,
+        token: Optional[str] = None
+    ) -> List[WhatsAppMessage]:
+        """
+        Renderiza as mensagens de um bloco de contatos
+
+        Args:
+            contacts: Contatos (ex: um bloco de SegmentService.iter_chunks)
+            instance_id: ID da instância Z-API
+            token: Token da Z-API
+
+        Returns:
+            Mensagens na mesma ordem dos contatos com telefone
+        """
+        render = self.render_message
+        return [
+            render(contact, instance_id, token)
+            for contact in contacts
+            if contact.telefone
+        ]
+
+    def __repr__(self):
+        return f"<MessageTemplate(fields={list(self.fields)})>"
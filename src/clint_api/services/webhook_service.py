@@ -1,6 +1,16 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Union
+from ..models.webhook_events import (
+    RECEIVED_CALLBACK,
+    ConnectionEvent,
+    ReceivedMessage,
+    decode_connection_event,
+    decode_webhook,
+)
 from ..utils.logger import APILogger
 from ..utils.config import Config
+from ..utils.circuit_breaker import get_circuit_breaker, zapi_breaker_name
+from ..utils.connection_state import get_connection_state
+from .contact_cache import CachedContact, get_contact_cache
 
 logger = APILogger("webhook_service")
 
@@ -14,15 +24,34 @@ class WebhookService:
         """Valida o token de segurança recebido no webhook"""
         return received_token == self.security_token
     
-    def process_message_received(self, data: Dict[str, Any]) -> None:
-        """Processa webhook de mensagem recebida"""
+    def process_message_received(self, data: Union[Dict[str, Any], ReceivedMessage]) -> Optional[CachedContact]:
+        """
+        Processa webhook de mensagem recebida
+        
+        Identifica o contato pelo telefone no cache em memória (sem consulta
+        ao banco para contatos já conhecidos ou desconhecidos).
+        
+        Returns:
+            Contato que enviou a mensagem, se estiver cadastrado
+        """
         try:
             logger.info("Processando webhook de mensagem recebida")
             logger.debug(f"Dados recebidos: {data}")
-            # Implemente aqui a lógica para processar mensagens recebidas
-            # Exemplo: salvar em banco de dados, notificar outros sistemas, etc.
+            
+            received = data if isinstance(data, ReceivedMessage) else decode_webhook(data, default_type=RECEIVED_CALLBACK)
+            if not isinstance(received, ReceivedMessage) or received.from_me or received.is_group:
+                return None
+            
+            contact = get_contact_cache().get_by_phone(received.phone)
+            if contact is None:
+                logger.info(f"Mensagem de telefone não cadastrado: {received.phone}")
+                return None
+            
+            logger.info(f"Mensagem recebida de {contact.nome} ({contact.telefone})")
+            return contact
         except Exception as e:
             logger.error(f"Erro ao processar mensagem recebida: {str(e)}")
+            return None
     
     def process_message_status(self, data: Dict[str, Any]) -> None:
         """Processa webhook de status de mensagem"""
@@ -33,15 +62,39 @@ class WebhookService:
         except Exception as e:
             logger.error(f"Erro ao processar status de mensagem: {str(e)}")
     
-    def process_connection_status(self, data: Dict[str, Any]) -> None:
-        """Processa webhook de status de conexão"""
+    def process_connection_status(self, data: Union[Dict[str, Any], ConnectionEvent]) -> None:
+        """
+        Processa webhook de status de conexão (on-connect / on-disconnect)
+        
+        Atualiza o status de conexão em cache e abre o circuit breaker da
+        instância na desconexão, fazendo os envios pararem imediatamente;
+        na reconexão o circuito é fechado.
+        """
         try:
             logger.info("Processando webhook de status de conexão")
             logger.debug(f"Dados recebidos: {data}")
-            # Implemente aqui a lógica para monitorar status da conexão
+            
+            event = data if isinstance(data, ConnectionEvent) else decode_connection_event(data)
+            instance_id = event.instance_id or Config.ZAPI_INSTANCE_ID
+            breaker = get_circuit_breaker(zapi_breaker_name(instance_id))
+            
+            connected = event.connected
+            get_connection_state(instance_id).set(connected)
+            
+            if connected:
+                breaker.close()
+                logger.info(f"Instância {instance_id} conectada; envios liberados")
+            else:
+                breaker.force_open("webhook de desconexão da Z-API")
+                logger.warning(f"Instância {instance_id} desconectada; envios pausados")
         except Exception as e:
             logger.error(f"Erro ao processar status de conexão: {str(e)}")
     
+    @staticmethod
+    def is_connected_event(data: Dict[str, Any]) -> bool:
+        """Indica se o payload de status de conexão representa uma conexão"""
+        return decode_connection_event(data).connected
+    
     def process_chat_presence(self, data: Dict[str, Any]) -> None:
         """Processa webhook de presença no chat"""
         try:
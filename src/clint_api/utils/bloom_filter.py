@@ -0,0 +1,136 @@
+"""
+Filtro de Bloom persistente para deduplicação de envios.
+
+Responde "certamente não está" ou "talvez esteja" usando um vetor de bits de
+tamanho fixo, calculado a partir da capacidade esperada e da taxa de falsos
+positivos aceitável (um milhão de telefones a 0,1% ocupam ~1,8 MB). Os
+``k`` índices de cada item vêm de um único hash BLAKE2b (hashing duplo de
+Kirsch-Mitzenmacher).
+
+O arquivo salvo contém um cabeçalho com os parâmetros do filtro e um
+marcador livre (``checkpoint``), usado por quem o mantém para saber até onde
+o filtro já reflete a fonte de verdade.
+"""
+
+import hashlib
+import math
+import os
+import struct
+import threading
+
+_MAGIC = b"CLBF"
+_VERSION = 1
+# magic, versão, bits, hashes, itens, checkpoint
+_HEADER = struct.Struct("<4sHQIQQ")
+
+
+class BloomFilter:
+    """Conjunto probabilístico de tamanho fixo (sem falsos negativos)"""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: Quantidade esperada de itens
+            error_rate: Taxa de falsos positivos com ``capacity`` itens
+        """
+        capacity = max(1, int(capacity))
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate deve estar entre 0 e 1")
+
+        num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self._init(num_bits, num_hashes)
+
+    def _init(self, num_bits: int, num_hashes: int, count: int = 0, checkpoint: int = 0) -> None:
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.count = count
+        self.checkpoint = checkpoint
+        self._bits = bytearray((num_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Tamanho do vetor de bits"""
+        return len(self._bits)
+
+    def _indexes(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
+
+    def add(self, item: str) -> bool:
+        """
+        Adiciona um item
+
+        Returns:
+            True se o item era novo (algum bit foi alterado)
+        """
+        changed = False
+        with self._lock:
+            bits = self._bits
+            for index in self._indexes(item):
+                byte, mask = index >> 3, 1 << (index & 7)
+                if not bits[byte] & mask:
+                    bits[byte] |= mask
+                    changed = True
+            if changed:
+                self.count += 1
+        return changed
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    # Persistência
+
+    def save(self, path: str) -> None:
+        """Grava o filtro no arquivo (escrita atômica)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            header = _HEADER.pack(
+                _MAGIC, _VERSION, self.num_bits, self.num_hashes, self.count, self.checkpoint
+            )
+            with open(temp_path, "wb") as file:
+                file.write(header)
+                file.write(self._bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        """
+        Lê um filtro gravado com ``save``
+
+        Raises:
+            ValueError: Se o arquivo não for um filtro válido
+        """
+        with open(path, "rb") as file:
+            header = file.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError(f"Filtro de Bloom inválido: {path}")
+            magic, version, num_bits, num_hashes, count, checkpoint = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"Filtro de Bloom inválido: {path}")
+
+            bloom = cls.__new__(cls)
+            bloom._init(num_bits, num_hashes, count, checkpoint)
+            if file.readinto(bloom._bits) != len(bloom._bits):
+                raise ValueError(f"Filtro de Bloom truncado: {path}")
+        return bloom
+
+    @classmethod
+    def open(cls, path: str, capacity: int = 1_000_000, error_rate: float = 0.001) -> "BloomFilter":
+        """Lê o filtro do arquivo, ou cria um vazio se ele não existir ou estiver corrompido"""
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (OSError, ValueError):
+                pass
+        return cls(capacity, error_rate)
+
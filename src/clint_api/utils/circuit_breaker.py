@@ -0,0 +1,217 @@
+"""
+Circuit breaker por serviço externo (instância Z-API, API Clint).
+
+Depois de ``failure_threshold`` falhas consecutivas o circuito abre e as
+chamadas falham imediatamente com ``CircuitOpenError``, sem esperar timeouts
+nem retries. Passado ``recovery_timeout`` o circuito fica meio-aberto: se
+houver uma função de prova (ex.: ``ZAPIClient.is_connected``) ela decide se o
+circuito fecha; sem prova, uma única chamada de teste é liberada.
+
+Os webhooks de conexão/desconexão da Z-API podem abrir ou fechar o circuito
+diretamente via ``force_open``/``close``.
+"""
+
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from requests.exceptions import RequestException
+
+from ..exceptions.api_exceptions import CircuitOpenError, TransientAPIError
+from .logger import APILogger
+
+logger = APILogger("circuit_breaker")
+
+
+class CircuitState(Enum):
+    """Estados do circuit breaker"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker thread-safe para um serviço externo"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        probe: Optional[Callable[[], bool]] = None,
+        failure_exceptions: Tuple[Type[Exception], ...] = (RequestException, TransientAPIError)
+    ):
+        """
+        Args:
+            name: Nome do serviço (ex: "zapi:<instance_id>", "clint")
+            failure_threshold: Falhas consecutivas para abrir o circuito
+            recovery_timeout: Segundos em aberto antes de testar a recuperação
+            probe: Função de prova executada no estado meio-aberto
+            failure_exceptions: Exceções que contam como falha do serviço
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe = probe
+        self.failure_exceptions = failure_exceptions
+
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        """Estado atual do circuito"""
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Indica se o circuito está aberto (chamadas bloqueadas)"""
+        return self._state is CircuitState.OPEN
+
+    def allow_request(self) -> bool:
+        """
+        Verifica se uma chamada pode ser feita agora
+
+        Returns:
+            True se a chamada pode prosseguir, False se deve falhar imediatamente
+        """
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return True
+
+            if self._state is CircuitState.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = CircuitState.HALF_OPEN
+                self._trial_in_flight = False
+                logger.info(f"Circuito {self.name} meio-aberto, testando recuperação")
+
+            # HALF_OPEN: apenas uma tentativa por vez
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            probe = self.probe
+
+        if probe is None:
+            return True
+
+        try:
+            healthy = bool(probe())
+        except Exception as e:
+            logger.warning(f"Prova do circuito {self.name} falhou: {str(e)}")
+            healthy = False
+
+        if healthy:
+            self.close()
+            return True
+
+        self._open("prova de recuperação falhou")
+        return False
+
+    def record_success(self) -> None:
+        """Registra uma chamada bem sucedida"""
+        if self._state is CircuitState.CLOSED and self._failures == 0:
+            return
+        with self._lock:
+            was_closed = self._state is CircuitState.CLOSED
+            self._failures = 0
+            self._state = CircuitState.CLOSED
+            self._trial_in_flight = False
+        if not was_closed:
+            logger.info(f"Circuito {self.name} fechado")
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """Registra uma falha do serviço"""
+        with self._lock:
+            self._failures += 1
+            should_open = (
+                self._state is CircuitState.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            )
+        if should_open and self._state is not CircuitState.OPEN:
+            self._open(f"{self._failures} falhas consecutivas" + (f" ({error})" if error else ""))
+
+    def is_failure(self, error: BaseException) -> bool:
+        """Indica se a exceção conta como falha do serviço"""
+        return isinstance(error, self.failure_exceptions)
+
+    def force_open(self, reason: str = "aberto manualmente") -> None:
+        """Abre o circuito imediatamente (ex: webhook de desconexão)"""
+        self._open(reason)
+
+    def close(self) -> None:
+        """Fecha o circuito imediatamente (ex: webhook de conexão)"""
+        with self._lock:
+            was_closed = self._state is CircuitState.CLOSED
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+        if not was_closed:
+            logger.info(f"Circuito {self.name} fechado")
+
+    def call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Executa ``func`` protegida pelo circuito
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuito {self.name} aberto; chamada bloqueada")
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(e)
+            else:
+                # Ex: 400 ou prazo esgotado: nada diz sobre a saúde do serviço,
+                # então não zera as falhas nem fecha o circuito meio-aberto
+                self._release_trial()
+            raise
+
+        self.record_success()
+        return result
+
+    def _release_trial(self) -> None:
+        """Libera uma nova chamada de teste no estado meio-aberto"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _open(self, reason: str) -> None:
+        with self._lock:
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+        logger.warning(f"Circuito {self.name} aberto: {reason}")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **kwargs: Any) -> CircuitBreaker:
+    """
+    Retorna o circuit breaker compartilhado de um serviço, criando-o se necessário
+
+    Args:
+        name: Nome do serviço (ex: "zapi:<instance_id>", "clint")
+        **kwargs: Parâmetros de CircuitBreaker usados apenas na criação
+    """
+    breaker = _breakers.get(name)
+    if breaker is not None:
+        return breaker
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
+
+
+def zapi_breaker_name(instance_id: str) -> str:
+    """Nome do circuit breaker de uma instância Z-API"""
+    return f"zapi:{instance_id}"
@@ -33,6 +33,41 @@ class Config:
     WEBHOOK_BASE_URL: str = os.getenv('WEBHOOK_BASE_URL', '')
     WEBHOOK_PORT: int = int(os.getenv('WEBHOOK_PORT', '8000'))
     
+    # Tempo (segundos) em que o status de conexão da Z-API fica em cache
+    ZAPI_CONNECTION_STATUS_TTL: float = float(os.getenv('ZAPI_CONNECTION_STATUS_TTL', '60'))
+    
+    # Timeouts HTTP (segundos) e prazo total de um envio, incluindo retries
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+    HTTP_READ_TIMEOUT: float = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+    ZAPI_SEND_DEADLINE: float = float(os.getenv('ZAPI_SEND_DEADLINE', '60'))
+    
+    # Cache local de mídia (base64 pronto e referências por SHA-256)
+    MEDIA_CACHE_DIR: str = os.getenv('MEDIA_CACHE_DIR', str(Path(__file__).parents[3] / 'data' / 'media_cache'))
+    MEDIA_CACHE_MAX_MB: float = float(os.getenv('MEDIA_CACHE_MAX_MB', '512'))
+    
+    # URL pública do servidor de webhooks para servir mídias em /media
+    # (vazio: mídias locais são enviadas em base64)
+    MEDIA_PUBLIC_BASE_URL: str = os.getenv('MEDIA_PUBLIC_BASE_URL', '')
+    
+    # Deduplicação de campanhas (filtros de Bloom persistidos por campanha)
+    CAMPAIGN_DEDUP_DIR: str = os.getenv('CAMPAIGN_DEDUP_DIR', str(Path(__file__).parents[3] / 'data' / 'campaigns'))
+    CAMPAIGN_BLOOM_CAPACITY: int = int(os.getenv('CAMPAIGN_BLOOM_CAPACITY', '1000000'))
+    CAMPAIGN_BLOOM_ERROR_RATE: float = float(os.getenv('CAMPAIGN_BLOOM_ERROR_RATE', '0.001'))
+    
+    # Gravação em lote (write-behind) do status dos contatos após os envios
+    CONTACT_STATUS_FLUSH_INTERVAL: float = float(os.getenv('CONTACT_STATUS_FLUSH_INTERVAL', '1'))
+    CONTACT_STATUS_BATCH_SIZE: int = int(os.getenv('CONTACT_STATUS_BATCH_SIZE', '500'))
+    
+    # Gravação em lote dos status de mensagens recebidos pelo webhook
+    MESSAGE_STATUS_FLUSH_INTERVAL: float = float(os.getenv('MESSAGE_STATUS_FLUSH_INTERVAL', '1'))
+    MESSAGE_STATUS_BATCH_SIZE: int = int(os.getenv('MESSAGE_STATUS_BATCH_SIZE', '1000'))
+    
+    # Cache em memória de contatos (por telefone e ID do Clint)
+    CONTACT_CACHE_SIZE: int = int(os.getenv('CONTACT_CACHE_SIZE', '50000'))
+    CONTACT_CACHE_TTL: float = float(os.getenv('CONTACT_CACHE_TTL', '300'))
+    CONTACT_CACHE_NEGATIVE_TTL: float = float(os.getenv('CONTACT_CACHE_NEGATIVE_TTL', '30'))
+    CLINT_CONTACT_CACHE_TTL: float = float(os.getenv('CLINT_CONTACT_CACHE_TTL', '300'))
+    
     # Caminhos de arquivos
     AUDIO_TEST_PATH: str = os.getenv('AUDIO_TEST_PATH', '')
     
@@ -0,0 +1,67 @@
+"""
+Cache do status de conexão das instâncias Z-API.
+
+Evita uma chamada a ``/status`` antes de cada envio: o estado é atualizado
+pelas próprias verificações, pelos envios bem sucedidos e pelos webhooks
+``on-connect``/``on-disconnect``, e só expira depois de ``ttl`` segundos.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from .config import Config
+
+
+class ConnectionStateCache:
+    """Último status de conexão conhecido de uma instância, com TTL"""
+
+    def __init__(self, ttl: float = 60.0):
+        """
+        Args:
+            ttl: Segundos em que o status conhecido é considerado válido
+        """
+        self.ttl = ttl
+        self._connected: Optional[bool] = None
+        self._updated_at = 0.0
+
+    @property
+    def connected(self) -> Optional[bool]:
+        """Status em cache (None se desconhecido ou expirado)"""
+        if self._connected is None:
+            return None
+        if time.monotonic() - self._updated_at > self.ttl:
+            return None
+        return self._connected
+
+    @property
+    def age(self) -> Optional[float]:
+        """Idade do status em cache, em segundos"""
+        if self._connected is None:
+            return None
+        return time.monotonic() - self._updated_at
+
+    def set(self, connected: bool) -> None:
+        """Registra o status atual da instância"""
+        self._connected = connected
+        self._updated_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Descarta o status conhecido, forçando nova verificação"""
+        self._connected = None
+
+
+_states: Dict[str, ConnectionStateCache] = {}
+_lock = threading.Lock()
+
+
+def get_connection_state(instance_id: str) -> ConnectionStateCache:
+    """Retorna o cache de status compartilhado de uma instância Z-API"""
+    state = _states.get(instance_id)
+    if state is not None:
+        return state
+    with _lock:
+        state = _states.get(instance_id)
+        if state is None:
+            state = _states[instance_id] = ConnectionStateCache(Config.ZAPI_CONNECTION_STATUS_TTL)
+        return state
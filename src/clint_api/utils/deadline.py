@@ -0,0 +1,114 @@
+"""
+Timeouts HTTP e prazos (deadlines) por operação.
+
+Todas as requisições usam ``request_timeout()``, que combina os timeouts de
+conexão/leitura configurados com o tempo restante do prazo atual. O prazo é
+definido com o context manager ``deadline`` e vale também para os retries:
+nenhuma espera de backoff ultrapassa o prazo da operação.
+
+Exemplo:
+    with deadline(30):
+        client.send_message(message)
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from ..exceptions.api_exceptions import DeadlineExceededError
+from .config import Config
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("clint_api_deadline", default=None)
+
+
+class Deadline:
+    """Instante limite para concluir uma operação"""
+
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds: Tempo máximo, em segundos, a partir de agora
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Segundos restantes (0 se expirado)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Indica se o prazo já passou"""
+        return time.monotonic() >= self.expires_at
+
+    def __repr__(self):
+        return f"<Deadline(remaining={self.remaining():.2f}s)>"
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Define o prazo da operação executada dentro do bloco
+
+    Prazos aninhados nunca estendem o prazo externo: vale o mais curto.
+
+    Args:
+        seconds: Tempo máximo em segundos (None mantém o prazo atual)
+    """
+    outer = _current_deadline.get()
+    if seconds is None:
+        yield outer
+        return
+
+    inner = Deadline(seconds)
+    if outer is not None and outer.expires_at <= inner.expires_at:
+        inner = outer
+
+    token = _current_deadline.set(inner)
+    try:
+        yield inner
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Retorna o prazo em vigor (None se não houver)"""
+    return _current_deadline.get()
+
+
+def check_deadline(operation: str = "operação") -> None:
+    """
+    Lança DeadlineExceededError se o prazo atual já expirou
+
+    Args:
+        operation: Descrição usada na mensagem de erro
+    """
+    current = _current_deadline.get()
+    if current is not None and current.expired:
+        raise DeadlineExceededError(f"Prazo de {current.seconds:.1f}s esgotado: {operation}")
+
+
+def request_timeout(
+    connect: Optional[float] = None,
+    read: Optional[float] = None
+) -> Tuple[float, float]:
+    """
+    Calcula o timeout (conexão, leitura) de uma requisição
+
+    Usa os valores de Config.HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT,
+    limitados pelo tempo restante do prazo atual.
+
+    Raises:
+        DeadlineExceededError: Se o prazo atual já expirou
+    """
+    connect = Config.HTTP_CONNECT_TIMEOUT if connect is None else connect
+    read = Config.HTTP_READ_TIMEOUT if read is None else read
+
+    current = _current_deadline.get()
+    if current is None:
+        return connect, read
+
+    check_deadline("requisição HTTP")
+    remaining = current.remaining()
+    return min(connect, remaining), min(read, remaining)
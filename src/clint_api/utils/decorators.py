@@ -1,83 +1,251 @@
+import asyncio
 import time
 import functools
 from typing import Any, Callable, Type, Tuple, Optional
-from requests.exceptions import RequestException
 
 from .logger import APILogger
+from .retry_policy import RetryPolicy
+from .deadline import current_deadline
+from . import tracing
+from .tracing import CallTrace
 
 logger = APILogger("decorators")
 
+def _build_policy(
+    max_attempts: int,
+    delay: float,
+    backoff: float,
+    exceptions: Optional[Tuple[Type[Exception], ...]],
+    policy: Optional[RetryPolicy]
+) -> RetryPolicy:
+    """Monta a política a partir dos parâmetros legados do decorator"""
+    if policy is not None:
+        return policy
+    if exceptions is None:
+        return RetryPolicy(max_attempts=max_attempts, base_delay=delay, backoff=backoff)
+    return RetryPolicy(max_attempts=max_attempts, base_delay=delay, backoff=backoff, retry_on=exceptions)
+
+def _next_delay(policy: RetryPolicy, attempt: int, error: Exception) -> Optional[float]:
+    """
+    Decide se a chamada deve ser repetida após a falha da tentativa ``attempt``
+
+    Returns:
+        Segundos de espera, ou None se não houver nova tentativa
+    """
+    if not policy.is_retryable(error):
+        return None
+
+    if attempt >= policy.max_attempts - 1:
+        logger.error(
+            f"Todas as {policy.max_attempts} tentativas falharam. "
+            f"Último erro: {str(error)}"
+        )
+        return None
+
+    wait = policy.compute_delay(attempt, error)
+
+    # O prazo é verificado antes do orçamento: um retry abandonado não consome token
+    current = current_deadline()
+    if current is not None and current.remaining() <= wait:
+        logger.warning(
+            f"Prazo da operação insuficiente para nova tentativa após a tentativa {attempt + 1}. "
+            f"Último erro: {str(error)}"
+        )
+        return None
+
+    if not policy.acquire_retry():
+        logger.warning(
+            f"Orçamento de retries esgotado; desistindo após a tentativa {attempt + 1}. "
+            f"Último erro: {str(error)}"
+        )
+        return None
+
+    logger.warning(
+        f"Tentativa {attempt + 1} falhou: {str(error)}. "
+        f"Tentando novamente em {wait:.1f} segundos..."
+    )
+    return wait
+
+def _emit_retry_trace(func: Callable, started_at: float, start: float, attempts: int,
+                      backoff_time: float, error: Optional[BaseException]) -> None:
+    """Publica o registro de uma chamada com retry"""
+    tracing.emit(CallTrace(
+        name=func.__qualname__,
+        kind="retry",
+        started_at=started_at,
+        wall_time=time.perf_counter() - start,
+        attempts=attempts,
+        backoff_time=backoff_time,
+        exception_class=type(error).__name__ if error else None
+    ))
+
 def retry(
     max_attempts: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
-    exceptions: Tuple[Type[Exception], ...] = (RequestException,)
+    exceptions: Optional[Tuple[Type[Exception], ...]] = None,
+    policy: Optional[RetryPolicy] = None
 ):
     """
     Decorator para retry em caso de falha
-    
+
+    As esperas seguem a RetryPolicy: backoff exponencial com full jitter,
+    Retry-After respeitado em 429/503 e orçamento global de retries.
+
+    Quando há um sink de tracing configurado, publica um CallTrace (kind="retry")
+    com o tempo total, número de tentativas, tempo gasto em backoff e a classe
+    da exceção final.
+
     Args:
         max_attempts: Número máximo de tentativas
-        delay: Tempo de espera inicial entre tentativas
-        backoff: Fator multiplicador do delay a cada tentativa
+        delay: Teto de espera da primeira repetição
+        backoff: Fator multiplicador do teto a cada tentativa
         exceptions: Tupla de exceções que devem ser tratadas
+            (padrão: RequestException e TransientAPIError)
+        policy: Política completa; quando informada, ignora os demais parâmetros
     """
+    retry_policy = _build_policy(max_attempts, delay, backoff, exceptions, policy)
+
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            current_delay = delay
-            last_exception = None
-            
-            for attempt in range(max_attempts):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    last_exception = e
-                    if attempt < max_attempts - 1:
-                        logger.warning(
-                            f"Tentativa {attempt + 1} falhou: {str(e)}. "
-                            f"Tentando novamente em {current_delay:.1f} segundos..."
-                        )
-                        time.sleep(current_delay)
-                        current_delay *= backoff
-                    else:
-                        logger.error(
-                            f"Todas as {max_attempts} tentativas falharam. "
-                            f"Último erro: {str(e)}"
-                        )
-            
-            if last_exception:
-                raise last_exception
+            traced = tracing._sink is not None
+            if traced:
+                started_at = time.time()
+                start = time.perf_counter()
+
+            error = None
+            backoff_time = 0.0
+            attempt = 0
+
+            try:
+                while True:
+                    try:
+                        result = func(*args, **kwargs)
+                        error = None
+                        retry_policy.record_success()
+                        return result
+                    except Exception as e:
+                        error = e
+                        wait = _next_delay(retry_policy, attempt, e)
+                        if wait is None:
+                            raise
+                        time.sleep(wait)
+                        backoff_time += wait
+                        attempt += 1
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                if traced:
+                    _emit_retry_trace(func, started_at, start, attempt + 1, backoff_time, error)
+        return wrapper
+    return decorator
+
+def retry_async(
+    max_attempts: int = 3,
+    delay: float = 1.0,
+    backoff: float = 2.0,
+    exceptions: Optional[Tuple[Type[Exception], ...]] = None,
+    policy: Optional[RetryPolicy] = None
+):
+    """
+    Versão do decorator ``retry`` para funções assíncronas
+
+    Usa ``asyncio.sleep`` entre as tentativas, sem bloquear o event loop.
+    Os parâmetros são os mesmos de ``retry``.
+    """
+    retry_policy = _build_policy(max_attempts, delay, backoff, exceptions, policy)
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            traced = tracing._sink is not None
+            if traced:
+                started_at = time.time()
+                start = time.perf_counter()
+
+            error = None
+            backoff_time = 0.0
+            attempt = 0
+
+            try:
+                while True:
+                    try:
+                        result = await func(*args, **kwargs)
+                        error = None
+                        retry_policy.record_success()
+                        return result
+                    except Exception as e:
+                        error = e
+                        wait = _next_delay(retry_policy, attempt, e)
+                        if wait is None:
+                            raise
+                        await asyncio.sleep(wait)
+                        backoff_time += wait
+                        attempt += 1
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                if traced:
+                    _emit_retry_trace(func, started_at, start, attempt + 1, backoff_time, error)
         return wrapper
     return decorator
 
 def log_api_call(logger_name: Optional[str] = None):
     """
     Decorator para logging de chamadas de API
-    
+
+    Quando há um sink de tracing configurado, publica um CallTrace (kind="call")
+    com o tempo de cada execução e a classe da exceção, se houver.
+
     Args:
         logger_name: Nome opcional para o logger
     """
     def decorator(func: Callable) -> Callable:
+        # Cria o logger uma única vez por função decorada
+        log = APILogger(logger_name or func.__name__)
+        trace_name = logger_name or func.__qualname__
+
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            # Cria ou obtém logger
-            log = APILogger(logger_name or func.__name__)
-            
+            traced = tracing._sink is not None
+            if traced:
+                started_at = time.time()
+                start = time.perf_counter()
+
             try:
                 # Registra chamada
                 log.info(f"Chamando {func.__name__}")
                 log.debug(f"Args: {args}, Kwargs: {kwargs}")
-                
+
                 # Executa função
                 result = func(*args, **kwargs)
-                
+
                 # Registra sucesso
                 log.info(f"Chamada {func.__name__} concluída com sucesso")
                 log.debug(f"Resultado: {result}")
-                
+
+                if traced:
+                    tracing.emit(CallTrace(
+                        name=trace_name,
+                        kind="call",
+                        started_at=started_at,
+                        wall_time=time.perf_counter() - start
+                    ))
+
                 return result
             except Exception as e:
+                if traced:
+                    tracing.emit(CallTrace(
+                        name=trace_name,
+                        kind="call",
+                        started_at=started_at,
+                        wall_time=time.perf_counter() - start,
+                        exception_class=type(e).__name__
+                    ))
+
                 # Registra erro
                 log.log_error(e, {
                     "function": func.__name__,
@@ -86,4 +254,4 @@ def log_api_call(logger_name: Optional[str] = None):
                 })
                 raise
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -0,0 +1,334 @@
+"""
+Cache local de mídia endereçado por conteúdo (SHA-256).
+
+Cada arquivo enviado é identificado pelo hash do seu conteúdo; a forma
+codificada em base64 fica em disco (``<digest>.b64``) junto de um arquivo de
+metadados (``<digest>.json``) com o MIME type e as referências de mídia já
+conhecidas (ex.: URL pública do arquivo). Reenvios do mesmo conteúdo, mesmo a
+partir de outro caminho, reaproveitam o base64 pronto ou a referência, sem
+reler nem recodificar o arquivo.
+
+O hash de um caminho é memorizado por (caminho, tamanho, mtime), de modo que
+arquivos inalterados nem são relidos. O espaço em disco é limitado por
+``Config.MEDIA_CACHE_MAX_MB``, descartando primeiro os itens usados há mais
+tempo (LRU pelo mtime dos arquivos do item). O tamanho total é mantido em
+memória a cada gravação; o diretório só é percorrido na primeira gravação e
+quando o limite é ultrapassado.
+
+``publish`` guarda também uma cópia do arquivo original (``<digest>.media``),
+servida pela rota ``/media`` do servidor de webhooks para envio por URL.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .config import Config
+from .logger import APILogger
+from .media_encoding import CHUNK_SIZE, guess_mime_type, iter_base64_chunks
+
+logger = APILogger("media_cache")
+
+_INDEX_FILE = "index.json"
+
+# Arquivos de conteúdo de um item: base64 e cópia publicada no servidor de mídia
+_DATA_EXTENSIONS = (".b64", ".media")
+
+
+def file_digest(file_path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """Calcula o SHA-256 do conteúdo de um arquivo, lendo-o em blocos"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaCache:
+    """Armazenamento em disco de mídias codificadas, endereçado por SHA-256"""
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            directory: Diretório do cache
+            max_bytes: Espaço máximo ocupado pelos arquivos codificados
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, str]] = None
+        # Bytes ocupados pelos arquivos de conteúdo (None até a primeira gravação)
+        self._size: Optional[int] = None
+
+    # Índice caminho -> digest
+
+    @staticmethod
+    def _file_key(file_path: str) -> Tuple[str, str]:
+        stat = os.stat(file_path)
+        path = os.path.abspath(file_path)
+        return path, f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _load_index(self) -> Dict[str, str]:
+        if self._index is None:
+            try:
+                with open(os.path.join(self.directory, _INDEX_FILE), encoding="utf-8") as file:
+                    self._index = json.load(file)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self) -> None:
+        self._write_json(os.path.join(self.directory, _INDEX_FILE), self._index or {})
+
+    def digest(self, file_path: str) -> str:
+        """
+        Retorna o SHA-256 do arquivo, reaproveitando o hash de arquivos inalterados
+
+        Args:
+            file_path: Caminho do arquivo de mídia
+        """
+        path, signature = self._file_key(file_path)
+        with self._lock:
+            entry = self._load_index().get(path)
+        if entry and entry.startswith(signature + ":"):
+            return entry.rsplit(":", 1)[1]
+
+        digest = file_digest(file_path)
+        with self._lock:
+            self._load_index()[path] = f"{signature}:{digest}"
+            self._save_index()
+        return digest
+
+    # Objetos
+
+    def _object_path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}{extension}")
+
+    def encoded_path(self, file_path: str) -> Tuple[str, str]:
+        """
+        Retorna o arquivo com o base64 do conteúdo, codificando apenas na primeira vez
+
+        Args:
+            file_path: Caminho do arquivo de mídia
+
+        Returns:
+            Tupla (digest, caminho do arquivo .b64)
+        """
+        digest = self.digest(file_path)
+        encoded = self._object_path(digest, ".b64")
+
+        if os.path.exists(encoded):
+            self._touch(encoded)
+            logger.debug(f"Mídia {digest[:12]} encontrada no cache")
+            return digest, encoded
+
+        os.makedirs(os.path.dirname(encoded), exist_ok=True)
+        temp_path = f"{encoded}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as output:
+            for chunk in iter_base64_chunks(file_path):
+                output.write(chunk)
+        os.replace(temp_path, encoded)
+
+        self._store_meta(digest, file_path)
+
+        logger.info(f"Mídia {digest[:12]} codificada e armazenada no cache")
+        self._added(os.path.getsize(encoded), keep=digest)
+        return digest, encoded
+
+    def publish(self, file_path: str) -> str:
+        """
+        Guarda uma cópia do arquivo no cache para ser servida pelo servidor de mídia
+
+        Args:
+            file_path: Caminho do arquivo de mídia
+
+        Returns:
+            Digest do conteúdo
+        """
+        digest = self.digest(file_path)
+        published = self._object_path(digest, ".media")
+
+        if os.path.exists(published):
+            self._touch(published)
+            return digest
+
+        os.makedirs(os.path.dirname(published), exist_ok=True)
+        temp_path = f"{published}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(file_path, temp_path)
+        os.replace(temp_path, published)
+
+        self._store_meta(digest, file_path)
+
+        logger.info(f"Mídia {digest[:12]} publicada no cache")
+        self._added(os.path.getsize(published), keep=digest)
+        return digest
+
+    def media_path(self, digest: str) -> Optional[str]:
+        """Caminho da cópia publicada do conteúdo (None se não publicada)"""
+        published = self._object_path(digest, ".media")
+        if not os.path.exists(published):
+            return None
+        self._touch(published)
+        return published
+
+    def mime_type(self, digest: str, default: str = "application/octet-stream") -> str:
+        """MIME type registrado para o conteúdo"""
+        return self._read_meta(digest).get("mime_type", default)
+
+    # Referências de mídia (URLs já publicadas/aceitas pela Z-API)
+
+    def get_ref(self, digest: str, name: str) -> Optional[Any]:
+        """Retorna uma referência armazenada para o conteúdo (ex: "url")"""
+        return self._read_meta(digest).get("refs", {}).get(name)
+
+    def set_ref(self, digest: str, name: str, value: Any) -> None:
+        """Associa uma referência ao conteúdo (ex: URL pública do arquivo)"""
+        with self._lock:
+            meta = self._read_meta(digest)
+            meta.setdefault("refs", {})[name] = value
+            os.makedirs(os.path.dirname(self._object_path(digest, ".json")), exist_ok=True)
+            self._write_json(self._object_path(digest, ".json"), meta)
+
+    # Manutenção
+
+    def _added(self, size: int, keep: str) -> None:
+        """Contabiliza um arquivo gravado e remove itens se o limite foi ultrapassado"""
+        with self._lock:
+            if self._size is None:
+                # Primeira gravação do processo: o total inclui o arquivo novo
+                self._size = self._scan()[1]
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self.evict(keep=keep)
+
+    def _scan(self) -> Tuple[Dict[str, list], int]:
+        """
+        Percorre o diretório do cache
+
+        Returns:
+            Tupla (digest -> [mtime mais recente, bytes], total de bytes)
+        """
+        items: Dict[str, list] = {}
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                digest, extension = os.path.splitext(name)
+                if extension not in _DATA_EXTENSIONS:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                item = items.setdefault(digest, [0.0, 0])
+                item[0] = max(item[0], stat.st_mtime)
+                item[1] += stat.st_size
+                total += stat.st_size
+        return items, total
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Remove os itens menos usados até o cache caber em ``max_bytes``
+
+        Cada item (base64, cópia publicada e metadados) é removido por
+        inteiro, para que nenhuma referência aponte para um arquivo ausente,
+        junto com as entradas do índice de caminhos que apontam para ele.
+
+        Args:
+            keep: Digest que nunca é removido (ex: o item recém-codificado)
+
+        Returns:
+            Quantidade de itens removidos
+        """
+        with self._lock:
+            items, total = self._scan()
+            self._size = total
+            if total <= self.max_bytes:
+                return 0
+
+            removed = set()
+            for digest, (_, size) in sorted(items.items(), key=lambda item: item[1][0]):
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                for extension in _DATA_EXTENSIONS + (".json",):
+                    try:
+                        os.remove(self._object_path(digest, extension))
+                    except OSError:
+                        pass
+                total -= size
+                removed.add(digest)
+            self._size = total
+
+            if removed:
+                index = self._load_index()
+                stale = [path for path, entry in index.items() if entry.rsplit(":", 1)[1] in removed]
+                for path in stale:
+                    del index[path]
+                if stale:
+                    self._save_index()
+                logger.info(f"{len(removed)} mídia(s) removida(s) do cache (LRU)")
+            return len(removed)
+
+    def clear(self) -> None:
+        """Remove todos os itens do cache"""
+        with self._lock:
+            self.max_bytes, max_bytes = -1, self.max_bytes
+            try:
+                self.evict()
+            finally:
+                self.max_bytes = max_bytes
+            self._index = {}
+            self._save_index()
+
+    # Auxiliares
+
+    def _store_meta(self, digest: str, file_path: str) -> None:
+        with self._lock:
+            meta = self._read_meta(digest)
+            meta.setdefault("mime_type", guess_mime_type(file_path))
+            meta["size"] = os.path.getsize(file_path)
+            meta.setdefault("refs", {})
+            self._write_json(self._object_path(digest, ".json"), meta)
+
+    def _read_meta(self, digest: str) -> Dict[str, Any]:
+        try:
+            with open(self._object_path(digest, ".json"), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_json(self, path: str, data: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+
+_media_cache: Optional[MediaCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_media_cache() -> MediaCache:
+    """Retorna o cache de mídia compartilhado (ver Config.MEDIA_CACHE_DIR)"""
+    global _media_cache
+    if _media_cache is None:
+        with _cache_lock:
+            if _media_cache is None:
+                _media_cache = MediaCache(
+                    Config.MEDIA_CACHE_DIR,
+                    int(Config.MEDIA_CACHE_MAX_MB * 1024 * 1024)
+                )
+    return _media_cache
@@ -0,0 +1,200 @@
+"""
+Codificação base64 incremental de arquivos de mídia.
+
+Em vez de carregar o arquivo inteiro e montar uma segunda string base64
+(mais o JSON com ela), o conteúdo é lido em blocos múltiplos de 3 bytes e
+codificado sob demanda. ``MediaJSONBody`` gera o corpo JSON da requisição
+incrementalmente, com ``Content-Length`` conhecido de antemão, mantendo o uso
+de memória constante independente do tamanho do arquivo.
+"""
+
+import base64
+import json
+import mimetypes
+import mmap
+import os
+from typing import Any, Dict, Iterator, Optional
+
+# Tamanho do bloco lido do arquivo (múltiplo de 3 para não gerar padding no meio)
+CHUNK_SIZE = 3 * 64 * 1024
+
+
+def base64_length(size: int) -> int:
+    """Tamanho, em bytes, da representação base64 de ``size`` bytes"""
+    return 4 * ((size + 2) // 3)
+
+
+def guess_mime_type(file_path: str, default: str = "application/octet-stream") -> str:
+    """Deduz o MIME type pela extensão do arquivo"""
+    mime_type, _ = mimetypes.guess_type(file_path)
+    return mime_type or default
+
+
+def iter_base64_chunks(
+    file_path: str,
+    chunk_size: int = CHUNK_SIZE,
+    use_mmap: bool = False
+) -> Iterator[bytes]:
+    """
+    Gera o conteúdo do arquivo em base64, bloco a bloco
+
+    Args:
+        file_path: Caminho do arquivo
+        chunk_size: Bytes lidos por bloco (arredondado para múltiplo de 3)
+        use_mmap: Lê o arquivo via mmap em vez de read()
+
+    Yields:
+        Blocos base64 (bytes ASCII)
+    """
+    chunk_size = max(3, chunk_size - chunk_size % 3)
+
+    with open(file_path, "rb") as file:
+        if use_mmap and os.fstat(file.fileno()).st_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, len(view), chunk_size):
+                        yield base64.b64encode(view[offset:offset + chunk_size])
+                finally:
+                    view.release()
+            return
+
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield base64.b64encode(chunk)
+
+
+def encode_file_to_base64(file_path: str, data_uri: bool = False, use_mmap: bool = True) -> str:
+    """
+    Codifica um arquivo inteiro em base64 sem manter uma cópia do arquivo em memória
+
+    O resultado é escrito bloco a bloco em um buffer do tamanho exato, evitando
+    manter ao mesmo tempo o conteúdo original e a string codificada.
+
+    Args:
+        file_path: Caminho do arquivo
+        data_uri: Prefixa o resultado com "data:<mime>;base64,"
+        use_mmap: Lê o arquivo via mmap
+
+    Returns:
+        String base64
+    """
+    prefix = f"data:{guess_mime_type(file_path)};base64," if data_uri else ""
+    encoded = bytearray(base64_length(os.path.getsize(file_path)))
+
+    position = 0
+    for chunk in iter_base64_chunks(file_path, use_mmap=use_mmap):
+        encoded[position:position + len(chunk)] = chunk
+        position += len(chunk)
+
+    return prefix + encoded.decode("ascii")
+
+
+class MediaJSONBody:
+    """
+    Corpo JSON de envio de mídia gerado sob demanda
+
+    Produz ``{<campos>, "<campo_mídia>": "<base64>"}`` lendo o arquivo em
+    blocos. Implementa ``read``/``__len__``/``seek``/``tell``, o suficiente para
+    ser usado como ``data=`` no requests (com Content-Length, sem chunked) e
+    reenviado em retries.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        media_field: str,
+        fields: Optional[Dict[str, Any]] = None,
+        data_uri: bool = True,
+        mime_type: Optional[str] = None,
+        chunk_size: int = CHUNK_SIZE,
+        encoded_path: Optional[str] = None
+    ):
+        """
+        Args:
+            file_path: Caminho do arquivo de mídia
+            media_field: Nome do campo com o base64 (ex: "audio", "image")
+            fields: Demais campos do JSON (ex: phone, caption)
+            data_uri: Prefixa o base64 com "data:<mime>;base64,"
+            mime_type: MIME type do prefixo (padrão: deduzido pela extensão)
+            chunk_size: Bytes do arquivo lidos por bloco
+            encoded_path: Arquivo com o base64 já pronto (ex: do MediaCache),
+                enviado sem recodificar
+        """
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.encoded_path = encoded_path
+
+        extra = {key: value for key, value in (fields or {}).items() if value is not None}
+        head = json.dumps(extra)[1:-1]
+        if head:
+            head += ", "
+        head += json.dumps(media_field) + ': "'
+        if data_uri:
+            head += f"data:{mime_type or guess_mime_type(file_path)};base64,"
+
+        self._prefix = ("{" + head).encode("utf-8")
+        self._suffix = b'"}'
+        if encoded_path is not None:
+            encoded_length = os.path.getsize(encoded_path)
+        else:
+            encoded_length = base64_length(os.path.getsize(file_path))
+        self._length = len(self._prefix) + encoded_length + len(self._suffix)
+        self.seek(0)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _parts(self) -> Iterator[bytes]:
+        yield self._prefix
+        if self.encoded_path is not None:
+            with open(self.encoded_path, "rb") as file:
+                yield from iter(lambda: file.read(self.chunk_size), b"")
+        else:
+            yield from iter_base64_chunks(self.file_path, self.chunk_size)
+        yield self._suffix
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._parts()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """Volta ao início do corpo (apenas seek(0) é suportado)"""
+        if offset != 0 or whence != 0:
+            raise OSError("MediaJSONBody só suporta seek(0)")
+        self._iterator = self._parts()
+        # Bloco atual e quanto dele já foi lido: cada read copia só os bytes
+        # devolvidos, sem refatiar o restante do bloco
+        self._chunk = b""
+        self._offset = 0
+        self._position = 0
+        return 0
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        """Lê até ``size`` bytes do corpo (todo o restante se size < 0)"""
+        if size is None or size < 0:
+            data = self._chunk[self._offset:] + b"".join(self._iterator)
+            self._chunk, self._offset = b"", 0
+            self._position += len(data)
+            return data
+
+        pieces = []
+        remaining = size
+        while remaining > 0:
+            if self._offset >= len(self._chunk):
+                chunk = next(self._iterator, None)
+                if chunk is None:
+                    break
+                self._chunk, self._offset = chunk, 0
+            piece = self._chunk[self._offset:self._offset + remaining]
+            self._offset += len(piece)
+            remaining -= len(piece)
+            pieces.append(piece)
+
+        data = pieces[0] if len(pieces) == 1 else b"".join(pieces)
+        self._position += len(data)
+        return data
@@ -0,0 +1,201 @@
+"""
+Política de retry usada pelo decorator ``retry``.
+
+- Backoff exponencial com "full jitter" (espera aleatória entre 0 e o teto
+  exponencial), evitando que vários envios repitam no mesmo instante;
+- Respeita o cabeçalho ``Retry-After`` em respostas 429/503;
+- Orçamento global de retries (``RetryBudget``): cada retry consome um token
+  e cada sucesso devolve uma fração, limitando tempestades de retries quando
+  a API está fora do ar;
+- Chamadas não idempotentes (ex: envio de mensagem) só são repetidas quando a
+  API certamente não processou a requisição: falha ao conectar, 429 ou 503.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple, Type
+
+from requests.exceptions import ConnectTimeout, RequestException
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from urllib3.exceptions import NewConnectionError
+
+from ..exceptions.api_exceptions import TransientAPIError
+
+# Status HTTP que indicam falha temporária
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Status em que a API recusou a requisição sem processá-la
+NOT_PROCESSED_STATUS_CODES = frozenset({429, 503})
+
+
+def is_safe_to_resend(exception: BaseException) -> bool:
+    """
+    Verifica se a requisição com falha certamente não chegou a ser processada
+
+    Só a falha ao abrir a conexão e as recusas explícitas (429/503) garantem
+    isso; um timeout de leitura ou conexão interrompida pode ocorrer depois
+    de a API já ter aceitado a requisição.
+    """
+    if isinstance(exception, TransientAPIError):
+        return exception.status_code in NOT_PROCESSED_STATUS_CODES
+    if isinstance(exception, ConnectTimeout):
+        return True
+    if isinstance(exception, RequestsConnectionError) and exception.args:
+        # requests embrulha o erro do urllib3 (MaxRetryError.reason)
+        return isinstance(getattr(exception.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Converte o valor do cabeçalho Retry-After em segundos
+
+    Args:
+        value: Valor do cabeçalho (segundos ou data HTTP)
+
+    Returns:
+        Segundos de espera ou None se ausente/inválido
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryBudget:
+    """
+    Orçamento global de retries (token bucket)
+
+    Cada retry consome 1 token; cada chamada bem sucedida devolve
+    ``token_ratio`` tokens, até o máximo de ``max_tokens``. Com a API fora do
+    ar o orçamento se esgota e as chamadas passam a falhar na primeira
+    tentativa, em vez de multiplicar a carga por ``max_attempts``.
+    """
+
+    def __init__(self, max_tokens: float = 20.0, token_ratio: float = 0.1):
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        """Tokens disponíveis"""
+        return self._tokens
+
+    def withdraw(self) -> bool:
+        """Tenta consumir um token; retorna False se o orçamento acabou"""
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def deposit(self) -> None:
+        """Devolve uma fração de token após uma chamada bem sucedida"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.token_ratio)
+
+    def reset(self) -> None:
+        """Restaura o orçamento completo"""
+        with self._lock:
+            self._tokens = self.max_tokens
+
+
+# Orçamento compartilhado por todas as políticas que não definem o próprio
+DEFAULT_RETRY_BUDGET = RetryBudget()
+
+
+class RetryPolicy:
+    """Define quando e quanto esperar entre tentativas"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        backoff: float = 2.0,
+        max_delay: float = 30.0,
+        jitter: bool = True,
+        retry_on: Tuple[Type[Exception], ...] = (RequestException, TransientAPIError),
+        respect_retry_after: bool = True,
+        max_retry_after: float = 60.0,
+        budget: Optional[RetryBudget] = DEFAULT_RETRY_BUDGET,
+        idempotent: bool = True
+    ):
+        """
+        Args:
+            max_attempts: Número máximo de tentativas (incluindo a primeira)
+            base_delay: Teto de espera da primeira repetição
+            backoff: Fator multiplicador do teto a cada tentativa
+            max_delay: Teto máximo de espera entre tentativas
+            jitter: Usa espera aleatória entre 0 e o teto (full jitter)
+            retry_on: Exceções que podem ser repetidas
+            respect_retry_after: Usa o Retry-After informado pela API, quando houver
+            max_retry_after: Limite para o Retry-After aceito
+            budget: Orçamento de retries (None desativa o controle)
+            idempotent: False para chamadas que não podem ser executadas duas
+                vezes; só repete falhas em que a requisição não foi processada
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.budget = budget
+        self.idempotent = idempotent
+
+    def is_retryable(self, exception: BaseException) -> bool:
+        """Verifica se a exceção pode ser repetida"""
+        if not isinstance(exception, self.retry_on):
+            return False
+        if not self.idempotent:
+            return is_safe_to_resend(exception)
+        if isinstance(exception, TransientAPIError) and exception.status_code is not None:
+            return exception.status_code in RETRYABLE_STATUS_CODES
+        return True
+
+    def compute_delay(self, attempt: int, exception: Optional[BaseException] = None) -> float:
+        """
+        Calcula a espera antes da próxima tentativa
+
+        Args:
+            attempt: Índice da tentativa que falhou (0 para a primeira)
+            exception: Exceção da tentativa que falhou
+
+        Returns:
+            Segundos de espera
+        """
+        retry_after = getattr(exception, "retry_after", None)
+        if self.respect_retry_after and retry_after is not None:
+            return min(float(retry_after), self.max_retry_after)
+
+        ceiling = min(self.max_delay, self.base_delay * (self.backoff ** attempt))
+        if self.jitter:
+            return random.uniform(0, ceiling)
+        return ceiling
+
+    def acquire_retry(self) -> bool:
+        """Consome o orçamento para uma nova tentativa"""
+        return self.budget is None or self.budget.withdraw()
+
+    def record_success(self) -> None:
+        """Registra uma chamada bem sucedida no orçamento"""
+        if self.budget is not None:
+            self.budget.deposit()
@@ -0,0 +1,195 @@
+"""
+Instrumentação opcional das chamadas de API.
+
+Os decorators ``retry`` e ``log_api_call`` publicam um ``CallTrace`` por
+chamada no sink configurado via ``set_trace_sink``. Sem sink configurado
+nenhuma medição é feita.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .logger import APILogger
+
+logger = APILogger("tracing")
+
+
+class CallTrace:
+    """Registro de uma chamada instrumentada"""
+
+    __slots__ = (
+        "name",
+        "kind",
+        "started_at",
+        "wall_time",
+        "attempts",
+        "backoff_time",
+        "exception_class",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        started_at: float,
+        wall_time: float,
+        attempts: int = 1,
+        backoff_time: float = 0.0,
+        exception_class: Optional[str] = None
+    ):
+        """
+        Args:
+            name: Nome da função instrumentada
+            kind: Origem do registro ("call" para log_api_call, "retry" para retry)
+            started_at: Timestamp (time.time) do início da chamada
+            wall_time: Duração total em segundos
+            attempts: Número de tentativas executadas
+            backoff_time: Tempo total gasto esperando entre tentativas
+            exception_class: Nome da classe da exceção final, se houver
+        """
+        self.name = name
+        self.kind = kind
+        self.started_at = started_at
+        self.wall_time = wall_time
+        self.attempts = attempts
+        self.backoff_time = backoff_time
+        self.exception_class = exception_class
+
+    @property
+    def failed(self) -> bool:
+        """Indica se a chamada terminou com exceção"""
+        return self.exception_class is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte o registro para dicionário"""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return (
+            f"<CallTrace(name='{self.name}', kind='{self.kind}', "
+            f"wall_time={self.wall_time:.4f}, attempts={self.attempts}, "
+            f"backoff_time={self.backoff_time:.4f}, exception='{self.exception_class}')>"
+        )
+
+
+class TraceSink(ABC):
+    """Interface base para destinos de registros de chamadas"""
+
+    @abstractmethod
+    def record(self, trace: CallTrace) -> None:
+        """Recebe o registro de uma chamada"""
+
+
+class LoggingTraceSink(TraceSink):
+    """Envia cada registro para o APILogger"""
+
+    def __init__(self, logger_name: str = "api_tracing"):
+        self.logger = APILogger(logger_name)
+
+    def record(self, trace: CallTrace) -> None:
+        self.logger.debug(
+            f"[trace] {trace.kind} {trace.name}: {trace.wall_time * 1000:.1f} ms, "
+            f"tentativas={trace.attempts}, backoff={trace.backoff_time * 1000:.1f} ms, "
+            f"erro={trace.exception_class or '-'}"
+        )
+
+
+class InMemoryTraceSink(TraceSink):
+    """
+    Acumula estatísticas por função em memória
+
+    Mantém também os últimos ``max_records`` registros para inspeção.
+    """
+
+    def __init__(self, max_records: int = 1000):
+        self.max_records = max_records
+        self._records: Deque[CallTrace] = deque(maxlen=max_records)
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, trace: CallTrace) -> None:
+        key = f"{trace.kind}:{trace.name}"
+        with self._lock:
+            self._records.append(trace)
+
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    "calls": 0,
+                    "errors": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "attempts": 0,
+                    "backoff_time": 0.0,
+                    "exceptions": {},
+                }
+            stats["calls"] += 1
+            stats["total_time"] += trace.wall_time
+            stats["max_time"] = max(stats["max_time"], trace.wall_time)
+            stats["attempts"] += trace.attempts
+            stats["backoff_time"] += trace.backoff_time
+            if trace.exception_class:
+                stats["errors"] += 1
+                exceptions = stats["exceptions"]
+                exceptions[trace.exception_class] = exceptions.get(trace.exception_class, 0) + 1
+
+    @property
+    def records(self) -> List[CallTrace]:
+        """Últimos registros recebidos"""
+        with self._lock:
+            return list(self._records)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna as estatísticas agregadas por "tipo:função"
+
+        Returns:
+            Dicionário com chamadas, erros, tempo médio/máximo, tentativas
+            e tempo de backoff acumulados
+        """
+        with self._lock:
+            result = {}
+            for key, stats in self._stats.items():
+                item = dict(stats)
+                item["exceptions"] = dict(stats["exceptions"])
+                item["avg_time"] = stats["total_time"] / stats["calls"] if stats["calls"] else 0.0
+                result[key] = item
+            return result
+
+    def reset(self) -> None:
+        """Descarta registros e estatísticas"""
+        with self._lock:
+            self._records.clear()
+            self._stats.clear()
+
+
+_sink: Optional[TraceSink] = None
+
+
+def set_trace_sink(sink: Optional[TraceSink]) -> None:
+    """
+    Define o destino dos registros de chamadas
+
+    Args:
+        sink: Instância de TraceSink, ou None para desativar a instrumentação
+    """
+    global _sink
+    _sink = sink
+
+
+def get_trace_sink() -> Optional[TraceSink]:
+    """Retorna o sink configurado (None se a instrumentação estiver desativada)"""
+    return _sink
+
+
+def emit(trace: CallTrace) -> None:
+    """Publica um registro no sink atual; erros do sink são registrados, sem propagar"""
+    sink = _sink
+    if sink is None:
+        return
+    try:
+        sink.record(trace)
+    except Exception as e:
+        logger.error(f"Erro no sink de tracing {type(sink).__name__}: {str(e)}")
@@ -0,0 +1,61 @@
+"""
+Cache em memória com expiração (TTL) e tamanho limitado.
+
+Usado para respostas de APIs externas que mudam pouco (ex.: telefone de um
+contato do Clint): cada entrada vale por ``ttl`` segundos e, ao passar de
+``max_size`` entradas, as gravadas há mais tempo são descartadas primeiro.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Mapeamento chave -> valor cujas entradas expiram após ``ttl`` segundos"""
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        """
+        Args:
+            ttl: Segundos em que uma entrada é considerada válida
+            max_size: Máximo de entradas mantidas
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        # chave -> (valor, instante de expiração), na ordem de gravação
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor da chave, ou ``default`` se ausente ou expirado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Grava o valor da chave (``ttl`` opcional substitui o padrão)"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Descarta a entrada da chave"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,120 @@
+"""
+Base para gravações em lote em segundo plano (write-behind).
+
+As mudanças ficam num buffer em memória indexado por chave; uma thread
+grava o buffer periodicamente (ou antes, ao acumular ``batch_size``
+mudanças) e quem registra nunca espera pelo banco. Mudanças para a mesma
+chave são combinadas por ``merge`` antes da gravação. Lotes que falham voltam
+ao buffer sem sobrescrever mudanças mais novas.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Optional
+
+from .logger import APILogger
+
+
+class WriteBehindBuffer(ABC):
+    """Buffer de mudanças gravado em lote por uma thread (ver ``write``)"""
+
+    def __init__(self, name: str, flush_interval: float, batch_size: int):
+        """
+        Args:
+            name: Nome da thread e do logger
+            flush_interval: Segundos entre gravações
+            batch_size: Mudanças acumuladas que antecipam a gravação
+        """
+        self.name = name
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.logger = APILogger(name)
+        self._pending: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Pontos de extensão
+
+    def merge(self, current: Any, new: Any) -> Any:
+        """Combina duas mudanças da mesma chave (padrão: vale a mais recente)"""
+        return new
+
+    @abstractmethod
+    def write(self, batch: Dict[Hashable, Any]) -> None:
+        """Grava um lote de mudanças; exceções devolvem o lote ao buffer"""
+
+    def release(self) -> None:
+        """Libera recursos (ex.: sessão do banco) ao encerrar"""
+
+    # Buffer
+
+    def start(self) -> "WriteBehindBuffer":
+        """Inicia a thread de gravação (idempotente)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def put(self, key: Hashable, change: Any) -> None:
+        """Registra uma mudança (gravada depois, em lote)"""
+        with self._lock:
+            current = self._pending.get(key)
+            self._pending[key] = change if current is None else self.merge(current, change)
+            pending = len(self._pending)
+
+        if self._thread is None:
+            self.start()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        """Mudanças ainda não gravadas"""
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Grava imediatamente as mudanças pendentes
+
+        Returns:
+            Quantidade de mudanças gravadas
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            try:
+                self.write(batch)
+            except Exception as e:
+                # Devolve o lote ao buffer; mudanças mais novas são combinadas por cima
+                with self._lock:
+                    for key, change in batch.items():
+                        newer = self._pending.get(key)
+                        self._pending[key] = change if newer is None else self.merge(change, newer)
+                self.logger.error(f"Erro ao gravar lote de {len(batch)} mudança(s): {str(e)}")
+                return 0
+
+        self.logger.debug(f"Lote de {len(batch)} mudança(s) gravado")
+        return len(batch)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Para a thread e grava o que estiver pendente"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=max(1.0, self.flush_interval * 2))
+        self.flush()
+        self.release()
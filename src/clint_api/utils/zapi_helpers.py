@@ -10,13 +10,14 @@ import json
 import subprocess
 import requests
 from typing import Dict, Any, Optional, List, Tuple
-import base64
 import os
 from pathlib import Path
 
 from ..clients.zapi_client import ZAPIClient
 from ..utils.logger import APILogger
 from ..utils.config import Config
+from ..utils.deadline import request_timeout
+from ..utils.media_cache import get_media_cache
 
 logger = APILogger("zapi_helpers")
 
@@ -78,7 +79,7 @@ def restart_connection(instance_id: str, token: str, security_token: str) -> boo
         }
         
         # Faz a requisição
-        response = requests.post(url, headers=headers)
+        response = requests.post(url, headers=headers, timeout=request_timeout())
         
         if response.status_code in [200, 201]:
             logger.info("\n✅ Comando de reinicialização enviado com sucesso!")
@@ -87,7 +88,7 @@ def restart_connection(instance_id: str, token: str, security_token: str) -> boo
             
             # Verifica o status após o restart
             status_url = f"https://api.z-api.io/instances/{instance_id}/token/{token}/connection"
-            status_response = requests.get(status_url, headers=headers)
+            status_response = requests.get(status_url, headers=headers, timeout=request_timeout())
             
             if status_response.status_code == 200:
                 status_data = status_response.json()
@@ -104,19 +105,29 @@ def restart_connection(instance_id: str, token: str, security_token: str) -> boo
         logger.error(f"\n❌ Erro: {str(e)}")
         return False
 
-def encode_media_to_base64(file_path: str) -> Optional[str]:
+def encode_media_to_base64(file_path: str, data_uri: bool = False) -> Optional[str]:
     """
     Codifica um arquivo de mídia para base64
 
+    O base64 fica no cache de mídia (ver ``MediaCache``): o mesmo conteúdo
+    é codificado uma única vez, em blocos. Para enviar arquivos grandes
+    prefira ``ZAPIClient.send_media_file``, que nem chega a montar a string.
+
     Args:
         file_path: Caminho do arquivo
+        data_uri: Prefixa o resultado com "data:<mime>;base64,"
 
     Returns:
         String base64 ou None se falhar
     """
     try:
-        with open(file_path, "rb") as file:
-            return base64.b64encode(file.read()).decode('utf-8')
+        cache = get_media_cache()
+        digest, encoded_path = cache.encoded_path(file_path)
+        with open(encoded_path, "r", encoding="ascii") as file:
+            encoded = file.read()
+        if data_uri:
+            return f"data:{cache.mime_type(digest)};base64,{encoded}"
+        return encoded
     except Exception as e:
         logger.error(f"❌ Erro ao converter arquivo para base64: {str(e)}")
         return None
@@ -199,7 +210,7 @@ def get_current_webhooks(instance_id: str, token: str, security_token: str) -> D
         }
         
         # Faz a requisição
-        response = requests.get(url, headers=headers)
+        response = requests.get(url, headers=headers, timeout=request_timeout())
         
         if response.status_code == 200:
             data = response.json()
@@ -261,7 +272,7 @@ def configure_webhooks(
             
             # Faz a requisição
             logger.info(f"\nConfigurando webhook {webhook_type}...")
-            response = requests.post(url, headers=headers, json=payload)
+            response = requests.post(url, headers=headers, json=payload, timeout=request_timeout())
             
             if response.status_code in [200, 201]:
                 logger.info(f"✅ Webhook {webhook_type} configurado com sucesso!")
@@ -1,7 +1,27 @@
+import json
 import logging
-from fastapi import FastAPI, Request, HTTPException
+import os
+import re
+from fastapi import FastAPI, Request, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from typing import Iterator, Optional, Tuple
+
+from ..exceptions.api_exceptions import WebhookPayloadError
+from ..models.webhook_events import (
+    MESSAGE_STATUS_CALLBACK,
+    PRESENCE_CHAT_CALLBACK,
+    ConnectionEvent,
+    MessageStatusEvent,
+    PresenceEvent,
+    WebhookEvent,
+    decode_connection_event,
+    decode_webhook,
+)
+from ..services.contact_cache import get_contact_cache
+from ..services.message_status_applier import get_message_status_applier
+from ..services.webhook_service import WebhookService
+from ..utils.media_cache import get_media_cache
 
 logger = logging.getLogger(__name__)
 
@@ -19,71 +39,84 @@ app.add_middleware(
 class WebhookHandler:
     def __init__(self, security_token: str):
         self.security_token = security_token
+        self.status_applier = get_message_status_applier()
+        self.webhook_service = WebhookService()
     
     def validate_security_token(self, token: str) -> bool:
         """Validate the security token from the request"""
         return token == self.security_token
     
-    def handle_message_status(self, data: Dict[str, Any]) -> None:
+    def handle_message_status(self, event: MessageStatusEvent) -> None:
         """Handle message status updates"""
         try:
-            message_id = data.get('messageId')
-            status = data.get('status')
-            phone = data.get('phone')
+            logger.info(
+                f"Message status update - IDs: {', '.join(event.message_ids)}, "
+                f"Status: {event.status}, Phone: {event.phone}"
+            )
             
-            logger.info(f"Message status update - ID: {message_id}, Status: {status}, Phone: {phone}")
-            # Add your custom logic here
+            # Update the message history in batches (collapsed per message ID)
+            for message_id in event.message_ids:
+                self.status_applier.record(message_id, event.status)
             
         except Exception as e:
             logger.error(f"Error handling message status: {str(e)}")
     
-    def handle_chat_presence(self, data: Dict[str, Any]) -> None:
+    def handle_chat_presence(self, event: PresenceEvent) -> None:
         """Handle chat presence updates"""
         try:
-            phone = data.get('phone')
-            presence = data.get('presence', {})
-            last_seen = presence.get('lastSeen')
-            is_online = presence.get('isOnline')
-            
-            logger.info(f"Chat presence update - Phone: {phone}, Online: {is_online}, Last seen: {last_seen}")
+            # Resolved from the in-memory contact cache (no query per presence event)
+            contact = get_contact_cache().get_by_phone(event.phone)
+            logger.info(
+                f"Chat presence update - Phone: {event.phone}, "
+                f"Contact: {contact.nome if contact else 'unknown'}, Online: {event.is_online}, "
+                f"Last seen: {event.last_seen}"
+            )
             # Add your custom logic here
             
         except Exception as e:
             logger.error(f"Error handling chat presence: {str(e)}")
     
-    def handle_connection_status(self, data: Dict[str, Any]) -> None:
+    def handle_connection_status(self, event: ConnectionEvent) -> None:
         """Handle WhatsApp connection status updates"""
-        try:
-            connected = data.get('connected')
-            status = data.get('status')
-            
-            logger.info(f"Connection status update - Connected: {connected}, Status: {status}")
-            # Add your custom logic here
-            
-        except Exception as e:
-            logger.error(f"Error handling connection status: {str(e)}")
+        logger.info(f"Connection status update - Connected: {event.connected}, Error: {event.error}")
+        
+        # Update cached connection state and pause/resume senders via the circuit breaker
+        # (events without instanceId apply to the configured instance)
+        self.webhook_service.process_connection_status(event)
+
+@app.on_event("startup")
+def warm_up_contact_cache() -> None:
+    """Load recently active contacts into memory before the first webhooks arrive"""
+    try:
+        get_contact_cache().warm_up()
+    except Exception as e:
+        logger.error(f"Error warming up contact cache: {str(e)}")
 
 # Initialize webhook handler with your security token
 webhook_handler = WebhookHandler("your_security_token_here")
 
-@app.post("/webhooks/zapi/message-status")
-async def message_status(request: Request, x_api_token: str = Header(None)):
-    """Endpoint for message status updates"""
+async def decode_request(request: Request, x_api_token: Optional[str], default_type: str) -> WebhookEvent:
+    """Validate the token and decode the request body into a typed webhook event"""
     if not webhook_handler.validate_security_token(x_api_token):
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    data = await request.json()
-    webhook_handler.handle_message_status(data)
+    try:
+        return decode_webhook(await request.body(), default_type=default_type)
+    except WebhookPayloadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/webhooks/zapi/message-status")
+async def message_status(request: Request, x_api_token: str = Header(None)):
+    """Endpoint for message status updates"""
+    event = await decode_request(request, x_api_token, MESSAGE_STATUS_CALLBACK)
+    webhook_handler.handle_message_status(event)
     return {"status": "success"}
 
 @app.post("/webhooks/zapi/chat-presence")
 async def chat_presence(request: Request, x_api_token: str = Header(None)):
     """Endpoint for chat presence updates"""
-    if not webhook_handler.validate_security_token(x_api_token):
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    data = await request.json()
-    webhook_handler.handle_chat_presence(data)
+    event = await decode_request(request, x_api_token, PRESENCE_CHAT_CALLBACK)
+    webhook_handler.handle_chat_presence(event)
     return {"status": "success"}
 
 @app.post("/webhooks/zapi/connection-status")
@@ -92,6 +125,130 @@ async def connection_status(request: Request, x_api_token: str = Header(None)):
     if not webhook_handler.validate_security_token(x_api_token):
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    data = await request.json()
-    webhook_handler.handle_connection_status(data)
-    return {"status": "success"}
\ No newline at end of file
+    # The same route receives both callbacks; "type" (or "connected") tells them apart
+    try:
+        data = json.loads(await request.body())
+        if not isinstance(data, dict):
+            raise WebhookPayloadError("Webhook payload must be a JSON object")
+        event = decode_connection_event(data)
+    except (ValueError, WebhookPayloadError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    webhook_handler.handle_connection_status(event)
+    return {"status": "success"}
+
+
+# Static media published by ZAPIClient.publish_media (content-addressed, immutable)
+MEDIA_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+MEDIA_CHUNK_SIZE = 64 * 1024
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# A single byte-range-spec: "first-last", "first-" or "-suffix_length"
+BYTE_RANGE_PATTERN = re.compile(r"^(\d*)-(\d*)$")
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "Range: bytes=start-end" header
+
+    Invalid or unsupported headers (other units, multiple ranges, malformed
+    or reversed ranges) are ignored, as RFC 7233 requires, so the whole file
+    is sent.
+
+    Returns:
+        Inclusive (start, end) tuple, None to send the whole file
+
+    Raises:
+        ValueError: If the range is valid but cannot be satisfied
+    """
+    if not range_header:
+        return None
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        # Multipart ranges are not supported; answer with the full file
+        return None
+
+    match = BYTE_RANGE_PATTERN.match(ranges.strip())
+    if match is None:
+        return None
+    start_text, end_text = match.groups()
+
+    if not start_text:
+        if not end_text:
+            return None
+        # Suffix range: last N bytes
+        length = int(end_text)
+        if length == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if end_text and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield the inclusive byte range [start, end] of a file in chunks"""
+    remaining = end - start + 1
+    with open(path, "rb") as file:
+        file.seek(start)
+        while remaining > 0:
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+@app.api_route("/media/{name}", methods=["GET", "HEAD"])
+async def media_file(name: str, request: Request):
+    """Serve a published media file with ETag, cache headers and range requests"""
+    digest = name.split(".", 1)[0]
+    if not MEDIA_DIGEST_PATTERN.match(digest):
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    media_cache = get_media_cache()
+    path = media_cache.media_path(digest)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    size = os.path.getsize(path)
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": MEDIA_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    media_type = media_cache.mime_type(digest)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range_header(request.headers.get("range"), size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(max(0, end - start + 1))
+
+    if request.method == "HEAD" or size == 0:
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    return StreamingResponse(
+        iter_file_range(path, start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
@@ -0,0 +1,112 @@
+"""
+Benchmark da busca textual no histórico de mensagens
+
+Gera um histórico sintético (padrão: dois milhões de mensagens) num banco
+SQLite temporário, com o índice FTS5 mantido pelos gatilhos, e compara
+MessageHistoryService.search_messages com a busca LIKE sobre
+MessageHistory.message.
+
+Uso:
+    python src/examples/benchmarks/message_search.py --count 2000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from clint_api.models.message_history import Base, MessageDirection, MessageHistory, create_message_search_index
+from clint_api.services.message_history_service import MessageHistoryService
+
+WORDS = (
+    "olá bom dia tudo bem obrigado pedido entrega boleto pagamento consulta "
+    "agendamento horário amanhã semana valor desconto promoção cancelar "
+    "confirmar endereço produto dúvida atendimento retorno mensagem áudio "
+    "documento contrato prazo reembolso nota fiscal cartão pix transferência"
+).split()
+
+# Frequência tipo Zipf: as primeiras palavras são comuns, as últimas raras
+WEIGHTS = [1 / (rank + 1) ** 1.3 for rank in range(len(WORDS))]
+
+QUERIES = ("obrigado", "boleto pix", "transferencia", "nota fiscal", "agend*", "pedido 4242")
+
+
+def message_text(rng: random.Random) -> str:
+    """Texto com palavras de frequência variada e, às vezes, um número de pedido"""
+    words = rng.choices(WORDS, WEIGHTS, k=rng.randint(4, 16))
+    if rng.random() < 0.2:
+        words += ["pedido", str(rng.randrange(100_000))]
+    return " ".join(words)
+
+
+def populate(session, count: int, phones: int, batch_size: int = 50_000) -> float:
+    """Insere ``count`` mensagens (com indexação pelos gatilhos) e retorna os segundos gastos"""
+    rng = random.Random(42)
+    start_time = datetime(2023, 1, 1)
+    start = time.perf_counter()
+    for offset in range(0, count, batch_size):
+        rows = [
+            {
+                "phone": f"5521{9_0000_0000 + rng.randrange(phones)}",
+                "direction": MessageDirection.SENT if i % 2 else MessageDirection.RECEIVED,
+                "message": message_text(rng),
+                "message_type": "text",
+                "status": "sent",
+                "timestamp": start_time + timedelta(seconds=i * 7),
+            }
+            for i in range(offset, min(offset + batch_size, count))
+        ]
+        session.bulk_insert_mappings(MessageHistory, rows)
+        session.commit()
+    return time.perf_counter() - start
+
+
+def timed(function, repeat: int = 5):
+    """Retorna (resultado, melhor tempo em ms)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=2_000_000, help="Mensagens no histórico")
+    parser.add_argument("--phones", type=int, default=50_000, help="Números distintos")
+    parser.add_argument("--limit", type=int, default=20, help="Resultados por busca")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'message_history.db')}")
+        Base.metadata.create_all(engine)
+        if not create_message_search_index(engine):
+            print("SQLite sem suporte a FTS5")
+            return
+
+        service = MessageHistoryService(session=sessionmaker(bind=engine)())
+
+        elapsed = populate(service.session, args.count, args.phones)
+        print(f"Mensagens no histórico: {args.count:,} (inseridas e indexadas em {elapsed:.1f}s, "
+              f"{args.count / elapsed:,.0f}/s)")
+
+        sample_phone = service.session.query(MessageHistory.phone).first()[0]
+        for terms in QUERIES:
+            results, fts_ms = timed(lambda: service.search_messages(terms, limit=args.limit))
+            _, phone_ms = timed(lambda: service.search_messages(terms, phone=sample_phone, limit=args.limit))
+            _, like_ms = timed(lambda: service._search_messages_like(terms, None, args.limit), repeat=1)
+            print(f"{terms!r:>28}: FTS5 {fts_ms:8.1f} ms | FTS5 por número {phone_ms:6.1f} ms | "
+                  f"LIKE {like_ms:8.1f} ms")
+            if results:
+                print(f"{'':>30}melhor: {results[0].snippet}")
+
+
+if __name__ == "__main__":
+    main()
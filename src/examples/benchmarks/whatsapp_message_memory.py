@@ -0,0 +1,76 @@
+"""
+Benchmark de memória de WhatsAppMessage
+
+Mede, com tracemalloc, a memória de N mensagens na fila (padrão: um milhão)
+com a classe atual (__slots__) e com uma cópia equivalente baseada em
+__dict__, além do tempo de to_request_body / to_dict.
+
+Uso:
+    python src/examples/benchmarks/whatsapp_message_memory.py --count 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from clint_api.models.whatsapp_message import MessageType, WhatsAppMessage
+
+
+class DictWhatsAppMessage:
+    """Mensagem com __dict__ por instância (representação anterior)"""
+
+    def __init__(self, phone, message, message_type=MessageType.TEXT, media_url=None, caption=None,
+                 instance_id=None, token=None, delay_message=None, delay_typing=None):
+        self.phone = phone
+        self.message = message
+        self.message_type = message_type
+        self.media_url = media_url
+        self.caption = caption
+        self.instance_id = instance_id
+        self.token = token
+        self.delay_message = delay_message
+        self.delay_typing = delay_typing
+        self.message_id = None
+        self.status = "pending"
+
+
+def measure(factory, count: int, phones, text: str):
+    """Retorna (bytes alocados, segundos) para criar ``count`` mensagens"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    queue = [factory(phone=phones[i], message=text, delay_message=2, delay_typing=3) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del queue
+    return current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=1_000_000, help="Mensagens na fila")
+    args = parser.parse_args()
+
+    # Telefones e texto criados antes da medição: só a memória das mensagens é contada
+    phones = [f"5521{900000000 + i}" for i in range(args.count)]
+    text = "Olá! Temos uma novidade para você."
+
+    print(f"Mensagens na fila: {args.count:,}")
+    for name, factory in (("__dict__", DictWhatsAppMessage), ("__slots__", WhatsAppMessage)):
+        size, elapsed = measure(factory, args.count, phones, text)
+        print(f"{name:>10}: {size / 1024 / 1024:8.1f} MB "
+              f"({size / args.count:5.0f} bytes/mensagem), criação em {elapsed:.2f}s")
+
+    sample = [WhatsAppMessage(phone=phone, message=text) for phone in phones[:100_000]]
+    for method in ("to_request_body", "to_dict"):
+        start = time.perf_counter()
+        for message in sample:
+            getattr(message, method)()
+        elapsed = time.perf_counter() - start
+        print(f"{method:>16}: {elapsed / len(sample) * 1e6:.2f} µs/mensagem")
+
+
+if __name__ == "__main__":
+    main()
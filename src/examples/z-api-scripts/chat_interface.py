@@ -6,21 +6,27 @@ import sys
 from datetime import datetime
 from threading import Thread, Event
 from queue import Queue
+from typing import Optional
 import requests
 from clint_api.utils.logger import APILogger
 from clint_api.clients.zapi_client import ZAPIClient
 from clint_api.models.whatsapp_message import WhatsAppMessage, MessageType
-from clint_api.services.message_history_service import MessageHistoryService
+from clint_api.services.message_history_service import HistoryCursor, MessageHistoryService
 from clint_api.models.message_history import MessageDirection
+from clint_api.models.webhook_events import MESSAGE_STATUS_CALLBACK, decode_webhook, extract_received_message
+from clint_api.services.message_status_applier import get_message_status_applier
 
 # Configurações
 INSTANCE_ID = "3DCC625CC314A038C87896155CBF9532"
 TOKEN = "378F94E0EAC7F1CDFFB85BC4"
 SECURITY_TOKEN = "F0a93697fc543427aae97a54d8f03ed99S"
+HISTORY_PAGE_SIZE = 50  # Mensagens carregadas por vez no histórico
+INBOX_SIZE = 50  # Conversas exibidas na caixa de entrada
 
 # Inicializa serviços
 logger = APILogger("chat_interface")
 history_service = MessageHistoryService()
+status_applier = get_message_status_applier()
 
 # Controles globais
 event_queue = Queue()
@@ -58,18 +64,18 @@ def format_chat_message(history_item) -> tuple:
         content = f"{status_emoji} Contato ({timestamp}): {history_item.message}"
         return (None, content)
 
-def load_chat_history(phone: str) -> list:
-    """Carrega o histórico de mensagens enviadas de um número"""
+def load_chat_history_page(phone: str, before: Optional[HistoryCursor] = None) -> tuple[list, Optional[HistoryCursor]]:
+    """Carrega uma página do histórico de mensagens enviadas de um número"""
     if not phone:
-        return []
+        return [], None
         
     try:
-        # Obtém histórico ordenado por data (mais antigas primeiro)
-        history = history_service.get_chat_history(phone)
+        # Obtém uma página do histórico (mais novas primeiro), a partir do cursor
+        page = history_service.get_chat_history_page(phone, before=before, page_size=HISTORY_PAGE_SIZE)
         messages = []
         
         # Formata apenas mensagens enviadas para exibição
-        for item in history:
+        for item in page.messages:
             if item.direction == MessageDirection.SENT:
                 timestamp = item.timestamp.strftime("%H:%M:%S")
                 status_emoji = "✅" if item.status == "sent" else "⏳"
@@ -78,21 +84,74 @@ def load_chat_history(phone: str) -> list:
             
         logger.info(f"Histórico carregado: {len(messages)} mensagens enviadas")
         
-        return messages
+        return messages, page.next_cursor
     except Exception as e:
         logger.error(f"Erro ao carregar histórico: {str(e)}")
+        return [], None
+
+def load_chat_history(phone: str) -> list:
+    """Carrega as mensagens enviadas mais recentes de um número"""
+    return load_chat_history_page(phone)[0]
+
+def open_conversation(phone: str) -> tuple[list, Optional[HistoryCursor]]:
+    """Carrega o histórico de um número e marca a conversa como lida"""
+    if phone:
+        history_service.mark_conversation_read(phone)
+    return load_chat_history_page(phone)
+
+def load_inbox() -> list:
+    """Carrega as conversas mais recentes (tabela de resumos, sem percorrer o histórico)"""
+    try:
+        page = history_service.list_conversations(page_size=INBOX_SIZE)
+        return [
+            [
+                conversation.phone,
+                conversation.last_message_at.strftime("%d/%m %H:%M:%S"),
+                conversation.last_message,
+                conversation.unread_count
+            ]
+            for conversation in page.conversations
+        ]
+    except Exception as e:
+        logger.error(f"Erro ao carregar conversas: {str(e)}")
         return []
 
-def send_message(phone: str, message: str, chat_history: list) -> tuple[str, list, str]:
+def search_history(terms: str, only_current: bool, phone: str) -> list:
+    """Busca mensagens por palavras-chave no histórico (mais relevantes primeiro)"""
+    if not terms:
+        return []
+    try:
+        results = history_service.search_messages(terms, phone=phone if only_current and phone else None)
+        return [
+            [result.phone, result.timestamp.strftime("%d/%m %H:%M:%S"), result.snippet]
+            for result in results
+        ]
+    except Exception as e:
+        logger.error(f"Erro ao buscar mensagens: {str(e)}")
+        return []
+
+def load_older_messages(phone: str, chat_history: list, cursor: Optional[HistoryCursor]) -> tuple[list, Optional[HistoryCursor]]:
+    """Acrescenta a página seguinte (mensagens mais antigas) ao histórico exibido"""
+    if cursor is None:
+        return chat_history, None
+    older, next_cursor = load_chat_history_page(phone, before=cursor)
+    return (chat_history or []) + older, next_cursor
+
+def send_message(
+    phone: str,
+    message: str,
+    chat_history: list,
+    cursor: Optional[HistoryCursor]
+) -> tuple[str, list, str, Optional[HistoryCursor]]:
     """Envia uma mensagem via Z-API"""
     try:
         if not phone or not message:
-            return "❌ Por favor, preencha o número e a mensagem", chat_history, message
+            return "❌ Por favor, preencha o número e a mensagem", chat_history, message, cursor
         
         client = ZAPIClient(INSTANCE_ID, TOKEN, SECURITY_TOKEN)
         
         if not client.is_connected():
-            return "❌ WhatsApp não está conectado! Verifique a conexão.", chat_history, message
+            return "❌ WhatsApp não está conectado! Verifique a conexão.", chat_history, message, cursor
         
         whatsapp_message = WhatsAppMessage(
             phone=phone,
@@ -108,19 +167,19 @@ def send_message(phone: str, message: str, chat_history: list) -> tuple[str, lis
             # Registra a mensagem no histórico
             history_service.add_sent_message(result)
             
-            # Atualiza o histórico
-            new_history = load_chat_history(phone)
+            # Volta o histórico para a primeira página (o cursor acompanha a lista exibida)
+            new_history, new_cursor = load_chat_history_page(phone)
             
             # Retorna status, histórico atualizado e limpa o campo de mensagem
             status = f"✅ Mensagem enviada com sucesso!\nID: {result.message_id}\nStatus: {result.status}"
-            return status, new_history, ""
+            return status, new_history, "", new_cursor
         else:
-            return "❌ Erro ao enviar mensagem", chat_history, message
+            return "❌ Erro ao enviar mensagem", chat_history, message, cursor
             
     except Exception as e:
-        return f"❌ Erro: {str(e)}", chat_history, message
+        return f"❌ Erro: {str(e)}", chat_history, message, cursor
 
-def poll_events(phone: str, sent_history: gr.Chatbot, received_history: gr.Chatbot) -> None:
+def poll_events(phone: str, sent_history: gr.Chatbot, received_history: gr.Chatbot, history_cursor: gr.State) -> None:
     """Monitora eventos do servidor local"""
     logger.info("🔄 Iniciando monitoramento de eventos...")
     last_update = datetime.now()
@@ -133,6 +192,7 @@ def poll_events(phone: str, sent_history: gr.Chatbot, received_history: gr.Chatb
                 current_time = datetime.now()
                 
                 # Processa eventos recebidos
+                status_updated = False
                 for event_type, event_list in events.items():
                     for event in event_list:
                         event_time = datetime.strptime(event["timestamp"], "%Y-%m-%d %H:%M:%S")
@@ -146,25 +206,13 @@ def poll_events(phone: str, sent_history: gr.Chatbot, received_history: gr.Chatb
                                     logger.info(f"Processando evento de mensagem recebida: {json.dumps(data, indent=2)}")
                                     
                                     # Extrai a mensagem do payload
-                                    message = ""
-                                    if "text" in data:
-                                        if isinstance(data["text"], dict):
-                                            message = data["text"].get("message", "")
-                                        else:
-                                            message = str(data["text"])
-                                    elif "image" in data:
-                                        message = f"[Imagem] {data['image'].get('caption', '')}"
-                                    elif "video" in data:
-                                        message = f"[Vídeo] {data['video'].get('caption', '')}"
-                                    elif "audio" in data:
-                                        message = "[Áudio]"
-                                    elif "document" in data:
-                                        message = f"[Documento] {data['document'].get('fileName', '')}"
+                                    received = extract_received_message(data)
+                                    message = received.summary
                                     
                                     if message:
                                         # Formata a mensagem com timestamp
-                                        timestamp = datetime.fromtimestamp(data.get("momment", time.time() * 1000) / 1000).strftime("%H:%M:%S")
-                                        formatted_msg = f"📱 {data.get('phone')} ({timestamp}): {message}"
+                                        timestamp = received.timestamp.strftime("%H:%M:%S")
+                                        formatted_msg = f"📱 {received.phone} ({timestamp}): {message}"
                                         
                                         # Atualiza o histórico de mensagens recebidas
                                         current_history = received_history.value if received_history.value else []
@@ -179,17 +227,22 @@ def poll_events(phone: str, sent_history: gr.Chatbot, received_history: gr.Chatb
                             # Atualiza status de mensagens enviadas
                             elif event_type == "message-status":
                                 try:
-                                    history_service.update_message_status(
-                                        event["data"].get("messageId"),
-                                        event["data"].get("status")
-                                    )
-                                    if phone:
-                                        # Atualiza histórico de mensagens enviadas
-                                        new_history = load_chat_history(phone)
-                                        sent_history.update(value=new_history)
+                                    status_event = decode_webhook(event["data"], default_type=MESSAGE_STATUS_CALLBACK)
+                                    for message_id in status_event.message_ids:
+                                        status_applier.record(message_id, status_event.status)
+                                    status_updated = True
                                 except Exception as e:
                                     logger.error(f"Erro ao atualizar status: {str(e)}")
                 
+                # Grava os status desta rodada em um único lote
+                if status_updated:
+                    status_applier.flush()
+                    if phone:
+                        # Atualiza histórico de mensagens enviadas (primeira página e seu cursor)
+                        new_history, new_cursor = load_chat_history_page(phone)
+                        sent_history.update(value=new_history)
+                        history_cursor.value = new_cursor
+                
                 last_update = current_time
                 
         except Exception as e:
@@ -213,19 +266,23 @@ def stop_server(status: gr.Textbox) -> str:
         logger.error(f"Erro ao parar servidor: {str(e)}")
         return f"❌ Erro ao parar servidor: {str(e)}"
 
-def clear_history(phone: str, chat_history: list) -> tuple[str, list]:
+def clear_history(
+    phone: str,
+    chat_history: list,
+    cursor: Optional[HistoryCursor]
+) -> tuple[str, list, Optional[HistoryCursor]]:
     """Limpa o histórico de mensagens"""
     try:
         if not phone:
-            return "❌ Por favor, insira um número de telefone primeiro", chat_history
+            return "❌ Por favor, insira um número de telefone primeiro", chat_history, cursor
         
         if history_service.clear_chat_history(phone):
-            return "✅ Histórico limpo com sucesso!", []
+            return "✅ Histórico limpo com sucesso!", [], None
         else:
-            return "❌ Erro ao limpar histórico", chat_history
+            return "❌ Erro ao limpar histórico", chat_history, cursor
             
     except Exception as e:
-        return f"❌ Erro: {str(e)}", chat_history
+        return f"❌ Erro: {str(e)}", chat_history, cursor
 
 def create_interface() -> gr.Blocks:
     """Cria a interface Gradio"""
@@ -264,6 +321,8 @@ def create_interface() -> gr.Blocks:
                     height=500,
                     show_label=False
                 )
+                older_btn = gr.Button("⬇️ Carregar mensagens anteriores", variant="secondary")
+                history_cursor = gr.State(None)
             
             with gr.Column():
                 gr.Markdown("### 📥 Histórico de Mensagens Recebidas")
@@ -273,17 +332,50 @@ def create_interface() -> gr.Blocks:
                     show_label=False
                 )
         
+        with gr.Row():
+            with gr.Column():
+                gr.Markdown("### 💬 Conversas")
+                inbox = gr.Dataframe(
+                    headers=["Telefone", "Última atividade", "Última mensagem", "Não lidas"],
+                    value=load_inbox,
+                    interactive=False
+                )
+                inbox_btn = gr.Button("🔄 Atualizar Conversas", variant="secondary")
+            
+            with gr.Column():
+                gr.Markdown("### 🔎 Buscar Mensagens")
+                search_terms = gr.Textbox(
+                    label="Palavras-chave",
+                    placeholder="Ex: reembolso pedido (termo* busca por prefixo)"
+                )
+                search_current = gr.Checkbox(label="Somente o número atual", value=False)
+                search_results = gr.Dataframe(
+                    headers=["Telefone", "Data", "Trecho"],
+                    interactive=False
+                )
+        
         # Callbacks
+        inbox_btn.click(
+            fn=load_inbox,
+            outputs=[inbox]
+        )
+        
+        search_terms.submit(
+            fn=search_history,
+            inputs=[search_terms, search_current, phone],
+            outputs=[search_results]
+        )
+        
         send_btn.click(
             fn=send_message,
-            inputs=[phone, message, sent_history],
-            outputs=[status, sent_history, message]
+            inputs=[phone, message, sent_history, history_cursor],
+            outputs=[status, sent_history, message, history_cursor]
         )
         
         clear_btn.click(
             fn=clear_history,
-            inputs=[phone, sent_history],
-            outputs=[status, sent_history]
+            inputs=[phone, sent_history, history_cursor],
+            outputs=[status, sent_history, history_cursor]
         )
         
         stop_btn.click(
@@ -294,16 +386,23 @@ def create_interface() -> gr.Blocks:
         
         # Atualiza o histórico quando o número muda
         phone.change(
-            fn=load_chat_history,
+            fn=open_conversation,
             inputs=[phone],
-            outputs=[sent_history]
+            outputs=[sent_history, history_cursor]
+        )
+        
+        # Carrega a página seguinte do histórico (mensagens mais antigas)
+        older_btn.click(
+            fn=load_older_messages,
+            inputs=[phone, sent_history, history_cursor],
+            outputs=[sent_history, history_cursor]
         )
         
         # Inicia o monitoramento de eventos em background
         global poll_thread
         poll_thread = Thread(
             target=poll_events,
-            args=(phone.value, sent_history, received_history),
+            args=(phone.value, sent_history, received_history, history_cursor),
             daemon=True
         )
         poll_thread.start()
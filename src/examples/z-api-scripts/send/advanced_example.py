@@ -56,6 +56,8 @@ def main():
             filter_query="Silva"  # Opcional: filtrar contatos
         )
         logger.info(f"Mensagem em massa agendada com ID: {bulk_id}")
+        # Campanha usada na deduplicação: reagendar com ela não reenvia para quem já recebeu
+        logger.info(f"Campanha: {scheduler.bulk_campaign_id(bulk_id)}")
         
         # Exemplo 4: Listar agendamentos
         schedules = scheduler.list_schedules()
@@ -1,10 +1,10 @@
 import os
-import base64
 import logging
 from typing import Optional
 from clint_api.clients.zapi_client import ZAPIClient
 from clint_api.models.whatsapp_message import WhatsAppMessage, MessageType
 from clint_api.utils.phone_formatter import PhoneFormatter
+from clint_api.utils.media_encoding import encode_file_to_base64
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,32 +41,20 @@ def send_audio_by_url():
 def encode_audio_to_base64(audio_path: str) -> Optional[str]:
     """Convert an audio file to base64 string"""
     try:
-        with open(audio_path, 'rb') as audio_file:
-            encoded_string = base64.b64encode(audio_file.read()).decode('utf-8')
-            return f"data:audio/mp3;base64,{encoded_string}"
+        return encode_file_to_base64(audio_path, data_uri=True)
     except Exception as e:
         logger.error(f"Error encoding audio: {str(e)}")
         return None
 
 def send_audio_by_base64(audio_path: str):
-    """Send an audio using Base64 method"""
+    """Send an audio using Base64 method (streamed, file is never fully loaded)"""
     client = ZAPIClient(INSTANCE_ID, TOKEN)
     
-    base64_audio = encode_audio_to_base64(audio_path)
-    if not base64_audio:
-        logger.error("❌ Failed to encode audio to base64")
-        return
-    
-    message = WhatsAppMessage(
-        phone=DEFAULT_CLIENT_NUMBER,
-        message="",
-        instance_id=INSTANCE_ID,
-        token=TOKEN,
-        message_type=MessageType.AUDIO,
-        media_url=base64_audio
+    result = client.send_media_file(
+        DEFAULT_CLIENT_NUMBER,
+        audio_path,
+        MessageType.AUDIO
     )
-    
-    result = client.send_message(message)
     if result and result.message_id:
         logger.info("✅ Audio sent successfully via Base64!")
         logger.info(f"Message ID: {result.message_id}")
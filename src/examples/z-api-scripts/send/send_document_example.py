@@ -1,10 +1,10 @@
 import os
-import base64
 import logging
 from typing import Optional
 from clint_api.clients.zapi_client import ZAPIClient
 from clint_api.models.whatsapp_message import WhatsAppMessage, MessageType
 from clint_api.utils.phone_formatter import PhoneFormatter
+from clint_api.utils.media_encoding import encode_file_to_base64
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,41 +42,21 @@ def send_document_by_url():
 def encode_document_to_base64(document_path: str) -> Optional[str]:
     """Convert a document file to base64 string"""
     try:
-        with open(document_path, 'rb') as document_file:
-            encoded_string = base64.b64encode(document_file.read()).decode('utf-8')
-            # Get file extension
-            file_extension = os.path.splitext(document_path)[1].lower()
-            mime_type = {
-                '.pdf': 'application/pdf',
-                '.doc': 'application/msword',
-                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                '.txt': 'text/plain'
-            }.get(file_extension, 'application/octet-stream')
-            return f"data:{mime_type};base64,{encoded_string}"
+        return encode_file_to_base64(document_path, data_uri=True)
     except Exception as e:
         logger.error(f"Error encoding document: {str(e)}")
         return None
 
 def send_document_by_base64(document_path: str):
-    """Send a document using Base64 method"""
+    """Send a document using Base64 method (streamed, file is never fully loaded)"""
     client = ZAPIClient(INSTANCE_ID, TOKEN)
     
-    base64_document = encode_document_to_base64(document_path)
-    if not base64_document:
-        logger.error("❌ Failed to encode document to base64")
-        return
-    
-    message = WhatsAppMessage(
-        phone=DEFAULT_CLIENT_NUMBER,
-        message="",
-        instance_id=INSTANCE_ID,
-        token=TOKEN,
-        message_type=MessageType.DOCUMENT,
-        media_url=base64_document,
+    result = client.send_media_file(
+        DEFAULT_CLIENT_NUMBER,
+        document_path,
+        MessageType.DOCUMENT,
         caption="This is a test document sent via Base64 📄"
     )
-    
-    result = client.send_message(message)
     if result and result.message_id:
         logger.info("✅ Document sent successfully via Base64!")
         logger.info(f"Message ID: {result.message_id}")
@@ -1,10 +1,10 @@
 import os
-import base64
 import logging
 from typing import Optional
 from clint_api.clients.zapi_client import ZAPIClient
 from clint_api.models.whatsapp_message import WhatsAppMessage, MessageType
 from clint_api.utils.phone_formatter import PhoneFormatter
+from clint_api.utils.media_encoding import encode_file_to_base64
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,33 +42,21 @@ def send_image_by_url():
 def encode_image_to_base64(image_path: str) -> Optional[str]:
     """Convert an image file to base64 string"""
     try:
-        with open(image_path, 'rb') as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-            return f"data:image/png;base64,{encoded_string}"
+        return encode_file_to_base64(image_path, data_uri=True)
     except Exception as e:
         logger.error(f"Error encoding image: {str(e)}")
         return None
 
 def send_image_by_base64(image_path: str):
-    """Send an image using Base64 method"""
+    """Send an image using Base64 method (streamed, file is never fully loaded)"""
     client = ZAPIClient(INSTANCE_ID, TOKEN)
     
-    base64_image = encode_image_to_base64(image_path)
-    if not base64_image:
-        logger.error("❌ Failed to encode image to base64")
-        return
-    
-    message = WhatsAppMessage(
-        phone=DEFAULT_CLIENT_NUMBER,
-        message="",
-        instance_id=INSTANCE_ID,
-        token=TOKEN,
-        message_type=MessageType.IMAGE,
-        media_url=base64_image,
+    result = client.send_media_file(
+        DEFAULT_CLIENT_NUMBER,
+        image_path,
+        MessageType.IMAGE,
         caption="This is a test image sent via Base64 📸"
     )
-    
-    result = client.send_message(message)
     if result and result.message_id:
         logger.info("✅ Image sent successfully via Base64!")
         logger.info(f"Message ID: {result.message_id}")
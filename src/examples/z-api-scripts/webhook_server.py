@@ -1,6 +1,19 @@
 from fastapi import FastAPI, Request
 from clint_api.utils.logger import APILogger
 from clint_api.services.message_history_service import MessageHistoryService
+from clint_api.services.webhook_service import WebhookService
+from clint_api.services.message_status_applier import get_message_status_applier
+from clint_api.services.contact_cache import get_contact_cache
+from clint_api.exceptions.api_exceptions import WebhookPayloadError
+from clint_api.models.webhook_events import (
+    CONNECTED_CALLBACK,
+    DISCONNECTED_CALLBACK,
+    MESSAGE_STATUS_CALLBACK,
+    RECEIVED_CALLBACK,
+    MessageStatusEvent,
+    ReceivedMessage,
+    decode_webhook,
+)
 import uvicorn
 import json
 import time
@@ -11,10 +24,20 @@ logger = APILogger("webhook_server")
 
 # Inicializa serviços
 history_service = MessageHistoryService()
+webhook_service = WebhookService()
+status_applier = get_message_status_applier()
 
 # Cria a aplicação FastAPI
 app = FastAPI(title="Z-API Webhook Server")
 
+@app.on_event("startup")
+def warm_up_contact_cache():
+    """Carrega os contatos recentes em memória antes dos primeiros webhooks"""
+    try:
+        get_contact_cache().warm_up()
+    except Exception as e:
+        logger.error(f"Erro ao carregar cache de contatos: {str(e)}")
+
 # Dicionário para armazenar eventos recebidos
 events = {
     "on-send": [],
@@ -64,6 +87,12 @@ async def webhook_on_disconnect(request: Request):
     """Webhook para desconexões"""
     data = await request.json()
     log_event("on-disconnect", data)
+    
+    # Pausa os envios imediatamente (abre o circuit breaker da instância)
+    try:
+        webhook_service.process_connection_status(decode_webhook(data, default_type=DISCONNECTED_CALLBACK))
+    except WebhookPayloadError as e:
+        logger.error(f"❌ Payload de desconexão inválido: {str(e)}")
     return {"status": "received"}
 
 @app.post("/webhooks/zapi/test")
@@ -107,68 +136,35 @@ async def webhook_on_receive(request: Request):
         
         # Registra a mensagem no histórico independente de quem enviou
         try:
-            # Extrai a mensagem do payload
-            message = ""
-            message_type = "text"
-            media_url = None
+            received = decode_webhook(data, default_type=RECEIVED_CALLBACK)
+            if not isinstance(received, ReceivedMessage):
+                return {"status": "error", "message": f"Evento inesperado: {type(received).__name__}"}
             
-            # Verifica o tipo de mensagem e extrai o conteúdo
-            if "text" in data:
-                if isinstance(data["text"], dict):
-                    message = data["text"].get("message", "")
-                else:
-                    message = str(data["text"])
-                logger.info(f"Mensagem de texto extraída: {message}")
-            elif "image" in data:
-                message = f"[Imagem] {data['image'].get('caption', '')}"
-                message_type = "image"
-                media_url = data['image'].get('imageUrl')
-                logger.info(f"Mensagem de imagem extraída: {message}, URL: {media_url}")
-            elif "video" in data:
-                message = f"[Vídeo] {data['video'].get('caption', '')}"
-                message_type = "video"
-                media_url = data['video'].get('videoUrl')
-                logger.info(f"Mensagem de vídeo extraída: {message}, URL: {media_url}")
-            elif "audio" in data:
-                message = "[Áudio]"
-                message_type = "audio"
-                media_url = data['audio'].get('audioUrl')
-                logger.info(f"Mensagem de áudio extraída: URL: {media_url}")
-            elif "document" in data:
-                message = f"[Documento] {data['document'].get('fileName', '')}"
-                message_type = "document"
-                media_url = data['document'].get('documentUrl')
-                logger.info(f"Mensagem de documento extraída: {message}, URL: {media_url}")
+            logger.info(f"Mensagem {received.message_type} extraída: {received.summary}, URL: {received.media_url}")
             
             # Verifica se conseguiu extrair a mensagem
-            if not message and not media_url:
+            if not received.message and not received.media_url:
                 logger.warning("Não foi possível extrair a mensagem do payload")
                 logger.warning(f"Payload recebido: {json.dumps(data, indent=2)}")
                 return {"status": "error", "message": "Mensagem não encontrada no payload"}
             
-            # Cria o objeto de histórico
-            history_item = {
-                "message_id": data.get("messageId"),
-                "phone": data.get("phone"),
-                "direction": "RECEIVED",
-                "message": message,
-                "message_type": message_type,
-                "status": "received",
-                "media_url": media_url,
-                "timestamp": datetime.fromtimestamp(data.get("momment", time.time() * 1000) / 1000)
-            }
-            
             # Registra no histórico
-            result = history_service.add_received_message(data)
+            result = history_service.add_received_message(received)
+            
+            # Identifica o contato (em memória) e marca como "respondeu"
+            webhook_service.process_message_received(received)
             
             if result:
                 logger.info("✅ Mensagem registrada no histórico com sucesso")
-                logger.info(f"Detalhes da mensagem: {json.dumps(history_item, indent=2, default=str)}")
+                logger.info(f"Detalhes da mensagem: {json.dumps(received._asdict(), indent=2, default=str)}")
             else:
                 logger.error("❌ Falha ao registrar mensagem no histórico")
             
             return {"status": "received", "message": "Mensagem processada com sucesso"}
             
+        except WebhookPayloadError as e:
+            logger.error(f"❌ Payload inválido: {str(e)}")
+            return {"status": "error", "message": f"Payload inválido: {str(e)}"}
         except Exception as e:
             logger.error(f"❌ Erro ao registrar mensagem no histórico: {str(e)}")
             logger.error(f"Dados da mensagem que causou erro: {json.dumps(data, indent=2)}")
@@ -192,12 +188,12 @@ async def webhook_message_status(request: Request):
     data = await request.json()
     log_event("message-status", data)
     
-    # Atualiza o status da mensagem no histórico
+    # Atualiza o status das mensagens no histórico (gravado em lote em segundo plano)
     try:
-        message_id = data.get("messageId")
-        status = data.get("status")
-        if message_id and status:
-            history_service.update_message_status(message_id, status)
+        event = decode_webhook(data, default_type=MESSAGE_STATUS_CALLBACK)
+        if isinstance(event, MessageStatusEvent):
+            for message_id in event.message_ids:
+                status_applier.record(message_id, event.status)
     except Exception as e:
         logger.error(f"Erro ao atualizar status da mensagem no histórico: {str(e)}")
     
@@ -208,6 +204,12 @@ async def webhook_on_connect(request: Request):
     """Webhook para conexões"""
     data = await request.json()
     log_event("on-connect", data)
+    
+    # Libera os envios (fecha o circuit breaker da instância)
+    try:
+        webhook_service.process_connection_status(decode_webhook(data, default_type=CONNECTED_CALLBACK))
+    except WebhookPayloadError as e:
+        logger.error(f"❌ Payload de conexão inválido: {str(e)}")
     return {"status": "received"}
 
 @app.get("/events/{event_type}")
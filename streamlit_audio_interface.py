@@ -5,10 +5,15 @@ import requests
 import tempfile
 import json
 import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, List, Any
-from dotenv import load_dotenv
+from typing import Optional, Dict, List, Any, Callable
+from dotenv import dotenv_values
+from requests.adapters import HTTPAdapter
 # Importando gTTS para conversão de texto para áudio
 # from gtts import gTTS  # Comentado temporariamente devido a problemas de dependência
 
@@ -16,9 +21,34 @@ from dotenv import load_dotenv
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("streamlit_interface")
 
-# Carrega variáveis do arquivo .env
+# Arquivos locais
 env_path = Path('.') / '.env'
-load_dotenv(env_path)
+CONTACTS_DB_PATH = Path(__file__).parent / 'data' / 'contatos.db'
+MESSAGE_HISTORY_DB_PATH = Path(__file__).parent / 'data' / 'message_history.db'
+
+# Conversas exibidas na caixa de entrada
+INBOX_SIZE = 50
+
+# Tempo (segundos) em cache dos contatos locais e do arquivo .env
+CONTACTS_CACHE_TTL = 300
+ENV_CACHE_TTL = 300
+
+def file_mtime(path: Path) -> float:
+    """Data de modificação do arquivo (0 se não existir), usada como chave de cache"""
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+@st.cache_data(ttl=ENV_CACHE_TTL, show_spinner=False)
+def read_env_file(env_file: str, mtime: float) -> Dict[str, str]:
+    """Lê o arquivo .env (em cache enquanto o arquivo não mudar)"""
+    return {key: value for key, value in dotenv_values(env_file).items() if value is not None}
+
+# Carrega variáveis do arquivo .env sem sobrescrever as já definidas no ambiente
+# (o arquivo só é relido quando é modificado, não a cada recarregamento da página)
+for _key, _value in read_env_file(str(env_path), file_mtime(env_path)).items():
+    os.environ.setdefault(_key, _value)
 
 class Config:
     """Configurações da aplicação"""
@@ -57,6 +87,17 @@ class Config:
     # Caminhos de arquivos
     AUDIO_TEST_PATH: str = os.getenv('AUDIO_TEST_PATH', '')
     
+    # Timeouts HTTP (segundos)
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+    HTTP_READ_TIMEOUT: float = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+    
+    # Tempo (segundos) em que o status de conexão da Z-API fica em cache
+    ZAPI_CONNECTION_STATUS_TTL: float = float(os.getenv('ZAPI_CONNECTION_STATUS_TTL', '60'))
+    
+    # Envios simultâneos e limite de envios por segundo (0 = sem limite) no envio em massa
+    MASS_SEND_WORKERS: int = int(os.getenv('MASS_SEND_WORKERS', '4'))
+    MASS_SEND_RATE: float = float(os.getenv('MASS_SEND_RATE', '5'))
+    
     @classmethod
     def validate(cls) -> Optional[str]:
         """
@@ -86,6 +127,11 @@ class Config:
         """Retorna a URL base do Z-API"""
         return f"https://api.z-api.io/instances/{cls.ZAPI_INSTANCE_ID}/token/{cls.ZAPI_TOKEN}"
     
+    @classmethod
+    def get_http_timeout(cls) -> tuple:
+        """Retorna o timeout (conexão, leitura) das requisições"""
+        return (cls.HTTP_CONNECT_TIMEOUT, cls.HTTP_READ_TIMEOUT)
+    
     @classmethod
     def update_config(cls, config_dict: Dict[str, str]) -> None:
         """Atualiza as configurações com base em um dicionário"""
@@ -109,6 +155,234 @@ def encode_audio_to_base64(audio_path: str) -> str:
         logger.error(f"Erro ao codificar áudio: {str(e)}")
         return None
 
+class PreparedMediaBody:
+    """
+    Corpo JSON de envio de mídia com a parte da mídia serializada uma única vez
+    
+    No envio em massa apenas o telefone muda entre as requisições; a string
+    base64 (vários MB) é convertida para JSON/bytes uma vez e reaproveitada.
+    """
+    
+    def __init__(self, media: Dict[str, Any]):
+        """
+        Args:
+            media: Campos da mídia (ex: {"audio": base64, "waveform": True})
+        """
+        encoded = json.dumps(media)
+        # '{"audio": ...}' -> b', "audio": ...}' para ser anexado após o telefone
+        self._suffix = (", " + encoded[1:]).encode('utf-8')
+    
+    def for_phone(self, phone: str) -> bytes:
+        """Retorna o corpo completo da requisição para um telefone"""
+        return b'{"phone": ' + json.dumps(phone).encode('utf-8') + self._suffix
+
+@st.cache_resource(show_spinner=False)
+def get_http_session() -> requests.Session:
+    """
+    Retorna a sessão HTTP compartilhada entre recarregamentos e threads
+    
+    O pool de conexões comporta todos os envios simultâneos do envio em massa,
+    reaproveitando as conexões TLS com a Z-API.
+    """
+    pool_size = max(10, Config.MASS_SEND_WORKERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def parse_phone_list(phone_numbers) -> List[str]:
+    """Normaliza números separados por vírgula (ou lista) em uma lista sem vazios"""
+    if isinstance(phone_numbers, str):
+        # Divide a string por vírgulas e remove espaços
+        phone_list = [p.strip() for p in phone_numbers.split(',')]
+    else:
+        phone_list = phone_numbers
+    
+    # Filtra números vazios
+    return [p for p in phone_list if p]
+
+class RateLimiter:
+    """Limita a quantidade de envios por segundo entre todas as threads"""
+    
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate: Envios por segundo (0 ou negativo = sem limite)
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Aguarda a vez do próximo envio
+        
+        Returns:
+            False se o envio foi cancelado durante a espera
+        """
+        if not self.interval:
+            return not (cancel_event and cancel_event.is_set())
+        
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        
+        wait = slot - time.monotonic()
+        if wait > 0:
+            if cancel_event:
+                return not cancel_event.wait(wait)
+            time.sleep(wait)
+        return not (cancel_event and cancel_event.is_set())
+
+def dispatch_concurrently(
+    phone_list: List[str],
+    send_one: Callable[[str], Dict[str, Any]],
+    progress_callback: Optional[Callable[[int, int, str, Dict[str, Any]], None]] = None,
+    max_workers: Optional[int] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Executa ``send_one`` para cada número com um pool limitado de threads
+    
+    Args:
+        phone_list: Números de destino
+        send_one: Função que envia para um número e retorna o resultado
+        progress_callback: Chamada (concluídos, total, número, resultado) na thread
+            que invocou esta função, a cada envio concluído
+        max_workers: Envios simultâneos (padrão: Config.MASS_SEND_WORKERS)
+        rate_limiter: Limite de envios por segundo (opcional)
+        cancel_event: Quando sinalizado, os envios ainda não iniciados são cancelados
+    
+    Returns:
+        Resultados por número
+    """
+    results = {}
+    total = len(phone_list)
+    workers = max(1, min(max_workers or Config.MASS_SEND_WORKERS, total or 1))
+    
+    def run(phone: str) -> Dict[str, Any]:
+        if cancel_event and cancel_event.is_set():
+            return {"status": "cancelled", "message": "Envio cancelado"}
+        if rate_limiter and not rate_limiter.acquire(cancel_event):
+            return {"status": "cancelled", "message": "Envio cancelado"}
+        return send_one(phone)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run, phone): phone for phone in phone_list}
+        for done, future in enumerate(as_completed(futures), start=1):
+            phone = futures[future]
+            try:
+                results[phone] = future.result()
+            except Exception as e:
+                logger.error(f"Erro ao enviar para {phone}: {str(e)}")
+                results[phone] = {"status": "error", "message": f"Erro: {str(e)}"}
+            
+            if progress_callback:
+                progress_callback(done, total, phone, results[phone])
+    
+    return results
+
+class MassSendJob:
+    """
+    Envio em massa executado em segundo plano
+    
+    Os envios rodam em uma thread própria (com o pool de dispatch_concurrently),
+    fora da execução do script do Streamlit; a interface apenas consulta
+    ``snapshot()`` a cada atualização e pode cancelar o envio a qualquer momento.
+    """
+    
+    def __init__(
+        self,
+        phone_list: List[str],
+        send_one: Callable[[str], Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        rate: Optional[float] = None
+    ):
+        """
+        Args:
+            phone_list: Números de destino
+            send_one: Função que envia para um número e retorna o resultado
+            max_workers: Envios simultâneos (padrão: Config.MASS_SEND_WORKERS)
+            rate: Envios por segundo (padrão: Config.MASS_SEND_RATE)
+        """
+        self.phone_list = phone_list
+        self.send_one = send_one
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(Config.MASS_SEND_RATE if rate is None else rate)
+        self.cancel_event = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="mass-send", daemon=True)
+    
+    def start(self) -> "MassSendJob":
+        """Inicia o envio em segundo plano"""
+        self.started_at = time.monotonic()
+        self._thread.start()
+        return self
+    
+    def cancel(self) -> None:
+        """Cancela os envios ainda não iniciados"""
+        self.cancel_event.set()
+    
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+    
+    def _record(self, done: int, total: int, phone: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._results[phone] = result
+    
+    def _run(self) -> None:
+        try:
+            dispatch_concurrently(
+                self.phone_list,
+                self.send_one,
+                progress_callback=self._record,
+                max_workers=self.max_workers,
+                rate_limiter=self.rate_limiter,
+                cancel_event=self.cancel_event
+            )
+        except Exception as e:
+            logger.error(f"Erro no envio em massa: {str(e)}")
+            self.error = str(e)
+        finally:
+            self.finished_at = time.monotonic()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual do envio (progresso, resultados e resumo)"""
+        with self._lock:
+            results = dict(self._results)
+        
+        elapsed = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        snapshot = summarize_results(self.phone_list, results)
+        snapshot.update({
+            "running": self.running,
+            "cancelled": self.cancel_event.is_set(),
+            "done": len(results),
+            "elapsed": elapsed,
+            "error": self.error
+        })
+        snapshot["summary"]["cancelled"] = sum(1 for r in results.values() if r.get("status") == "cancelled")
+        return snapshot
+
+def summarize_results(phone_list: List[str], results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Monta o retorno padrão de um envio com o resumo dos resultados"""
+    return {
+        "status": "complete",
+        "results": results,
+        "summary": {
+            "total": len(phone_list),
+            "success": sum(1 for r in results.values() if r.get("status") == "success"),
+            "failed": sum(1 for r in results.values() if r.get("status") == "error")
+        }
+    }
+
 def text_to_audio(text: str, lang: str = 'pt') -> Optional[str]:
     """
     Converte texto para arquivo de áudio usando gTTS
@@ -142,28 +416,109 @@ def text_to_audio(text: str, lang: str = 'pt') -> Optional[str]:
         return None
     """
 
-def send_text(text, phone_numbers):
+def get_zapi_headers() -> Dict[str, str]:
+    """Headers das requisições à Z-API"""
+    return {
+        "Client-Token": Config.ZAPI_SECURITY_TOKEN,
+        "Content-Type": "application/json"
+    }
+
+def parse_send_response(response: requests.Response, kind: str) -> Dict[str, Any]:
+    """Converte a resposta de um envio no resultado por número"""
+    if response.status_code == 200:
+        result = response.json()
+        return {
+            "status": "success",
+            "zaapId": result.get('zaapId', ''),
+            "messageId": result.get('messageId', '')
+        }
+    return {
+        "status": "error",
+        "message": f"Erro ao enviar {kind}: {response.text}"
+    }
+
+def build_text_sender(text: str) -> Callable[[str], Dict[str, Any]]:
+    """Cria a função que envia ``text`` para um número"""
+    url = f"{Config.get_zapi_base_url()}/send-text"
+    headers = get_zapi_headers()
+    session = get_http_session()
+    
+    def send_one(phone: str) -> Dict[str, Any]:
+        # Remove caracteres não numéricos do telefone
+        clean_phone = ''.join(filter(str.isdigit, phone))
+        
+        if not clean_phone:
+            return {"status": "error", "message": "Número de telefone inválido"}
+        
+        # Envia o texto
+        logger.info(f"Enviando texto para {clean_phone}...")
+        response = session.post(
+            url,
+            headers=headers,
+            json={"phone": clean_phone, "message": text},
+            timeout=Config.get_http_timeout()
+        )
+        return parse_send_response(response, "texto")
+    
+    return send_one
+
+def build_audio_sender(audio_file: str) -> Callable[[str], Dict[str, Any]]:
+    """
+    Cria a função que envia o áudio para um número
+    
+    O áudio é codificado e serializado uma única vez para todos os números.
+    
+    Raises:
+        ValueError: Se o áudio não puder ser convertido para base64
+    """
+    url = f"{Config.get_zapi_base_url()}/send-audio"
+    headers = get_zapi_headers()
+    session = get_http_session()
+    
+    # Converte o áudio para base64
+    base64_audio = encode_audio_to_base64(audio_file)
+    if not base64_audio:
+        raise ValueError("Falha ao converter áudio para base64")
+    
+    # Serializa a parte da mídia uma única vez para todos os números
+    body = PreparedMediaBody({"audio": base64_audio, "waveform": True})
+    del base64_audio
+    
+    def send_one(phone: str) -> Dict[str, Any]:
+        # Remove caracteres não numéricos do telefone
+        clean_phone = ''.join(filter(str.isdigit, phone))
+        
+        if not clean_phone:
+            return {"status": "error", "message": "Número de telefone inválido"}
+        
+        # Envia o áudio
+        logger.info(f"Enviando áudio para {clean_phone}...")
+        response = session.post(
+            url,
+            headers=headers,
+            data=body.for_phone(clean_phone),
+            timeout=Config.get_http_timeout()
+        )
+        return parse_send_response(response, "áudio")
+    
+    return send_one
+
+def send_text(text, phone_numbers, progress_callback=None):
     """
     Função que processa o envio de texto simples via Z-API
     
+    Os envios são feitos em paralelo por um pool limitado (Config.MASS_SEND_WORKERS).
+    
     Args:
         text: Texto a ser enviado
         phone_numbers: Número(s) de telefone para envio (string ou lista)
+        progress_callback: Função opcional chamada a cada envio concluído
+            com (concluídos, total, número, resultado)
     
     Returns:
         Dict com resultados do envio
     """
-    results = {}
-    
-    # Normaliza para lista de telefones
-    if isinstance(phone_numbers, str):
-        # Divide a string por vírgulas e remove espaços
-        phone_list = [p.strip() for p in phone_numbers.split(',')]
-    else:
-        phone_list = phone_numbers
-    
-    # Filtra números vazios
-    phone_list = [p for p in phone_list if p]
+    phone_list = parse_phone_list(phone_numbers)
     
     if not text or not phone_list:
         return {"status": "error", "message": "Por favor, forneça um texto e pelo menos um número de telefone."}
@@ -174,89 +529,32 @@ def send_text(text, phone_numbers):
         if error:
             return {"status": "error", "message": f"Erro de configuração: {error}"}
         
-        # URL base da API
-        base_url = Config.get_zapi_base_url()
-        
-        # Headers da requisição
-        headers = {
-            "Client-Token": Config.ZAPI_SECURITY_TOKEN,
-            "Content-Type": "application/json"
-        }
-        
-        # Para cada número na lista
-        for phone in phone_list:
-            # Remove caracteres não numéricos do telefone
-            clean_phone = ''.join(filter(str.isdigit, phone))
-            
-            if not clean_phone:
-                results[phone] = {"status": "error", "message": "Número de telefone inválido"}
-                continue
-            
-            # Payload da requisição
-            payload = {
-                "phone": clean_phone,
-                "message": text
-            }
-            
-            # Envia o texto
-            logger.info(f"Enviando texto para {clean_phone}...")
-            response = requests.post(
-                f"{base_url}/send-text",
-                headers=headers,
-                json=payload
-            )
-            
-            # Verifica a resposta
-            if response.status_code == 200:
-                result = response.json()
-                results[phone] = {
-                    "status": "success",
-                    "zaapId": result.get('zaapId', ''),
-                    "messageId": result.get('messageId', '')
-                }
-            else:
-                results[phone] = {
-                    "status": "error",
-                    "message": f"Erro ao enviar texto: {response.text}"
-                }
+        results = dispatch_concurrently(phone_list, build_text_sender(text), progress_callback)
                 
     except Exception as e:
         logger.error(f"Erro: {str(e)}")
         return {"status": "error", "message": f"Erro: {str(e)}"}
     
     # Retorna resultados completos
-    return {
-        "status": "complete",
-        "results": results,
-        "summary": {
-            "total": len(phone_list),
-            "success": sum(1 for r in results.values() if r.get("status") == "success"),
-            "failed": sum(1 for r in results.values() if r.get("status") == "error")
-        }
-    }
+    return summarize_results(phone_list, results)
 
-def send_audio(audio_file, phone_numbers):
+def send_audio(audio_file, phone_numbers, progress_callback=None):
     """
     Função que processa o envio do áudio via Z-API
     
+    O áudio é codificado e serializado uma única vez; os envios são feitos em
+    paralelo por um pool limitado (Config.MASS_SEND_WORKERS).
+    
     Args:
         audio_file: Caminho para o arquivo de áudio
         phone_numbers: Número(s) de telefone para envio (string ou lista)
+        progress_callback: Função opcional chamada a cada envio concluído
+            com (concluídos, total, número, resultado)
     
     Returns:
         Dict com resultados do envio
     """
-    results = {}
-    
-    # Normaliza para lista de telefones
-    if isinstance(phone_numbers, str):
-        # Divide a string por vírgulas e remove espaços
-        phone_list = [p.strip() for p in phone_numbers.split(',')]
-    else:
-        phone_list = phone_numbers
-    
-    # Filtra números vazios
-    phone_list = [p for p in phone_list if p]
+    phone_list = parse_phone_list(phone_numbers)
     
     if not audio_file or not phone_list:
         return {"status": "error", "message": "Por favor, forneça um arquivo de áudio e pelo menos um número de telefone."}
@@ -267,72 +565,43 @@ def send_audio(audio_file, phone_numbers):
         if error:
             return {"status": "error", "message": f"Erro de configuração: {error}"}
         
-        # URL base da API
-        base_url = Config.get_zapi_base_url()
-            
-        # Converte o áudio para base64
-        base64_audio = encode_audio_to_base64(audio_file)
-        if not base64_audio:
-            return {"status": "error", "message": "Falha ao converter áudio para base64"}
-        
-        # Headers da requisição
-        headers = {
-            "Client-Token": Config.ZAPI_SECURITY_TOKEN,
-            "Content-Type": "application/json"
-        }
-        
-        # Para cada número na lista
-        for phone in phone_list:
-            # Remove caracteres não numéricos do telefone
-            clean_phone = ''.join(filter(str.isdigit, phone))
-            
-            if not clean_phone:
-                results[phone] = {"status": "error", "message": "Número de telefone inválido"}
-                continue
-            
-            # Payload da requisição
-            payload = {
-                "phone": clean_phone,
-                "audio": base64_audio,
-                "waveform": True
-            }
-            
-            # Envia o áudio
-            logger.info(f"Enviando áudio para {clean_phone}...")
-            response = requests.post(
-                f"{base_url}/send-audio",
-                headers=headers,
-                json=payload
-            )
-            
-            # Verifica a resposta
-            if response.status_code == 200:
-                result = response.json()
-                results[phone] = {
-                    "status": "success",
-                    "zaapId": result.get('zaapId', ''),
-                    "messageId": result.get('messageId', '')
-                }
-            else:
-                results[phone] = {
-                    "status": "error",
-                    "message": f"Erro ao enviar áudio: {response.text}"
-                }
+        results = dispatch_concurrently(phone_list, build_audio_sender(audio_file), progress_callback)
                 
     except Exception as e:
         logger.error(f"Erro: {str(e)}")
         return {"status": "error", "message": f"Erro: {str(e)}"}
     
     # Retorna resultados completos
-    return {
-        "status": "complete",
-        "results": results,
-        "summary": {
-            "total": len(phone_list),
-            "success": sum(1 for r in results.values() if r.get("status") == "success"),
-            "failed": sum(1 for r in results.values() if r.get("status") == "error")
-        }
-    }
+    return summarize_results(phone_list, results)
+
+def start_mass_send(phone_numbers, text=None, audio_file=None):
+    """
+    Inicia um envio em massa em segundo plano
+    
+    Args:
+        phone_numbers: Números de telefone (string separada por vírgulas ou lista)
+        text: Texto a ser enviado (quando não há áudio)
+        audio_file: Caminho para o arquivo de áudio
+    
+    Returns:
+        MassSendJob em execução ou Dict com o erro
+    """
+    phone_list = parse_phone_list(phone_numbers)
+    
+    if not (text or audio_file) or not phone_list:
+        return {"status": "error", "message": "Por favor, forneça um conteúdo e pelo menos um número de telefone."}
+    
+    error = Config.validate()
+    if error:
+        return {"status": "error", "message": f"Erro de configuração: {error}"}
+    
+    try:
+        send_one = build_audio_sender(audio_file) if audio_file else build_text_sender(text)
+    except Exception as e:
+        logger.error(f"Erro: {str(e)}")
+        return {"status": "error", "message": f"Erro: {str(e)}"}
+    
+    return MassSendJob(phone_list, send_one).start()
 
 def save_uploaded_file(uploaded_file):
     """Salva o arquivo carregado em um arquivo temporário"""
@@ -357,6 +626,7 @@ def save_env_file(config_data):
             for key, value in config_data.items():
                 if value:  # Só escreve se tiver valor
                     f.write(f"{key}={value}\n")
+        read_env_file.clear()
         return True
     except Exception as e:
         logger.error(f"Erro ao salvar arquivo .env: {str(e)}")
@@ -397,36 +667,163 @@ def load_env_to_session():
             'TEST_DOCUMENT_URL': Config.MEDIA_URLS.get('document', '')
         }
 
-def test_api_connection():
-    """Testa a conexão com a API Z-API"""
+class ConnectionCheckError(Exception):
+    """Falha ao consultar o status de conexão (resultado que não fica em cache)"""
+    pass
+
+@st.cache_data(ttl=Config.ZAPI_CONNECTION_STATUS_TTL, show_spinner=False)
+def check_connection_status(base_url: str, security_token: str) -> Dict[str, Any]:
+    """
+    Consulta o status de conexão na Z-API
+    
+    O resultado fica em cache por Config.ZAPI_CONNECTION_STATUS_TTL segundos
+    para cada combinação de instância/token. Falhas na consulta lançam
+    ConnectionCheckError, que o st.cache_data não guarda: uma falha
+    passageira não aparece como desconexão durante todo o TTL.
+    """
+    # URL para testar conexão
+    url = f"{base_url}/connection"
+    
+    # Headers
+    headers = {
+        "Client-Token": security_token,
+        "Content-Type": "application/json"
+    }
+    
     try:
-        error = Config.validate()
-        if error:
-            return {"status": "error", "message": error}
-        
-        # URL para testar conexão
-        url = f"{Config.get_zapi_base_url()}/connection"
-        
-        # Headers
-        headers = {
-            "Client-Token": Config.ZAPI_SECURITY_TOKEN,
-            "Content-Type": "application/json"
-        }
-        
         # Faz a requisição
-        response = requests.get(url, headers=headers)
+        response = get_http_session().get(url, headers=headers, timeout=Config.get_http_timeout())
+        checked_at = datetime.now().strftime('%H:%M:%S')
         
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("connected"):
-                return {"status": "success", "message": "Conectado ao WhatsApp"}
-            else:
-                return {"status": "warning", "message": "Z-API conectado, mas desconectado do WhatsApp"}
-        else:
-            return {"status": "error", "message": f"Erro ao verificar conexão: {response.text}"}
-            
+        if response.status_code != 200:
+            raise ConnectionCheckError(f"Erro ao verificar conexão: {response.text}")
+        data = response.json()
+    except ConnectionCheckError:
+        raise
     except Exception as e:
-        return {"status": "error", "message": f"Erro ao testar conexão: {str(e)}"}
+        raise ConnectionCheckError(f"Erro ao testar conexão: {str(e)}")
+    
+    if data.get("connected"):
+        return {"status": "success", "message": "Conectado ao WhatsApp", "checked_at": checked_at}
+    return {"status": "warning", "message": "Z-API conectado, mas desconectado do WhatsApp", "checked_at": checked_at}
+
+def test_api_connection(force: bool = False):
+    """
+    Testa a conexão com a API Z-API
+    
+    Args:
+        force: Ignora o status em cache e consulta a Z-API novamente
+    """
+    error = Config.validate()
+    if error:
+        return {"status": "error", "message": error}
+    
+    if force:
+        check_connection_status.clear()
+    
+    try:
+        return check_connection_status(Config.get_zapi_base_url(), Config.ZAPI_SECURITY_TOKEN)
+    except ConnectionCheckError as e:
+        return {"status": "error", "message": str(e), "checked_at": datetime.now().strftime('%H:%M:%S')}
+
+@st.cache_data(ttl=CONTACTS_CACHE_TTL, show_spinner=False)
+def load_local_contacts(db_path: str, mtime: float) -> List[Dict[str, str]]:
+    """
+    Lê os contatos do banco local (em cache enquanto o banco não mudar)
+    
+    Args:
+        db_path: Caminho do banco SQLite de contatos
+        mtime: Data de modificação do banco (invalida o cache quando muda)
+    """
+    if not mtime:
+        return []
+    
+    try:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = connection.execute(
+                "SELECT nome, telefone, status FROM contatos WHERE telefone IS NOT NULL ORDER BY nome"
+            ).fetchall()
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        logger.error(f"Erro ao ler contatos locais: {str(e)}")
+        return []
+    
+    return [
+        {"nome": nome or "", "telefone": telefone, "status": (status or "").lower()}
+        for nome, telefone, status in rows
+    ]
+
+def get_local_contacts() -> List[Dict[str, str]]:
+    """Retorna os contatos locais (ver load_local_contacts)"""
+    return load_local_contacts(str(CONTACTS_DB_PATH), file_mtime(CONTACTS_DB_PATH))
+
+def local_contact_phone(telefone: str) -> str:
+    """Formata o telefone do banco local (DDD + número) para envio, com o DDI 55"""
+    digits = ''.join(filter(str.isdigit, telefone))
+    if len(digits) in (10, 11):
+        return f"55{digits}"
+    return digits
+
+# Status de contatos que não podem receber mensagens
+SUPPRESSED_STATUSES = ("nao_perturbe", "removido")
+
+@st.cache_data(ttl=CONTACTS_CACHE_TTL, show_spinner=False)
+def load_suppressed_phones(db_path: str, mtime: float) -> frozenset:
+    """Telefones (com DDI 55) dos contatos em "não perturbe" ou removidos"""
+    return frozenset(
+        local_contact_phone(contact["telefone"])
+        for contact in load_local_contacts(db_path, mtime)
+        if contact["status"] in SUPPRESSED_STATUSES
+    )
+
+def get_suppressed_phones() -> frozenset:
+    """Retorna a lista de supressão do banco local (ver load_suppressed_phones)"""
+    return load_suppressed_phones(str(CONTACTS_DB_PATH), file_mtime(CONTACTS_DB_PATH))
+
+@st.cache_data(ttl=CONTACTS_CACHE_TTL, show_spinner=False)
+def load_conversations(db_path: str, mtime: float, limit: int = INBOX_SIZE) -> List[Dict[str, Any]]:
+    """
+    Lê as conversas mais recentes da tabela de resumos (sem percorrer o histórico)
+    
+    Args:
+        db_path: Caminho do banco SQLite de histórico de mensagens
+        mtime: Data de modificação do banco (invalida o cache quando muda)
+        limit: Quantidade de conversas
+    """
+    if not mtime:
+        return []
+    
+    try:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = connection.execute(
+                "SELECT phone, last_message_at, last_message, last_direction, unread_count, message_count "
+                "FROM conversations ORDER BY last_message_at DESC, phone DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        logger.error(f"Erro ao ler conversas: {str(e)}")
+        return []
+    
+    return [
+        {
+            "phone": phone,
+            "last_message_at": (last_message_at or "")[:19],
+            "last_message": last_message or "",
+            "sent": last_direction == "SENT",
+            "unread": unread_count or 0,
+            "total": message_count or 0,
+        }
+        for phone, last_message_at, last_message, last_direction, unread_count, message_count in rows
+    ]
+
+def get_conversations() -> List[Dict[str, Any]]:
+    """Retorna as conversas mais recentes (ver load_conversations)"""
+    return load_conversations(str(MESSAGE_HISTORY_DB_PATH), file_mtime(MESSAGE_HISTORY_DB_PATH))
 
 # Configuração da página
 st.set_page_config(
@@ -626,8 +1023,8 @@ with st.sidebar:
     
     with col2:
         if st.button("🔄 Testar Conexão"):
-            # Testa a conexão com a API
-            result = test_api_connection()
+            # Testa a conexão com a API (ignorando o status em cache)
+            result = test_api_connection(force=True)
             
             if result["status"] == "success":
                 st.success(result["message"])
@@ -635,13 +1032,23 @@ with st.sidebar:
                 st.warning(result["message"])
             else:
                 st.error(result["message"])
+    
+    # Status de conexão em cache (a Z-API é consultada no máximo uma vez por TTL)
+    if not Config.validate():
+        connection_status = test_api_connection()
+        status_icon = {"success": "🟢", "warning": "🟡"}.get(connection_status["status"], "🔴")
+        checked_at = connection_status.get("checked_at")
+        st.caption(
+            f"{status_icon} {connection_status['message']}"
+            + (f" (verificado às {checked_at})" if checked_at else "")
+        )
 
 # Título e descrição principal
 st.title("🎵 Envio de Mensagens via WhatsApp")
 st.subheader("Envie áudios ou textos para qualquer número do WhatsApp usando a Z-API")
 
 # Tabs para diferentes funcionalidades
-tab1, tab2 = st.tabs(["📱 Envio Individual", "📢 Envio em Massa"])
+tab1, tab2, tab3 = st.tabs(["📱 Envio Individual", "📢 Envio em Massa", "💬 Conversas"])
 
 with tab1:
     # Layout em colunas para envio individual
@@ -792,8 +1199,41 @@ with tab2:
             key="phones_mass"
         )
         
-        # Botão de envio em massa
-        if st.button("📤 Enviar para Todos", type="primary", key="send_mass"):
+        # Contatos do banco local (lidos do cache enquanto o banco não mudar)
+        local_phones = []
+        with st.expander("📇 Contatos locais"):
+            local_contacts = get_local_contacts()
+            if not local_contacts:
+                st.caption("Nenhum contato local encontrado.")
+            else:
+                contact_statuses = sorted({c["status"] for c in local_contacts if c["status"]})
+                selected_statuses = st.multiselect(
+                    "Status dos contatos",
+                    contact_statuses,
+                    default=[status for status in contact_statuses if status == "ativo"],
+                    key="contacts_status_mass"
+                )
+                selected_contacts = [c for c in local_contacts if c["status"] in selected_statuses]
+                st.caption(f"{len(selected_contacts)} de {len(local_contacts)} contatos selecionados")
+                
+                if st.checkbox("Enviar também para os contatos selecionados", key="use_local_contacts_mass"):
+                    local_phones = [local_contact_phone(c["telefone"]) for c in selected_contacts]
+        
+        mass_targets = list(dict.fromkeys(parse_phone_list(mass_phone_numbers) + local_phones))
+        
+        # Remove números em "não perturbe"/removidos (verificação em memória)
+        suppressed_phones = get_suppressed_phones()
+        if suppressed_phones:
+            allowed_targets = [phone for phone in mass_targets if local_contact_phone(phone) not in suppressed_phones]
+            if len(allowed_targets) < len(mass_targets):
+                st.caption(f"🚫 {len(mass_targets) - len(allowed_targets)} número(s) ignorado(s): não perturbe ou removido")
+            mass_targets = allowed_targets
+        
+        # Botão de envio em massa (desabilitado enquanto outro envio estiver em andamento)
+        mass_job = st.session_state.get('mass_job')
+        mass_job_running = mass_job is not None and mass_job.running
+        
+        if st.button("📤 Enviar para Todos", type="primary", key="send_mass", disabled=mass_job_running):
             # Verificar se há arquivo ou texto
             temp_file_path = None
             text_to_send = None
@@ -818,59 +1258,110 @@ with tab2:
             else:
                 st.session_state.result_mass = {"status": "error", "message": "Por favor, selecione um arquivo de áudio ou digite um texto."}
             
-            # Se tem áudio para enviar
-            if temp_file_path and mass_phone_numbers:
-                # Mostrar spinner durante o processamento
-                with st.spinner("Enviando áudios para múltiplos destinatários..."):
-                    # Enviar o áudio para múltiplos números
-                    result = send_audio(temp_file_path, mass_phone_numbers)
-                    
-                    # Mostrar o resultado em um estado de sessão
-                    st.session_state.result_mass = result
-            # Se tem texto para enviar
-            elif text_to_send and mass_phone_numbers:
-                # Mostrar spinner durante o processamento
-                with st.spinner("Enviando texto para múltiplos destinatários..."):
-                    # Enviar o texto para múltiplos números
-                    result = send_text(text_to_send, mass_phone_numbers)
-                    
-                    # Mostrar o resultado em um estado de sessão
-                    st.session_state.result_mass = result
-            elif (temp_file_path or text_to_send) and not mass_phone_numbers:
+            # Inicia o envio em segundo plano; o progresso é exibido ao lado
+            if (temp_file_path or text_to_send) and mass_targets:
+                job = start_mass_send(mass_targets, text=text_to_send, audio_file=temp_file_path)
+                if isinstance(job, MassSendJob):
+                    st.session_state.mass_job = job
+                    st.session_state.pop('result_mass', None)
+                    mass_job, mass_job_running = job, True
+                else:
+                    st.session_state.result_mass = job
+            elif (temp_file_path or text_to_send) and not mass_targets:
                 st.session_state.result_mass = {"status": "error", "message": "Por favor, insira pelo menos um número de telefone."}
     
     with col2:
         # Área de resultado para envio em massa
         st.subheader("Status do Envio em Massa")
         
-        # Verificar e exibir o resultado (se existir)
         if 'result_mass' in st.session_state:
             result = st.session_state.result_mass
+            st.error(result.get("message", "Erro desconhecido no envio em massa"))
+        elif mass_job is not None:
+            snapshot = mass_job.snapshot()
+            summary = snapshot.get("summary", {})
+            total = summary.get("total", 0)
+            done = snapshot.get("done", 0)
             
-            if result.get("status") == "complete":
-                summary = result.get("summary", {})
-                
-                # Exibe resumo
-                st.success(f"✅ Processamento concluído!")
-                st.metric("Total de envios", summary.get("total", 0))
-                col_success, col_fail = st.columns(2)
-                with col_success:
-                    st.metric("Enviados com sucesso", summary.get("success", 0))
-                with col_fail:
-                    st.metric("Falhas", summary.get("failed", 0))
-                
-                # Detalhes por número
-                with st.expander("Ver detalhes por número"):
-                    for phone, phone_result in result.get("results", {}).items():
-                        if phone_result.get("status") == "success":
-                            st.success(f"✅ Enviado para {phone}: ID {phone_result.get('messageId', '')}")
-                        else:
-                            st.error(f"❌ Falha para {phone}: {phone_result.get('message', '')}")
+            # Progresso atualizado a cada recarregamento enquanto o envio estiver em andamento
+            st.progress(
+                done / total if total else 1.0,
+                text=f"Processados {done} de {total} em {snapshot.get('elapsed', 0):.0f}s"
+            )
+            
+            if snapshot["running"]:
+                if snapshot["cancelled"]:
+                    st.warning("⏳ Cancelando envios pendentes...")
+                else:
+                    st.info("⏳ Envio em andamento...")
+                    if st.button("⛔ Cancelar envio", key="cancel_mass"):
+                        mass_job.cancel()
+                        st.rerun()
+            elif snapshot.get("error"):
+                st.error(f"❌ Erro no envio em massa: {snapshot['error']}")
+            elif snapshot["cancelled"]:
+                st.warning("⚠️ Envio cancelado.")
             else:
-                st.error(result.get("message", "Erro desconhecido no envio em massa"))
+                st.success("✅ Processamento concluído!")
+            
+            # Exibe resumo
+            st.metric("Total de envios", total)
+            col_success, col_fail, col_cancelled = st.columns(3)
+            with col_success:
+                st.metric("Enviados com sucesso", summary.get("success", 0))
+            with col_fail:
+                st.metric("Falhas", summary.get("failed", 0))
+            with col_cancelled:
+                st.metric("Cancelados", summary.get("cancelled", 0))
+            
+            # Detalhes por número
+            status_labels = {"success": "✅ Enviado", "error": "❌ Falha", "cancelled": "⛔ Cancelado"}
+            results = snapshot.get("results", {})
+            st.dataframe(
+                [
+                    {
+                        "Número": phone,
+                        "Status": status_labels.get(results[phone].get("status"), "⏳ Pendente") if phone in results else "⏳ Pendente",
+                        "Detalhes": (
+                            results[phone].get("messageId") or results[phone].get("message", "")
+                        ) if phone in results else ""
+                    }
+                    for phone in mass_job.phone_list
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
         else:
             st.info("O resultado do envio aparecerá aqui.")
 
+with tab3:
+    st.subheader("Caixa de entrada")
+    conversations = get_conversations()
+    
+    if conversations:
+        # Nome do contato pelo banco local (telefone com DDI 55)
+        contact_names = {
+            local_contact_phone(contact["telefone"]): contact["nome"]
+            for contact in get_local_contacts()
+        }
+        st.dataframe(
+            [
+                {
+                    "Contato": contact_names.get(conversation["phone"], ""),
+                    "Número": conversation["phone"],
+                    "Última atividade": conversation["last_message_at"],
+                    "Última mensagem": ("Você: " if conversation["sent"] else "") + conversation["last_message"],
+                    "Não lidas": conversation["unread"],
+                    "Mensagens": conversation["total"],
+                }
+                for conversation in conversations
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info("Nenhuma conversa registrada ainda.")
+
 # Rodapé compartilhado
 st.divider()
 
@@ -893,4 +1384,9 @@ with st.expander("ℹ️ Informações"):
     """)
 
 st.caption(f"Atualizado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+# Enquanto houver envio em massa em andamento, recarrega a página para atualizar o progresso
+if st.session_state.get('mass_job') is not None and st.session_state.mass_job.running:
+    time.sleep(1)
+    st.rerun()
 st.caption("API Clint - Integração com Z-API") 
\ No newline at end of file
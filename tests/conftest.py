@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from clint_api.models import contact, message_history
+
+
+@pytest.fixture
+def contacts_db(tmp_path):
+    """Fábrica de sessões de um banco de contatos vazio (arquivo temporário)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'contatos.db'}")
+    contact.Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def history_session(tmp_path):
+    """Sessão de um banco de histórico vazio (arquivo temporário, com índice de busca)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'message_history.db'}")
+    message_history.Base.metadata.create_all(engine)
+    message_history.create_message_search_index(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
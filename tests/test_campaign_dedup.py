@@ -0,0 +1,87 @@
+import pytest
+
+from clint_api.services.campaign_service import CampaignDeduplicator
+from clint_api.utils.bloom_filter import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for index in range(10_000):
+        bloom.add(f"2199{index:07d}")
+
+    assert all(f"2199{index:07d}" in bloom for index in range(10_000))
+    false_positives = sum(f"1188{index:07d}" in bloom for index in range(10_000))
+    assert false_positives < 300
+
+
+def test_bloom_filter_add_reports_new_items():
+    bloom = BloomFilter(capacity=100)
+    assert bloom.add("21999990000")
+    assert not bloom.add("21999990000")
+    assert len(bloom) == 1
+
+
+def test_bloom_filter_round_trips_through_file(tmp_path):
+    path = str(tmp_path / "campanha.bloom")
+    bloom = BloomFilter(capacity=1000)
+    bloom.add("21999990000")
+    bloom.checkpoint = 42
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+    assert "21999990000" in loaded
+    assert "21888880000" not in loaded
+    assert (loaded.checkpoint, len(loaded)) == (42, 1)
+
+
+def test_bloom_filter_rejects_corrupted_file(tmp_path):
+    path = tmp_path / "campanha.bloom"
+    path.write_bytes(b"lixo")
+    with pytest.raises(ValueError):
+        BloomFilter.load(str(path))
+    assert len(BloomFilter.open(str(path), capacity=10)) == 0
+
+
+def test_deduplicator_recovers_sends_missing_from_the_saved_filter(contacts_db, tmp_path):
+    session = contacts_db()
+    first = CampaignDeduplicator("campanha-1", session=session, directory=str(tmp_path), save_every=1000)
+    first.record_sent("5521999990000", "msg-1")
+    # Simula uma queda antes de o filtro ser gravado em disco
+    assert not (tmp_path / first._file_name("campanha-1")).exists()
+
+    second = CampaignDeduplicator("campanha-1", session=session, directory=str(tmp_path))
+    assert second.already_sent("21999990000")
+    assert not second.already_sent("21888880000")
+
+    other = CampaignDeduplicator("campanha-2", session=session, directory=str(tmp_path))
+    assert not other.already_sent("21999990000")
+
+
+def test_two_runs_of_the_same_campaign_never_skip_each_others_sends(contacts_db, tmp_path):
+    session_a, session_b = contacts_db(), contacts_db()
+    run_b = CampaignDeduplicator("campanha-1", session=session_b, directory=str(tmp_path), save_every=1000)
+    run_a = CampaignDeduplicator("campanha-1", session=session_a, directory=str(tmp_path), save_every=1000)
+
+    run_b.record_sent("5521999990000", "msg-1")
+    # run_b cai sem gravar o filtro; run_a grava um envio com ID maior e encerra
+    run_a.record_sent("5521888880000", "msg-2")
+    assert run_a.already_sent("21999990000")
+    run_a.close()
+
+    rerun = CampaignDeduplicator("campanha-1", session=contacts_db(), directory=str(tmp_path))
+    assert rerun.already_sent("21999990000")
+    assert rerun.already_sent("21888880000")
+    assert rerun.bloom.checkpoint == 2
+
+
+def test_checkpoint_skips_sends_of_other_campaigns(contacts_db, tmp_path):
+    session = contacts_db()
+    first = CampaignDeduplicator("campanha-1", session=session, directory=str(tmp_path))
+    other = CampaignDeduplicator("campanha-2", session=session, directory=str(tmp_path))
+
+    first.record_sent("21999990000")
+    other.record_sent("21888880000")
+    first.record_sent("21777770000")
+
+    assert first.bloom.checkpoint == 3
+    assert not first.already_sent("21888880000")
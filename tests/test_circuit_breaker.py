@@ -0,0 +1,66 @@
+import pytest
+
+from clint_api.exceptions.api_exceptions import ClintAPIException, TransientAPIError
+from clint_api.utils.circuit_breaker import CircuitBreaker, CircuitState
+
+
+def fail(error):
+    def func():
+        raise error
+    return func
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("teste", failure_threshold=2, recovery_timeout=60)
+    for _ in range(2):
+        with pytest.raises(TransientAPIError):
+            breaker.call(fail(TransientAPIError("503", status_code=503)))
+
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_non_failure_error_does_not_reset_failures():
+    breaker = CircuitBreaker("teste", failure_threshold=2, recovery_timeout=60)
+    with pytest.raises(TransientAPIError):
+        breaker.call(fail(TransientAPIError("503", status_code=503)))
+    with pytest.raises(ClintAPIException):
+        breaker.call(fail(ClintAPIException("400")))
+    with pytest.raises(TransientAPIError):
+        breaker.call(fail(TransientAPIError("503", status_code=503)))
+
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_non_failure_error_keeps_half_open_circuit_and_allows_new_trial():
+    breaker = CircuitBreaker("teste", failure_threshold=1, recovery_timeout=0)
+    breaker.force_open()
+
+    with pytest.raises(ClintAPIException):
+        breaker.call(fail(ClintAPIException("400")))
+    assert breaker.state is CircuitState.HALF_OPEN
+
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_connection_webhook_without_instance_id_pauses_the_configured_instance(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from clint_api.utils.circuit_breaker import get_circuit_breaker, zapi_breaker_name
+    from clint_api.utils.config import Config
+    from clint_api.utils.connection_state import get_connection_state
+    from clint_api.webhooks.webhook_server import app
+
+    monkeypatch.setattr(Config, "ZAPI_INSTANCE_ID", "instancia-teste")
+    client = TestClient(app)
+    headers = {"x-api-token": "your_security_token_here"}
+    breaker = get_circuit_breaker(zapi_breaker_name("instancia-teste"))
+
+    response = client.post("/webhooks/zapi/connection-status", json={"type": "DisconnectedCallback"}, headers=headers)
+    assert response.status_code == 200
+    assert breaker.state is CircuitState.OPEN
+    assert get_connection_state("instancia-teste").connected is False
+
+    client.post("/webhooks/zapi/connection-status", json={"type": "ConnectedCallback", "connected": True}, headers=headers)
+    assert breaker.state is CircuitState.CLOSED
+    assert get_connection_state("instancia-teste").connected is True
@@ -0,0 +1,108 @@
+import time
+
+from clint_api.models.contact import Contato, ContatoStatus
+from clint_api.services.contact_cache import CachedContact, ContactCache
+
+
+def _add_contacts(session_factory, count):
+    session = session_factory()
+    session.add_all(
+        Contato(
+            nome=f"Contato {index}",
+            telefone=f"2199999{index:04d}",
+            status=ContatoStatus.ATIVO,
+            clint_id=f"clint-{index}",
+        )
+        for index in range(count)
+    )
+    session.commit()
+    session.close()
+
+
+def test_lookup_fills_the_cache_once(contacts_db):
+    _add_contacts(contacts_db, 1)
+    cache = ContactCache(session_factory=contacts_db, max_size=10, ttl=60, negative_ttl=60)
+
+    contact = cache.get_by_phone("5521999990000")
+    assert contact.nome == "Contato 0"
+    assert cache.get_by_phone("21999990000") == contact
+    assert cache.get_by_clint_id("clint-0") == contact
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_lookup_by_clint_id_fills_the_phone_entry(contacts_db):
+    _add_contacts(contacts_db, 1)
+    cache = ContactCache(session_factory=contacts_db, max_size=10, ttl=60, negative_ttl=60)
+
+    assert cache.get_by_clint_id("clint-0").telefone == "21999990000"
+    assert cache.get_by_phone("21999990000").clint_id == "clint-0"
+    assert cache.hits == 1
+
+
+def test_unknown_phone_is_cached_until_negative_ttl(contacts_db):
+    cache = ContactCache(session_factory=contacts_db, max_size=10, ttl=60, negative_ttl=0.05)
+
+    assert cache.get_by_phone("21999990000") is None
+    # Criado por outro processo: a ausência em cache ainda vale
+    _add_contacts(contacts_db, 1)
+    assert cache.get_by_phone("21999990000") is None
+
+    time.sleep(0.06)
+    assert cache.get_by_phone("21999990000").nome == "Contato 0"
+
+
+def test_entries_expire_after_ttl(contacts_db):
+    _add_contacts(contacts_db, 1)
+    cache = ContactCache(session_factory=contacts_db, max_size=10, ttl=0.05, negative_ttl=0.05)
+    assert cache.get_by_phone("21999990000").nome == "Contato 0"
+
+    session = contacts_db()
+    session.query(Contato).update({Contato.nome: "Renomeado"})
+    session.commit()
+    session.close()
+
+    assert cache.get_by_phone("21999990000").nome == "Contato 0"
+    time.sleep(0.06)
+    assert cache.get_by_phone("21999990000").nome == "Renomeado"
+
+
+def test_least_recently_used_entry_is_evicted(contacts_db):
+    _add_contacts(contacts_db, 3)
+    cache = ContactCache(session_factory=contacts_db, max_size=2, ttl=60, negative_ttl=60)
+
+    cache.get_by_phone("21999990000")
+    cache.get_by_phone("21999990001")
+    cache.get_by_phone("21999990000")
+    cache.get_by_phone("21999990002")
+
+    assert len(cache) == 2
+    hits = cache.hits
+    cache.get_by_phone("21999990000")
+    assert cache.hits == hits + 1
+    cache.get_by_phone("21999990001")
+    assert cache.hits == hits + 1
+
+
+def test_put_and_invalidate(contacts_db):
+    cache = ContactCache(session_factory=contacts_db, max_size=10, ttl=60, negative_ttl=60)
+    contact = CachedContact(
+        id=1, nome="Novo", telefone="21999990000", email=None,
+        status=ContatoStatus.ATIVO, ultima_interacao=None, tags=None, clint_id="clint-0",
+    )
+
+    cache.put(contact)
+    assert cache.get_by_phone("21999990000") == contact
+    assert cache.get_by_clint_id("clint-0") == contact
+
+    cache.invalidate(clint_id="clint-0")
+    assert len(cache) == 0
+    # Sem contato no banco: a releitura registra a ausência
+    assert cache.get_by_phone("21999990000") is None
+
+
+def test_warm_up_loads_contacts(contacts_db):
+    _add_contacts(contacts_db, 5)
+    cache = ContactCache(session_factory=contacts_db, max_size=3, ttl=60, negative_ttl=60)
+
+    assert cache.warm_up() == 3
+    assert len(cache) == 3
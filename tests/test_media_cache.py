@@ -0,0 +1,72 @@
+import os
+
+from clint_api.utils import media_cache
+from clint_api.utils.media_cache import MediaCache
+
+
+def _file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def _age(cache, digest, seconds):
+    """Recua o último uso de um item (mtime dos arquivos)"""
+    path = cache._object_path(digest, ".media")
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_inserts_below_the_limit_walk_the_directory_once(tmp_path, monkeypatch):
+    walks = []
+    walk = os.walk
+    monkeypatch.setattr(media_cache.os, "walk", lambda *args: walks.append(args) or walk(*args))
+    cache = MediaCache(str(tmp_path / "cache"), max_bytes=10_000)
+
+    for index in range(5):
+        cache.publish(_file(tmp_path, f"{index}.bin", 1000))
+    cache.encoded_path(str(tmp_path / "0.bin"))
+
+    assert len(walks) == 1
+    assert cache._size == 5 * 1000 + 1336
+
+
+def test_least_recently_used_items_are_evicted_with_their_index_entries(tmp_path):
+    cache = MediaCache(str(tmp_path / "cache"), max_bytes=2500)
+    paths = [_file(tmp_path, f"{index}.bin", 1000) for index in range(3)]
+
+    first = cache.publish(paths[0])
+    second = cache.publish(paths[1])
+    _age(cache, first, 60)
+    _age(cache, second, 30)
+    # Reuso do primeiro item: passa a ser o mais recente
+    assert cache.media_path(first) is not None
+
+    third = cache.publish(paths[2])
+
+    assert cache.media_path(second) is None
+    assert cache.media_path(first) is not None and cache.media_path(third) is not None
+    assert cache._size == 2000
+    index = cache._load_index()
+    assert os.path.abspath(paths[1]) not in index
+    assert {entry.rsplit(":", 1)[1] for entry in index.values()} == {first, third}
+
+    # O índice gravado em disco também não aponta para o item removido
+    reloaded = MediaCache(cache.directory, max_bytes=2500)
+    assert os.path.abspath(paths[1]) not in reloaded._load_index()
+
+
+def test_new_item_is_kept_even_above_the_limit(tmp_path):
+    cache = MediaCache(str(tmp_path / "cache"), max_bytes=500)
+    digest = cache.publish(_file(tmp_path, "grande.bin", 1000))
+    assert cache.media_path(digest) is not None
+
+
+def test_clear_removes_everything(tmp_path):
+    cache = MediaCache(str(tmp_path / "cache"), max_bytes=10_000)
+    digest = cache.publish(_file(tmp_path, "a.bin", 1000))
+    cache.clear()
+
+    assert cache.media_path(digest) is None
+    assert cache._size == 0
+    assert cache._load_index() == {}
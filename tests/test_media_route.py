@@ -0,0 +1,121 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from clint_api.utils.media_cache import MediaCache
+from clint_api.webhooks import webhook_server
+from clint_api.webhooks.webhook_server import app, parse_range_header
+
+
+@pytest.mark.parametrize("header, size, expected", [
+    (None, 100, None),
+    ("bytes=0-9", 100, (0, 9)),
+    ("bytes=90-", 100, (90, 99)),
+    ("bytes=90-500", 100, (90, 99)),
+    ("bytes=-10", 100, (90, 99)),
+    ("bytes=-500", 100, (0, 99)),
+    ("BYTES = 5-5", 100, (5, 5)),
+    # Inválidos ou não suportados: arquivo inteiro
+    ("bytes=abc-", 100, None),
+    ("bytes=5-2", 100, None),
+    ("bytes=-", 100, None),
+    ("bytes=0-1,5-6", 100, None),
+    ("items=0-9", 100, None),
+    ("bytes=0x10-", 100, None),
+])
+def test_parse_range_header(header, size, expected):
+    assert parse_range_header(header, size) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=100-", 100),
+    ("bytes=-0", 100),
+    ("bytes=-10", 0),
+    ("bytes=0-", 0),
+])
+def test_parse_range_header_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range_header(header, size)
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    """Cliente do servidor de webhooks com um arquivo publicado num cache temporário"""
+    cache = MediaCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(webhook_server, "get_media_cache", lambda: cache)
+
+    def publish(content: bytes, name: str = "audio.mp3") -> str:
+        path = tmp_path / name
+        path.write_bytes(content)
+        return cache.publish(str(path))
+
+    return TestClient(app), publish
+
+
+def test_media_is_served_with_etag_and_cache_headers(media):
+    client, publish = media
+    content = bytes(range(256)) * 10
+    digest = publish(content)
+
+    response = client.get(f"/media/{digest}.mp3")
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["etag"] == f'"{digest}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["content-type"].startswith("audio/mpeg")
+
+    response = client.get(f"/media/{digest}", headers={"If-None-Match": f'"{digest}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_media_range_requests(media):
+    client, publish = media
+    content = bytes(range(256)) * 10
+    digest = publish(content)
+
+    response = client.get(f"/media/{digest}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == content[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(content)}"
+
+    response = client.get(f"/media/{digest}", headers={"Range": "bytes=-5"})
+    assert (response.status_code, response.content) == (206, content[-5:])
+
+    response = client.get(f"/media/{digest}", headers={"Range": f"bytes={len(content)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+    # Range inválido é ignorado
+    response = client.get(f"/media/{digest}", headers={"Range": "bytes=5-2"})
+    assert (response.status_code, response.content) == (200, content)
+
+
+def test_media_if_range(media):
+    client, publish = media
+    content = b"0123456789"
+    digest = publish(content)
+
+    response = client.get(f"/media/{digest}", headers={"Range": "bytes=2-3", "If-Range": f'"{digest}"'})
+    assert (response.status_code, response.content) == (206, b"23")
+
+    response = client.get(f"/media/{digest}", headers={"Range": "bytes=2-3", "If-Range": '"outro"'})
+    assert (response.status_code, response.content) == (200, content)
+
+
+def test_empty_media_file(media):
+    client, publish = media
+    digest = publish(b"", "vazio.bin")
+
+    response = client.get(f"/media/{digest}", headers={"Range": "bytes=-10"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */0"
+
+    response = client.get(f"/media/{digest}")
+    assert (response.status_code, response.content) == (200, b"")
+
+
+def test_unknown_media_is_not_found(media):
+    client, _ = media
+    assert client.get(f"/media/{'0' * 64}").status_code == 404
+    assert client.get("/media/../../etc/passwd").status_code == 404
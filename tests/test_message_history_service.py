@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+from clint_api.models.webhook_events import ReceivedMessage
+from clint_api.models.whatsapp_message import WhatsAppMessage
+from clint_api.services.message_history_service import MessageHistoryService, _match_query
+
+
+def _receive(service, index, text, timestamp, phone="5521999990000", from_me=False):
+    return service.add_received_message(ReceivedMessage(
+        message_id=f"m{index}",
+        phone=phone,
+        message=text,
+        message_type="text",
+        media_url=None,
+        timestamp=timestamp,
+        from_me=from_me,
+    ))
+
+
+def test_history_pages_are_complete_and_do_not_overlap(history_session):
+    service = MessageHistoryService(session=history_session)
+    start = datetime(2024, 1, 1, 12, 0)
+    # Vários registros no mesmo instante: o id desempata o cursor
+    for index in range(23):
+        _receive(service, index, f"mensagem {index}", start + timedelta(seconds=index // 4))
+    _receive(service, 99, "outro número", start, phone="5521988880000")
+
+    pages = []
+    cursor = None
+    while True:
+        page = service.get_chat_history_page("5521999990000", before=cursor, page_size=5)
+        pages.append(page.messages)
+        if not page.has_more:
+            break
+        cursor = page.next_cursor
+
+    ids = [message.id for messages in pages for message in messages]
+    assert [len(messages) for messages in pages] == [5, 5, 5, 5, 3]
+    assert len(set(ids)) == 23
+    keys = [(message.timestamp, message.id) for messages in pages for message in messages]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_last_page_has_no_cursor(history_session):
+    service = MessageHistoryService(session=history_session)
+    for index in range(5):
+        _receive(service, index, "oi", datetime(2024, 1, 1, 12, index))
+
+    page = service.get_chat_history_page("5521999990000", page_size=5)
+    assert len(page.messages) == 5
+    assert page.next_cursor is None
+    assert service.get_chat_history_page("5521900000000").messages == []
+
+
+def test_unread_count_matches_a_rebuild_with_out_of_order_messages(history_session):
+    service = MessageHistoryService(session=history_session)
+    start = datetime(2024, 1, 1, 12, 0)
+    # (minuto, enviada pelo próprio aparelho), fora de ordem como no webhook
+    events = [(5, False), (1, False), (3, True), (7, False), (2, False), (6, True), (9, False), (4, False)]
+    for index, (minute, from_me) in enumerate(events):
+        _receive(service, index, "oi", start + timedelta(minutes=minute), from_me=from_me)
+
+    conversation = service.get_conversation("5521999990000")
+    # Recebidas após o último envio (minuto 6): 7 e 9
+    assert conversation.unread_count == 2
+    assert conversation.last_sent_at == start + timedelta(minutes=6)
+    assert conversation.message_count == len(events)
+
+    service.rebuild_conversations()
+    history_session.expire_all()
+    rebuilt = service.get_conversation("5521999990000")
+    assert (rebuilt.unread_count, rebuilt.last_sent_at) == (2, start + timedelta(minutes=6))
+    assert rebuilt.last_message_at == start + timedelta(minutes=9)
+
+
+def test_match_query_quotes_every_word():
+    assert _match_query("reunião amanhã") == '"reunião" "amanhã"'
+    assert _match_query("pag*") == '"pag"*'
+    assert _match_query("joao@exemplo.com") == '"joao@exemplo.com"'
+
+
+def test_match_query_neutralizes_fts_syntax():
+    # Operadores viram palavras comuns; aspas e parênteses são descartados
+    assert _match_query('"pagamento" OR reunião') == '"pagamento" "OR" "reunião"'
+    assert _match_query("NOT obrigado") == '"NOT" "obrigado"'
+    assert _match_query('NEAR(a"b)') == '"NEAR" "a" "b"'
+    assert _match_query('* " ( )') == ""
+
+
+def test_search_messages_ignores_accents_and_case(history_session):
+    service = MessageHistoryService(session=history_session)
+    start = datetime(2024, 1, 1, 12, 0)
+    _receive(service, 0, "Reunião amanhã às 10h", start)
+    _receive(service, 1, "Pagamento confirmado, obrigado!", start + timedelta(minutes=1))
+    _receive(service, 2, "reuniao adiada", start, phone="5521988880000")
+
+    results = service.search_messages("REUNIAO")
+    assert {result.phone for result in results} == {"5521999990000", "5521988880000"}
+
+    results = service.search_messages("reunião", phone="5521999990000")
+    assert [result.snippet for result in results] == ["[Reunião] amanhã às 10h"]
+
+    assert [result.snippet for result in service.search_messages("pag* confirmado)")] == [
+        "[Pagamento] [confirmado], obrigado!"
+    ]
+    assert service.search_messages('reunião OR "pagamento"') == []
+    assert service.search_messages("-") == []
+    assert service.search_messages('"') == []
+
+
+def test_sent_and_received_messages_share_one_conversation(history_session):
+    service = MessageHistoryService(session=history_session)
+    _receive(service, 0, "oi", datetime(2024, 1, 1, 12, 0))
+    message = WhatsAppMessage(phone="(21) 99999-0000", message="olá")
+    message.message_id = "enviada"
+    service.add_sent_message(message)
+
+    assert [conversation.phone for conversation in service.list_conversations().conversations] == [
+        "5521999990000"
+    ]
+    # O envio é mais novo que a recebida: nada fica como não lido
+    assert service.get_conversation("21999990000").unread_count == 0
+    assert len(service.get_chat_history_page("21999990000").messages) == 2
+
+    _receive(service, 1, "tudo bem?", datetime.now() + timedelta(minutes=1))
+    assert service.get_conversation("5521999990000").unread_count == 1
+    assert service.mark_conversation_read("21999990000")
+    assert service.get_conversation("5521999990000").unread_count == 0
+
+
+def test_group_ids_are_not_treated_as_phones(history_session):
+    service = MessageHistoryService(session=history_session)
+    _receive(service, 0, "oi, grupo", datetime(2024, 1, 1, 12, 0), phone="120363019502650977-group")
+    assert service.get_conversation("120363019502650977-group").message_count == 1
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+from requests.exceptions import ConnectTimeout, ReadTimeout
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from clint_api.exceptions.api_exceptions import TransientAPIError
+from clint_api.utils.deadline import deadline
+from clint_api.utils.decorators import retry, retry_async
+from clint_api.utils.retry_policy import RetryBudget, RetryPolicy, parse_retry_after
+
+
+def _connection_refused():
+    reason = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] Connection refused")
+    return RequestsConnectionError(MaxRetryError(None, "/send-text", reason=reason))
+
+
+@pytest.mark.parametrize("error, idempotent, non_idempotent", [
+    (TransientAPIError("limite", status_code=429), True, True),
+    (TransientAPIError("indisponível", status_code=503), True, True),
+    (TransientAPIError("erro interno", status_code=500), True, False),
+    (TransientAPIError("não encontrado", status_code=404), False, False),
+    (ConnectTimeout(), True, True),
+    (_connection_refused(), True, True),
+    (ReadTimeout(), True, False),
+    (RequestsConnectionError(ProtocolError("Connection aborted.")), True, False),
+    (ValueError("outro erro"), False, False),
+])
+def test_non_idempotent_policy_only_retries_unprocessed_requests(error, idempotent, non_idempotent):
+    assert RetryPolicy(budget=None).is_retryable(error) is idempotent
+    assert RetryPolicy(budget=None, idempotent=False).is_retryable(error) is non_idempotent
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(" 1.5 ") == 1.5
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("amanhã") is None
+
+    in_a_minute = parse_retry_after(formatdate(time.time() + 60, usegmt=True))
+    assert 55 <= in_a_minute <= 60
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+
+
+def test_compute_delay_respects_retry_after_and_caps():
+    policy = RetryPolicy(base_delay=1.0, backoff=2.0, max_delay=5.0, jitter=False, max_retry_after=10.0)
+    assert [policy.compute_delay(attempt) for attempt in range(4)] == [1.0, 2.0, 4.0, 5.0]
+    assert policy.compute_delay(0, TransientAPIError("limite", 429, retry_after=3)) == 3.0
+    assert policy.compute_delay(0, TransientAPIError("limite", 429, retry_after=120)) == 10.0
+    assert 0 <= RetryPolicy(base_delay=1.0).compute_delay(0) <= 1.0
+
+
+def test_budget_is_consumed_by_retries_and_refilled_by_successes():
+    budget = RetryBudget(max_tokens=2, token_ratio=0.5)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def test_retry_stops_when_the_budget_is_exhausted():
+    budget = RetryBudget(max_tokens=1)
+    calls = []
+
+    @retry(policy=RetryPolicy(max_attempts=5, base_delay=0, budget=budget))
+    def flaky():
+        calls.append(1)
+        raise ConnectTimeout()
+
+    with pytest.raises(ConnectTimeout):
+        flaky()
+    assert len(calls) == 2
+    assert budget.tokens == 0
+
+
+def test_retry_abandoned_by_the_deadline_does_not_spend_the_budget():
+    budget = RetryBudget(max_tokens=5)
+    calls = []
+
+    @retry(policy=RetryPolicy(max_attempts=3, base_delay=10, jitter=False, budget=budget))
+    def flaky():
+        calls.append(1)
+        raise ConnectTimeout()
+
+    with deadline(1), pytest.raises(ConnectTimeout):
+        flaky()
+    assert len(calls) == 1
+    assert budget.tokens == 5
+
+
+def test_retry_async_repeats_without_blocking_the_loop():
+    budget = RetryBudget(max_tokens=5)
+    attempts = []
+
+    @retry_async(policy=RetryPolicy(max_attempts=3, base_delay=0, budget=budget))
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TransientAPIError("indisponível", status_code=503)
+        return "ok"
+
+    async def main():
+        ticks = []
+
+        async def ticker():
+            ticks.append(1)
+
+        result, _ = await asyncio.gather(flaky(), ticker())
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result == "ok"
+    assert len(attempts) == 3 and ticks == [1]
+    assert budget.tokens == pytest.approx(3.1)
+
+
+def test_retry_async_gives_up_on_non_retryable_errors():
+    calls = []
+
+    @retry_async(policy=RetryPolicy(max_attempts=3, base_delay=0, budget=None, idempotent=False))
+    async def send():
+        calls.append(1)
+        raise ReadTimeout()
+
+    with pytest.raises(ReadTimeout):
+        asyncio.run(send())
+    assert len(calls) == 1
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from clint_api.models.contact import Contato, ContatoStatus, ContatoTag
+from clint_api.services.segment_service import Segment, SegmentService
+
+# (telefone, status, tags, última interação)
+CONTACTS = [
+    ("21999990000", ContatoStatus.ATIVO, "vip,cliente", datetime(2024, 3, 1)),
+    ("21999990001", ContatoStatus.ATIVO, "cliente", datetime(2024, 1, 1)),
+    ("11999990002", ContatoStatus.RESPONDEU, "vip", None),
+    ("11999990003", ContatoStatus.NAO_PERTURBE, "vip,cliente", datetime(2024, 3, 1)),
+    ("21999990004", ContatoStatus.INATIVO, "", datetime(2023, 6, 1)),
+    ("31999990005", ContatoStatus.REMOVIDO, "cliente", None),
+    ("31999990006", None, "lead", datetime(2024, 2, 1)),
+]
+
+
+@pytest.fixture
+def session(contacts_db):
+    session = contacts_db()
+    # Banco sincronizado antes de contato_tags: só a coluna tags preenchida
+    session.add_all(
+        Contato(nome=f"Contato {index}", telefone=telefone, status=status, tags=tags, ultima_interacao=interaction)
+        for index, (telefone, status, tags, interaction) in enumerate(CONTACTS)
+    )
+    session.commit()
+    yield session
+    session.close()
+
+
+def _phones(service, segment):
+    return sorted(service.iter_phones(segment))
+
+
+def test_tag_index_is_filled_on_first_use(session):
+    assert session.query(ContatoTag).count() == 0
+    SegmentService(session=session)
+    assert session.query(ContatoTag).count() == 8
+
+
+@pytest.mark.parametrize("segment, expected", [
+    (Segment(), ["11999990002", "21999990000", "21999990001", "21999990004", "31999990006"]),
+    (Segment(statuses=[ContatoStatus.ATIVO]), ["21999990000", "21999990001"]),
+    (Segment(exclude_statuses=None, statuses=[ContatoStatus.NAO_PERTURBE]), ["11999990003"]),
+    (Segment(tags_any=["vip", " lead "]), ["11999990002", "21999990000", "31999990006"]),
+    (Segment(tags_all=["vip", "cliente"]), ["21999990000"]),
+    (Segment(tags_none=["cliente"]), ["11999990002", "21999990004", "31999990006"]),
+    (Segment(ddds=["11", "31"]), ["11999990002", "31999990006"]),
+    (Segment(last_interaction_after=datetime(2024, 1, 15)), ["21999990000", "31999990006"]),
+    (
+        Segment(last_interaction_after=datetime(2024, 1, 15), never_interacted=True),
+        ["11999990002", "21999990000", "31999990006"],
+    ),
+    (Segment(last_interaction_before=datetime(2024, 1, 1)), ["21999990004"]),
+    (Segment(statuses=[ContatoStatus.ATIVO], tags_any=["vip"], ddds=["21"]), ["21999990000"]),
+])
+def test_segment_filters(session, segment, expected):
+    service = SegmentService(session=session)
+    assert _phones(service, segment) == expected
+    assert service.count(segment) == len(expected)
+
+
+@pytest.mark.parametrize("total, chunk_size", [(10, 3), (9, 3), (2, 5), (0, 4)])
+def test_chunks_cover_the_segment_once(contacts_db, total, chunk_size):
+    session = contacts_db()
+    session.add_all(
+        Contato(
+            telefone=f"2199999{index:04d}",
+            # Contatos fora do segmento intercalados: os IDs do segmento não são contínuos
+            status=ContatoStatus.REMOVIDO if index % 3 == 1 else ContatoStatus.ATIVO,
+        )
+        for index in range(total * 3 // 2)
+    )
+    session.commit()
+    service = SegmentService(session=session)
+    segment = Segment()
+    expected = [
+        contato.id for contato in session.query(Contato).order_by(Contato.id)
+        if contato.status is not ContatoStatus.REMOVIDO
+    ]
+
+    chunks = list(service.iter_chunks(segment, chunk_size=chunk_size))
+    assert all(0 < len(chunk) <= chunk_size for chunk in chunks)
+    assert [contato.id for chunk in chunks for contato in chunk] == expected
+    assert [contato.id for contato in service.iter_contacts(segment, chunk_size=chunk_size)] == expected
+
+    phones = list(service.iter_phones(segment, chunk_size=chunk_size))
+    assert phones == [session.get(Contato, contact_id).telefone for contact_id in expected]
+    session.close()
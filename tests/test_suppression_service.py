@@ -0,0 +1,63 @@
+import random
+
+from clint_api.models.contact import Contato, ContatoStatus
+from clint_api.services.suppression_service import PhoneFingerprintSet, SuppressionList, phone_fingerprint
+
+
+def test_fingerprint_ignores_country_code():
+    assert phone_fingerprint("5521999990000") == phone_fingerprint("21999990000")
+
+
+def test_fingerprint_set_add_discard_and_resize():
+    phones = PhoneFingerprintSet(capacity=4)
+    numbers = [f"2199{index:07d}" for index in range(500)]
+
+    assert all(phones.add(number) for number in numbers)
+    assert not phones.add(numbers[0])
+    assert len(phones) == 500
+    assert all(number in phones for number in numbers)
+
+    removed = set(random.Random(7).sample(numbers, 250))
+    assert all(phones.discard(number) for number in removed)
+    assert not phones.discard(next(iter(removed)))
+    assert len(phones) == 250
+    # A remoção com deslocamento não pode esconder os itens que ficaram
+    assert all((number in phones) is (number not in removed) for number in numbers)
+
+
+def test_fingerprint_set_matches_a_python_set_under_random_operations():
+    rng = random.Random(42)
+    phones = PhoneFingerprintSet(capacity=16)
+    expected = set()
+    for _ in range(5000):
+        number = f"1198{rng.randrange(300):07d}"
+        if rng.random() < 0.6:
+            assert phones.add(number) is (number not in expected)
+            expected.add(number)
+        else:
+            assert phones.discard(number) is (number in expected)
+            expected.discard(number)
+    assert len(phones) == len(expected)
+    assert all(number in phones for number in expected)
+
+
+def test_suppression_list_loads_from_db_and_follows_status_changes(contacts_db):
+    session = contacts_db()
+    session.add_all([
+        Contato(nome="A", telefone="21999990000", status=ContatoStatus.NAO_PERTURBE),
+        Contato(nome="B", telefone="21888880000", status=ContatoStatus.ATIVO),
+    ])
+    session.commit()
+
+    suppression = SuppressionList(session_factory=contacts_db)
+    assert suppression.load() == 1
+    assert suppression.is_suppressed("5521999990000")
+    assert list(suppression.filter_phones(["21999990000", "21888880000"])) == ["21888880000"]
+
+    suppression.record_status("21999990000", ContatoStatus.ATIVO)
+    suppression.record_status("21888880000", ContatoStatus.REMOVIDO)
+    assert not suppression.is_suppressed("21999990000")
+    assert suppression.is_suppressed("21888880000")
+
+    suppression.discard("21888880000")
+    assert not suppression.is_suppressed("21888880000")
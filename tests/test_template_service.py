@@ -0,0 +1,77 @@
+import pytest
+
+from clint_api.models.contact import Contato, ContatoStatus
+from clint_api.models.whatsapp_message import message_delays
+from clint_api.services import template_service
+from clint_api.services.template_service import MessageTemplate
+
+
+def _contact(**fields):
+    return Contato(**{"nome": "Maria Souza", "telefone": "21999990000", "status": ContatoStatus.ATIVO, **fields})
+
+
+@pytest.mark.parametrize("text, contact, expected", [
+    ("Olá {primeiro_nome}!", _contact(), "Olá Maria!"),
+    ("Olá {nome|cliente}!", _contact(nome=None), "Olá cliente!"),
+    ("Olá {primeiro_nome|cliente}!", _contact(nome=""), "Olá cliente!"),
+    ("Olá {nome|}!", _contact(nome=None), "Olá !"),
+    ("{ nome | cliente }", _contact(), "Maria Souza"),
+    ("Status: {status}, e-mail: {email|sem e-mail}", _contact(), "Status: ativo, e-mail: sem e-mail"),
+    ("Use {{cupom}} em {{{primeiro_nome}}}", _contact(), "Use {cupom} em {Maria}"),
+    ("Chaves soltas: {{ e }}", _contact(), "Chaves soltas: { e }"),
+])
+def test_render(text, contact, expected):
+    assert MessageTemplate(text).render(contact) == expected
+
+
+def test_extra_fields():
+    cities = {"21999990000": "Rio"}
+    template = MessageTemplate("{primeiro_nome}, de {cidade|?}", fields={"cidade": lambda c: cities.get(c.telefone)})
+    assert template.fields == ("primeiro_nome", "cidade")
+    assert template.render(_contact()) == "Maria, de Rio"
+    assert template.render(_contact(telefone="11999990000")) == "Maria, de ?"
+
+
+@pytest.mark.parametrize("text", [
+    "Olá {sobrenome}",
+    "Olá {nome:>10}",
+    "Olá {nome!r}",
+    "Olá {nome",
+    "Olá }",
+])
+def test_invalid_templates_raise(text):
+    with pytest.raises(ValueError):
+        MessageTemplate(text)
+
+
+def test_static_text_delays_are_computed_once(monkeypatch):
+    calls = []
+
+    def counting_delays(text):
+        calls.append(text)
+        return message_delays(text)
+
+    monkeypatch.setattr(template_service, "message_delays", counting_delays)
+
+    static = MessageTemplate("Promoção de {{verão}} para todos!")
+    messages = static.render_batch([_contact(), _contact(telefone="21999990001")])
+    assert calls == ["Promoção de {verão} para todos!"]
+    assert {message.message for message in messages} == {"Promoção de {verão} para todos!"}
+
+    calls.clear()
+    MessageTemplate("Olá {primeiro_nome}").render_batch([_contact(), _contact(nome="Ana")])
+    assert calls == ["Olá Maria", "Olá Ana"]
+
+
+def test_render_batch_skips_contacts_without_phone():
+    template = MessageTemplate("Olá {primeiro_nome}")
+    messages = template.render_batch(
+        [_contact(), _contact(nome="Sem Telefone", telefone=None), _contact(nome="Ana", telefone="")],
+        instance_id="instancia",
+        token="token",
+    )
+
+    assert [(message.phone, message.message) for message in messages] == [("21999990000", "Olá Maria")]
+    message = messages[0]
+    assert (message.instance_id, message.token) == ("instancia", "token")
+    assert (message.delay_message, message.delay_typing) == message_delays("Olá Maria")
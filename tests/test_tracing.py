@@ -0,0 +1,72 @@
+import pytest
+
+from clint_api.utils import tracing
+from clint_api.utils.decorators import retry
+from clint_api.utils.retry_policy import RetryPolicy
+from clint_api.utils.tracing import CallTrace, InMemoryTraceSink, TraceSink
+
+
+def make_trace(name="func", wall_time=0.1, exception_class=None):
+    return CallTrace(name=name, kind="call", started_at=0.0, wall_time=wall_time, exception_class=exception_class)
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryTraceSink(max_records=3)
+    tracing.set_trace_sink(sink)
+    yield sink
+    tracing.set_trace_sink(None)
+
+
+def test_trace_sink_is_abstract():
+    with pytest.raises(TypeError):
+        TraceSink()
+
+
+def test_in_memory_sink_keeps_last_records_and_all_stats():
+    sink = InMemoryTraceSink(max_records=3)
+    for index in range(5):
+        sink.record(make_trace(wall_time=index, exception_class="ValueError" if index == 4 else None))
+
+    assert [trace.wall_time for trace in sink.records] == [2, 3, 4]
+    stats = sink.summary()["call:func"]
+    assert stats["calls"] == 5
+    assert stats["errors"] == 1
+    assert stats["max_time"] == 4
+    assert stats["avg_time"] == 2
+    assert stats["exceptions"] == {"ValueError": 1}
+
+
+def test_emit_logs_sink_errors_without_raising(monkeypatch):
+    class BrokenSink(TraceSink):
+        def record(self, trace):
+            raise RuntimeError("sink fora do ar")
+
+    errors = []
+    monkeypatch.setattr(tracing.logger, "error", errors.append)
+    tracing.set_trace_sink(BrokenSink())
+    try:
+        tracing.emit(make_trace())
+    finally:
+        tracing.set_trace_sink(None)
+
+    assert len(errors) == 1
+    assert "sink fora do ar" in errors[0]
+
+
+def test_retry_emits_attempts_and_final_exception(sink):
+    calls = []
+
+    @retry(policy=RetryPolicy(max_attempts=3, base_delay=0, budget=None, retry_on=(ValueError,)))
+    def flaky():
+        calls.append(1)
+        raise ValueError("falhou")
+
+    with pytest.raises(ValueError):
+        flaky()
+
+    assert len(calls) == 3
+    (trace,) = sink.records
+    assert trace.kind == "retry"
+    assert trace.attempts == 3
+    assert trace.exception_class == "ValueError"
@@ -0,0 +1,158 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from clint_api.exceptions.api_exceptions import WebhookPayloadError
+from clint_api.models.webhook_events import (
+    DISCONNECTED_CALLBACK,
+    MESSAGE_STATUS_CALLBACK,
+    RECEIVED_CALLBACK,
+    ConnectionEvent,
+    MessageStatusEvent,
+    ReceivedMessage,
+    decode_connection_event,
+    decode_webhook,
+    extract_received_message,
+)
+
+MOMMENT = 1704110400000
+
+
+def _received(**content):
+    return {
+        "type": RECEIVED_CALLBACK,
+        "messageId": "3EB0A0C1",
+        "phone": "5521999990000",
+        "momment": MOMMENT,
+        "instanceId": "instancia",
+        **content,
+    }
+
+
+@pytest.mark.parametrize("content, message_type, message, media_url, summary", [
+    ({"text": {"message": "Olá!"}}, "text", "Olá!", None, "Olá!"),
+    ({"text": "texto simples"}, "text", "texto simples", None, "texto simples"),
+    ({"hydratedTemplate": {"message": "Modelo"}}, "template", "Modelo", None, "Modelo"),
+    (
+        {"image": {"imageUrl": "https://cdn/img.jpg", "caption": "foto"}},
+        "image", "foto", "https://cdn/img.jpg", "[Imagem] foto",
+    ),
+    ({"image": {"imageUrl": "https://cdn/img.jpg"}}, "image", "", "https://cdn/img.jpg", "[Imagem]"),
+    ({"video": {"videoUrl": "https://cdn/v.mp4", "caption": "vídeo"}}, "video", "vídeo", "https://cdn/v.mp4", "[Vídeo] vídeo"),
+    ({"audio": {"audioUrl": "https://cdn/a.ogg"}}, "audio", "[Áudio]", "https://cdn/a.ogg", "[Áudio]"),
+    (
+        {"document": {"documentUrl": "https://cdn/d.pdf", "fileName": "boleto.pdf"}},
+        "document", "[Documento] boleto.pdf", "https://cdn/d.pdf", "[Documento] boleto.pdf",
+    ),
+    ({}, "text", "", None, ""),
+])
+def test_received_message_content(content, message_type, message, media_url, summary):
+    event = decode_webhook(json.dumps(_received(**content)))
+
+    assert isinstance(event, ReceivedMessage)
+    assert (event.message_type, event.message, event.media_url) == (message_type, message, media_url)
+    assert event.summary == summary
+    assert event.message_id == "3EB0A0C1"
+    assert event.phone == "5521999990000"
+    assert event.timestamp == datetime.fromtimestamp(MOMMENT / 1000)
+    assert event.instance_id == "instancia"
+    assert not event.from_me and not event.is_group
+
+
+@pytest.mark.parametrize("flags, from_me, is_group", [
+    ({"fromMe": True}, True, False),
+    ({"isGroup": True, "senderName": "Ana", "chatName": "Equipe"}, False, True),
+])
+def test_received_message_flags(flags, from_me, is_group):
+    event = extract_received_message(_received(text={"message": "oi"}, **flags))
+    assert (event.from_me, event.is_group) == (from_me, is_group)
+    if is_group:
+        assert (event.sender_name, event.chat_name) == ("Ana", "Equipe")
+
+
+def test_received_message_without_type_uses_default():
+    data = _received(text={"message": "oi"})
+    del data["type"]
+    assert isinstance(decode_webhook(data, default_type=RECEIVED_CALLBACK), ReceivedMessage)
+
+
+@pytest.mark.parametrize("payload", [
+    b"{not json",
+    b"[1, 2]",
+    {"type": "OutroCallback"},
+    {"phone": "5521999990000"},
+    {"type": RECEIVED_CALLBACK, "text": {"message": "sem telefone"}},
+    _received(momment="ontem"),
+    _received(image="https://cdn/img.jpg"),
+    _received(phone=True),
+])
+def test_invalid_payloads_raise(payload):
+    with pytest.raises(WebhookPayloadError):
+        decode_webhook(payload)
+
+
+@pytest.mark.parametrize("data, message_ids", [
+    ({"ids": ["a", "b", "c"]}, ("a", "b", "c")),
+    ({"ids": ["a"]}, ("a",)),
+    ({"messageId": "a"}, ("a",)),
+])
+def test_message_status(data, message_ids):
+    event = decode_webhook(
+        {"status": "READ", "phone": "5521999990000", "momment": MOMMENT, **data},
+        default_type=MESSAGE_STATUS_CALLBACK,
+    )
+    assert event == MessageStatusEvent(
+        message_ids=message_ids,
+        status="READ",
+        phone="5521999990000",
+        timestamp=datetime.fromtimestamp(MOMMENT / 1000),
+    )
+
+
+@pytest.mark.parametrize("data", [
+    {"type": MESSAGE_STATUS_CALLBACK, "status": "READ"},
+    {"type": MESSAGE_STATUS_CALLBACK, "status": "READ", "ids": []},
+    {"type": MESSAGE_STATUS_CALLBACK, "status": "READ", "ids": "a"},
+    {"type": MESSAGE_STATUS_CALLBACK, "status": "READ", "ids": ["a", 1]},
+    {"type": MESSAGE_STATUS_CALLBACK, "ids": ["a"]},
+])
+def test_invalid_message_status(data):
+    with pytest.raises(WebhookPayloadError):
+        decode_webhook(data)
+
+
+@pytest.mark.parametrize("data, connected", [
+    ({"type": "ConnectedCallback", "connected": True}, True),
+    ({"type": "ConnectedCallback"}, True),
+    ({"type": DISCONNECTED_CALLBACK, "error": "Device has been disconnected"}, False),
+    ({"disconnected": True}, False),
+    ({"connected": True}, True),
+    ({"connected": False}, False),
+    ({}, False),
+])
+def test_connection_events(data, connected):
+    event = decode_connection_event({"instanceId": "instancia", "momment": MOMMENT, **data})
+    assert event == ConnectionEvent(
+        connected=connected,
+        instance_id="instancia",
+        timestamp=datetime.fromtimestamp(MOMMENT / 1000),
+        error=data.get("error"),
+    )
+    if "type" in data:
+        assert decode_webhook({"instanceId": "instancia", "momment": MOMMENT, **data}) == event
+
+
+def test_disconnect_route_default_type():
+    assert decode_webhook({}, default_type=DISCONNECTED_CALLBACK) == ConnectionEvent(connected=False)
+
+
+@pytest.mark.parametrize("data, status, is_online", [
+    ({"status": "AVAILABLE"}, "AVAILABLE", True),
+    ({"status": "COMPOSING"}, "COMPOSING", True),
+    ({"status": "UNAVAILABLE", "lastSeen": MOMMENT}, "UNAVAILABLE", False),
+    ({"presence": {"isOnline": True}}, "AVAILABLE", True),
+])
+def test_chat_presence(data, status, is_online):
+    event = decode_webhook({"type": "PresenceChatCallback", "phone": "5521999990000", **data})
+    assert (event.status, event.is_online) == (status, is_online)
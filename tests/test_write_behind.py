@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from clint_api.models.message_history import Base, MessageDirection, MessageHistory
+from clint_api.services.message_status_applier import MessageStatusApplier, latest_status
+from clint_api.utils.write_behind import WriteBehindBuffer
+
+
+class RecordingBuffer(WriteBehindBuffer):
+    def __init__(self, batch_size=100):
+        super().__init__("test_buffer", flush_interval=60, batch_size=batch_size)
+        self.batches = []
+        self.fail = False
+
+    def merge(self, current, new):
+        return current + new
+
+    def write(self, batch):
+        if self.fail:
+            raise RuntimeError("banco indisponível")
+        self.batches.append(dict(batch))
+
+
+@pytest.fixture
+def buffer():
+    buffer = RecordingBuffer()
+    yield buffer
+    buffer.fail = False
+    buffer.close()
+
+
+def test_write_behind_buffer_is_abstract():
+    with pytest.raises(TypeError):
+        WriteBehindBuffer("x", 1, 1)
+
+
+def test_changes_to_the_same_key_are_merged_into_one_batch(buffer):
+    buffer.put("a", 1)
+    buffer.put("a", 2)
+    buffer.put("b", 5)
+
+    assert buffer.pending == 2
+    assert buffer.flush() == 2
+    assert buffer.batches == [{"a": 3, "b": 5}]
+    assert buffer.flush() == 0
+
+
+def test_failed_batch_returns_to_the_buffer_under_newer_changes(buffer):
+    buffer.put("a", 1)
+    buffer.fail = True
+    assert buffer.flush() == 0
+
+    buffer.put("a", 10)
+    buffer.fail = False
+    assert buffer.flush() == 1
+    assert buffer.batches == [{"a": 11}]
+
+
+def test_close_writes_pending_changes():
+    buffer = RecordingBuffer()
+    buffer.put("a", 1)
+    buffer.close()
+    assert buffer.batches == [{"a": 1}]
+
+
+def test_latest_status_never_goes_backwards():
+    assert latest_status("READ", "DELIVERED") == "READ"
+    assert latest_status("sent", "READ") == "READ"
+    assert latest_status("READ", "desconhecido") == "desconhecido"
+
+
+def test_status_applier_does_not_regress_across_flushes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'message_history.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add_all(
+        MessageHistory(message_id=message_id, phone="21999990000", direction=MessageDirection.SENT, status="sent")
+        for message_id in ("m1", "m2")
+    )
+    session.commit()
+
+    applier = MessageStatusApplier(session_factory=Session, flush_interval=60, batch_size=100)
+    try:
+        applier.record("m1", "READ")
+        applier.record("m2", "DELIVERED")
+        applier.flush()
+        applier.record("m1", "DELIVERED")
+        applier.record("m2", "READ")
+        applier.flush()
+    finally:
+        applier.close()
+
+    statuses = dict(session.query(MessageHistory.message_id, MessageHistory.status))
+    assert statuses == {"m1": "READ", "m2": "READ"}
+    engine.dispose()